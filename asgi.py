@@ -0,0 +1 @@
+from src.asgi_app import app
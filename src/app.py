@@ -1,10 +1,102 @@
-from flask import Flask
+import hmac
+from flask import Flask, abort, jsonify, request
+from decouple import config
+from src.neo4j_utils.neo4jclient import Neo4jClient
+from src.neo4j_utils.query_cache import QueryCache
 
 app = Flask(__name__)
 
-if __name__ == '__main__':
-    app.run(port=5000, debug=True)
+# The results of the read endpoints are cached, such that hot lookups never touch the database
+# The cache lives in the memory of the process, so the API is served by a single worker process (gunicorn's default).
+# With more workers every worker has its own cache, which only drops the results of the other workers after the TTL.
+cache = QueryCache(max_entries=config('API_CACHE_SIZE', default=1024, cast=int),
+                   max_bytes=config('API_CACHE_MAX_BYTES', default=64 * 1024 ** 2, cast=int),
+                   ttl=config('API_CACHE_TTL', default=300.0, cast=float))
+
+MOVIE_QUERY = """
+MATCH (m:Movie {title: $title})
+WHERE m.year = $year OR date({year: $year}) <= m.year < date({year: $year + 1})
+OPTIONAL MATCH (m)-[:HAS_GENRE]->(g:Genre)
+RETURN m {.title, .year, .rating, .budget, genres: collect(g.genre)} AS movie
+"""
+
+FILMOGRAPHY_QUERY = """
+MATCH (p:Person {name: $name})-[r:ACTED_IN|DIRECTED|WROTE]->(m:Movie)
+RETURN m.title AS title, m.year AS year, type(r) AS role
+ORDER BY year, title
+"""
+
+AWARDS_QUERY = """
+MATCH (o:Oscar)
+WHERE ($year IS NULL OR o.year = $year) AND ($category IS NULL OR o.category = $category)
+OPTIONAL MATCH (n)-[r:NOMINATED_FOR|HAS_WON]->(o)
+RETURN o.year AS year, o.category AS category,
+       collect({nominee: coalesce(n.title, n.name), won: type(r) = 'HAS_WON'}) AS nominations
+ORDER BY year, category
+"""
+
+GENRE_QUERY = """
+MATCH (m:Movie)-[:HAS_GENRE]->(:Genre {genre: $genre})
+RETURN m.title AS title, m.year AS year, m.rating AS rating
+ORDER BY year, title
+"""
+
+
+def read(query_name: str, query: str, **parameters) -> list:
+    # The name of the query and its parameters are the key of the cached result
+    key = (query_name, tuple(sorted(parameters.items())))
+    return cache.get_or_load(key, lambda: [record.data() for record in Neo4jClient.getInstance().execute_read(query, parameters)])
+
 
 @app.route('/')
 def hello():
-    return 'Hello, World!'
\ No newline at end of file
+    return 'Hello, World!'
+
+
+@app.route('/movies/<title>/<int:year>')
+def get_movie(title, year):
+    # The year of a movie is stored as a year or as a date, so it is matched on the year or on the dates in that year
+    movies = read('movie', MOVIE_QUERY, title=title, year=year)
+    if not movies:
+        abort(404)
+    return jsonify([movie['movie'] for movie in movies])
+
+
+@app.route('/persons/<name>/movies')
+def get_filmography(name):
+    return jsonify(read('filmography', FILMOGRAPHY_QUERY, name=name))
+
+
+@app.route('/awards')
+def get_awards():
+    year = request.args.get('year', type=int)
+    category = request.args.get('category')
+    if year is None and category is None:
+        abort(400, 'Filter the awards on a year, a category or both.')
+    return jsonify(read('awards', AWARDS_QUERY, year=year, category=category))
+
+
+@app.route('/genres/<genre>/movies')
+def get_genre_movies(genre):
+    return jsonify(read('genre', GENRE_QUERY, genre=genre))
+
+
+@app.route('/cache/metrics')
+def get_cache_metrics():
+    return jsonify(cache.get_metrics())
+
+
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    # Called after a population run, such that the new graph is served at once instead of after the TTL
+    # Only callers with the API_CACHE_TOKEN may invalidate the cache, without a token the endpoint is disabled
+    token = config('API_CACHE_TOKEN', default='')
+    # The bytes are compared, compare_digest only takes strings of ASCII characters
+    authorization = request.headers.get('Authorization', '').encode()
+    if not token or not hmac.compare_digest(authorization, f'Bearer {token}'.encode()):
+        abort(403)
+    return jsonify({'invalidated': cache.invalidate()})
+
+
+if __name__ == '__main__':
+    app.run(port=5000, debug=True)
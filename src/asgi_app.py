@@ -0,0 +1,124 @@
+from urllib.parse import parse_qs
+import json
+import re
+from src.app import MOVIE_QUERY, FILMOGRAPHY_QUERY, AWARDS_QUERY, GENRE_QUERY
+from src.neo4j_utils.async_neo4jclient import AsyncNeo4jClient
+
+# The records are sent in chunks of about this many bytes, except the first record which is sent at once
+CHUNK_SIZE = 64 * 1024
+
+
+def get_awards_parameters(match, query):
+    year = query.get('year', [None])[0]
+    category = query.get('category', [None])[0]
+    if year is None and category is None:
+        raise ValueError('Filter the awards on a year, a category or both.')
+    return {'year': int(year) if year is not None else None, 'category': category}
+
+
+# The path of every endpoint, its query, the function that makes the parameters and the function that converts a record
+ROUTES = [
+    (re.compile(r'/movies/(?P<title>[^/]+)/(?P<year>\d+)'), MOVIE_QUERY,
+     lambda match, query: {'title': match['title'], 'year': int(match['year'])}, lambda record: record['movie']),
+    (re.compile(r'/persons/(?P<name>[^/]+)/movies'), FILMOGRAPHY_QUERY,
+     lambda match, query: match.groupdict(), lambda record: record.data()),
+    (re.compile(r'/awards'), AWARDS_QUERY,
+     get_awards_parameters, lambda record: record.data()),
+    (re.compile(r'/genres/(?P<genre>[^/]+)/movies'), GENRE_QUERY,
+     lambda match, query: match.groupdict(), lambda record: record.data()),
+]
+
+
+class StreamingApp():
+    """
+    A class used to serve the read endpoints of the API as an ASGI application.
+    The records are streamed to the client as newline-delimited JSON while they arrive from the database,
+    so neither the time to the first byte nor the memory of a request grows with the size of the result.
+
+    Attributes
+    ----------
+    client : AsyncNeo4jClient
+        The client of the database, made when the server starts.
+    """
+
+    def __init__(self) -> None:
+        self.client = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.handle(scope, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.client = AsyncNeo4jClient()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.client is not None:
+                    await self.client.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def respond(self, send, status: int, body: dict):
+        await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
+
+    async def handle(self, scope, send):
+        if scope['method'] != 'GET':
+            return await self.respond(send, 405, {'error': 'Only GET is supported.'})
+
+        for pattern, query, make_parameters, convert in ROUTES:
+            match = pattern.fullmatch(scope['path'])
+            if match:
+                break
+        else:
+            return await self.respond(send, 404, {'error': 'Not found.'})
+
+        try:
+            parameters = make_parameters(match, parse_qs(scope['query_string'].decode()))
+        except ValueError as error:
+            return await self.respond(send, 400, {'error': str(error)})
+
+        if self.client is None:
+            # Servers without lifespan support make the client on the first request
+            self.client = AsyncNeo4jClient()
+
+        # Wait for the first record before sending the headers, such that a failing query still gets an error status
+        records = self.client.stream(query, parameters)
+        try:
+            first = await anext(records, None)
+        except Exception as error:
+            await records.aclose()
+            return await self.respond(send, 500, {'error': str(error)})
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'application/x-ndjson')]})
+        if first is None:
+            return await send({'type': 'http.response.body', 'body': b''})
+        await send({'type': 'http.response.body', 'body': self.encode(convert(first)), 'more_body': True})
+
+        chunk = []
+        size = 0
+        try:
+            async for record in records:
+                line = self.encode(convert(record))
+                chunk.append(line)
+                size += len(line)
+                if size >= CHUNK_SIZE:
+                    await send({'type': 'http.response.body', 'body': b''.join(chunk), 'more_body': True})
+                    chunk = []
+                    size = 0
+        except Exception as error:
+            # The status was already sent, so a failure halfway is reported as the last line
+            chunk.append(self.encode({'error': str(error)}))
+        finally:
+            await records.aclose()
+        await send({'type': 'http.response.body', 'body': b''.join(chunk)})
+
+    def encode(self, value) -> bytes:
+        return (json.dumps(value, default=str) + '\n').encode()
+
+
+app = StreamingApp()
@@ -0,0 +1,320 @@
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import pandas as pd
+
+# The cleaner modules import each other as top-level modules, like when they are run as scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'cleaner'))
+
+from src.neo4j_utils.neo4jclient import Neo4jClient
+from src.benchmarks.stand_in_client import StandInNeo4jClient
+
+# The stand-in client is installed before the domain model is imported, because the domain model gets the client on import
+Neo4jClient._instance = StandInNeo4jClient()
+
+from data_wrapper import DataWrapper, DataSet, DataMatcher
+from edge_extractor import EdgeExtractor
+from src.domainmodel.neo4j_node import Node
+from src.domainmodel.movie_node import Movie
+from src.domainmodel.genre_node import Genre
+from src.domainmodel.hasGenre_relation import HasGenreRelation
+from src.domainmodel.neo4j_batch import NodeBatch, RelationBatch
+from src.benchmarks.synthetic import write_movies
+
+# The headers of the synthetic table, in the format of the sources
+HEADERS = ['movie_name', 'movie_date', 'movie_rating', 'movie_genre', 'actors', 'directors', 'writers', 'award_category', 'award_winner']
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """
+    Decorator that registers a benchmark.
+    The decorated function prepares the data of a benchmark and returns the function that is timed,
+    which returns the number of rows it produced.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def clean_wrapper(path: Path, steps: list = ['set_headers', 'make_date', 'make_boolean'], arrow_lists: bool = False) -> DataWrapper:
+    wrapper = DataWrapper(path)
+    if 'set_headers' in steps:
+        wrapper.set_headers(*HEADERS, arrow_lists=arrow_lists)
+    if 'make_date' in steps:
+        wrapper.make_date('movie_date')
+    if 'make_boolean' in steps:
+        for true_value, false_value in [('True', 'False'), ('1', '0'), ('TRUE', 'FALSE'), ('golden', 'finalized')]:
+            wrapper.make_boolean('award_winner', true_value, false_value)
+    return wrapper
+
+
+def make_dataset(path: Path, name: str, headers: list, arrow_lists: bool = False) -> DataSet:
+    data = clean_wrapper(path, arrow_lists=arrow_lists).get_data()
+    dataset = DataSet(name)
+    dataset.set_headers(*headers)
+    dataset.add_data(data[[header for header in headers if header in data.columns]])
+    return dataset
+
+
+@benchmark('DataWrapper.set_headers')
+def bench_set_headers(path: Path):
+    wrapper = DataWrapper(path)
+
+    def run():
+        wrapper.set_headers(*HEADERS)
+        return len(wrapper.get_data())
+    return run
+
+
+@benchmark('DataWrapper.set_headers[arrow]')
+def bench_set_headers_arrow(path: Path):
+    wrapper = DataWrapper(path)
+
+    def run():
+        wrapper.set_headers(*HEADERS, arrow_lists=True)
+        return len(wrapper.get_data())
+    return run
+
+
+@benchmark('DataWrapper.make_date')
+def bench_make_date(path: Path):
+    wrapper = clean_wrapper(path, ['set_headers'])
+
+    def run():
+        wrapper.make_date('movie_date')
+        return len(wrapper.get_data())
+    return run
+
+
+@benchmark('DataWrapper.make_boolean')
+def bench_make_boolean(path: Path):
+    wrapper = clean_wrapper(path, ['set_headers'])
+
+    def run():
+        for true_value, false_value in [('True', 'False'), ('1', '0'), ('TRUE', 'FALSE'), ('golden', 'finalized')]:
+            wrapper.make_boolean('award_winner', true_value, false_value)
+        return len(wrapper.get_data())
+    return run
+
+
+@benchmark('DataSet.explode_data')
+def bench_explode_data(path: Path):
+    dataset = make_dataset(path, 'Movie', ['movie_name', 'movie_date', 'movie_genre', 'actor'])
+
+    def run():
+        dataset.explode_data()
+        return len(dataset.get_data())
+    return run
+
+
+@benchmark('DataSet.explode_data[arrow]')
+def bench_explode_data_arrow(path: Path):
+    dataset = make_dataset(path, 'Movie', ['movie_name', 'movie_date', 'movie_genre', 'actor'], arrow_lists=True)
+
+    def run():
+        dataset.explode_data()
+        return len(dataset.get_data())
+    return run
+
+
+@benchmark('DataSet.melt_data')
+def bench_melt_data(path: Path):
+    dataset = make_dataset(path, 'Person', ['person_name', 'person_dateofbirth', 'actor', 'director', 'writer'])
+    dataset.explode_data()
+    data = dataset.get_data()
+    dataset.data = data.assign(person_name=None, person_dateofbirth=None)
+
+    def run():
+        dataset.melt_data('person_dateofbirth', 'person_name')
+        return len(dataset.get_data())
+    return run
+
+
+@benchmark('EdgeExtractor.extract')
+def bench_extract(path: Path):
+    wrapper = clean_wrapper(path)
+    extractor = EdgeExtractor()
+
+    def run():
+        list_columns = extractor.get_list_columns(wrapper.get_data())
+        tables = extractor.extract(wrapper, list_columns)
+        return sum(len(table) for table in tables.values()) + len(extractor.extract_persons(wrapper, list_columns))
+    return run
+
+
+@benchmark('DataMatcher.aggregate')
+def bench_aggregate(path: Path):
+    data = make_dataset(path, 'Movie', ['movie_name', 'movie_date', 'movie_rating', 'movie_genre']).get_data()
+    matcher = DataMatcher()
+
+    def run():
+        return len(matcher.aggregate(data, 'movie_name', 'movie_date', dif_timestamps=True, use_cache=False))
+    return run
+
+
+@benchmark('Node.create_many')
+def bench_node_create_many(path: Path):
+    data = pd.read_csv(path, usecols=['title', 'date', 'rating'])
+    Node.registry.clear()
+
+    def run():
+        # The domain objects are part of the cost of this path, so they are made in the timed function
+        return len(Movie.create_many(Movie(title, year, rating, None) for title, year, rating in zip(data['title'], data['date'], data['rating'])))
+    return run
+
+
+@benchmark('NodeBatch.create')
+def bench_node_batch(path: Path):
+    data = pd.read_csv(path, usecols=['title', 'date', 'rating'])
+    Node.registry.clear()
+
+    def run():
+        return NodeBatch(Movie, data, {'title': 'title', 'date': 'year', 'rating': 'rating'}).create()
+    return run
+
+
+def read_edges(path: Path) -> pd.DataFrame:
+    data = pd.read_csv(path, usecols=['title', 'date', 'genres'])
+    data['genres'] = data['genres'].str.split(',|;')
+    data = data.explode('genres')
+    data['genres'] = data['genres'].str.strip()
+    return data
+
+
+@benchmark('Relation.create_many')
+def bench_relation_create_many(path: Path):
+    data = read_edges(path)
+    Node.registry.clear()
+
+    def run():
+        relations = (HasGenreRelation(Movie(title, year, None, None), Genre(genre))
+                     for title, year, genre in zip(data['title'], data['date'], data['genres']))
+        return len(HasGenreRelation.create_many(relations))
+    return run
+
+
+@benchmark('RelationBatch.create')
+def bench_relation_batch(path: Path):
+    data = read_edges(path)
+    Node.registry.clear()
+
+    def run():
+        return RelationBatch(HasGenreRelation, data, Movie, {'title': 'title', 'date': 'year'}, Genre, {'genres': 'genre'}).create()
+    return run
+
+
+def run_benchmarks(sizes: list, names: list, directory: Path, repeat: int = 1) -> dict:
+    """
+    Function that runs the benchmarks on synthetic tables of the given sizes.
+
+    Parameters
+    ----------
+    sizes : list
+        The numbers of rows of the synthetic tables.
+    names : list
+        The benchmarks to be run.
+    directory : Path
+        The directory of the synthetic tables.
+    repeat : int
+        The number of runs of every benchmark, the fastest run is kept.
+
+    Returns
+    -------
+    dict
+        The rows, the rows produced, the seconds and the rows per second of every benchmark and size.
+    """
+    results = {}
+    for rows in sizes:
+        path = write_movies(directory, rows)
+        for name in names:
+            seconds = []
+            for _ in range(repeat):
+                # The setup is not timed and its output is hidden, such that only the results are printed
+                with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                    run = BENCHMARKS[name](path)
+                    start = time.perf_counter()
+                    rows_out = run()
+                    seconds.append(time.perf_counter() - start)
+            best = min(seconds)
+            results[f'{name}[{rows}]'] = {'benchmark': name, 'rows': rows, 'rows_out': int(rows_out), 'seconds': round(best, 4),
+                                          'rows_per_second': round(rows / best, 1) if best else 0.0}
+            print(f'{name:<32}{rows:>10}{best:>10.3f}s')
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25, min_seconds: float = 0.05) -> dict:
+    """
+    Function that compares the results with a baseline.
+
+    Parameters
+    ----------
+    results : dict
+        The results of this run.
+    baseline : dict
+        The results of the baseline run.
+    tolerance : float
+        The fraction a benchmark may be slower than the baseline before it is flagged.
+    min_seconds : float
+        The number of seconds a benchmark must be slower before it is flagged, such that noise in fast benchmarks is ignored.
+
+    Returns
+    -------
+    dict
+        The status of every benchmark: new, ok, faster or regression.
+    """
+    statuses = {}
+    for key, result in results.items():
+        if key not in baseline:
+            statuses[key] = 'new'
+            continue
+        before = baseline[key]['seconds']
+        if result['seconds'] > before * (1 + tolerance) and result['seconds'] - before > min_seconds:
+            statuses[key] = 'regression'
+        elif result['seconds'] < before / (1 + tolerance):
+            statuses[key] = 'faster'
+        else:
+            statuses[key] = 'ok'
+    return statuses
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the cleaning and loading hot paths on synthetic data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='The numbers of rows, e.g. 10000 to 10000000.')
+    parser.add_argument('--only', nargs='+', default=list(BENCHMARKS.keys()), choices=list(BENCHMARKS.keys()), help='The benchmarks to be run.')
+    parser.add_argument('--repeat', type=int, default=1, help='The number of runs of every benchmark, the fastest run is kept.')
+    parser.add_argument('--directory', type=Path, default=Path('data/benchmarks'), help='The directory of the synthetic data and the results.')
+    parser.add_argument('--baseline', type=Path, default=None, help='The baseline to compare with, <directory>/baseline.json by default.')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='The fraction a benchmark may be slower than the baseline.')
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or args.directory / 'baseline.json'
+    results = run_benchmarks(args.sizes, args.only, args.directory, args.repeat)
+    report = {'python': platform.python_version(), 'pandas': pd.__version__, 'machine': platform.machine(),
+              'processor': platform.processor(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+
+    statuses = {}
+    if baseline_path.is_file():
+        statuses = compare(results, json.loads(baseline_path.read_text())['results'], args.tolerance)
+        print(f'\n{"Benchmark":<40}{"Seconds":>10}{"Baseline":>10}  Status')
+        baseline = json.loads(baseline_path.read_text())['results']
+        for key, status in statuses.items():
+            before = f'{baseline[key]["seconds"]:.3f}' if key in baseline else '-'
+            print(f'{key:<40}{results[key]["seconds"]:>10.3f}{before:>10}  {status}')
+        report['statuses'] = statuses
+
+    (args.directory / 'results.json').write_text(json.dumps(report, indent=4))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=4))
+        print(f'Stored the baseline in {baseline_path}.')
+
+    # A non-zero exit code lets a CI job fail on a regression
+    sys.exit(1 if 'regression' in statuses.values() else 0)
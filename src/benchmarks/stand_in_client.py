@@ -0,0 +1,78 @@
+import itertools
+from neo4j import READ_ACCESS, WRITE_ACCESS
+
+
+class StandInRecord(dict):
+    """
+    A record of the stand-in client, which supports the parts of the driver's Record that the domain model uses.
+    """
+
+    def data(self):
+        return dict(self)
+
+
+class StandInNode(dict):
+    """
+    A node of the stand-in client, with an element ID like the driver's Node.
+    """
+
+    def __init__(self, properties: dict, element_id: str) -> None:
+        super().__init__(properties)
+        self.element_id = element_id
+
+
+class StandInNeo4jClient():
+    """
+    A class used to stand in for the Neo4jClient in the benchmarks.
+    It does not run the queries, but returns records with the shape the domain model expects,
+    such that only the time spent on the client side of a load is measured.
+
+    Attributes
+    ----------
+    queries : int
+        The number of queries that were sent.
+    rows : int
+        The number of rows that were sent.
+    """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.rows = 0
+        self.element_ids = itertools.count()
+
+    def make_element_id(self) -> str:
+        return f'4:stand-in:{next(self.element_ids)}'
+
+    def execute_query(self, query, parameters={}, access_mode: str = WRITE_ACCESS):
+        if access_mode == READ_ACCESS:
+            return self.execute_read(query, parameters)
+        return self.execute_write(query, parameters)
+
+    def execute_write(self, query, parameters={}):
+        self.queries += 1
+        if 'rows' in parameters:
+            rows = parameters['rows']
+        elif 'row_count' in parameters:
+            rows = [{} for _ in range(parameters['row_count'])]
+        else:
+            rows = [parameters]
+        self.rows += len(rows)
+
+        # Answer with the columns of the query that was sent
+        if 'RETURN count(r)' in query:
+            return [StandInRecord(count=len(rows))]
+        if 'RETURN i, elementId(n)' in query:
+            return [StandInRecord(i=i, element_id=self.make_element_id()) for i in range(len(rows))]
+        if 'RETURN n' in query:
+            return [StandInRecord(n=StandInNode(row, self.make_element_id())) for row in rows]
+        return [StandInRecord(r={}) for _ in rows]
+
+    def execute_read(self, query, parameters={}):
+        self.queries += 1
+        return []
+
+    def execute_many(self, query, param_batches):
+        return [self.execute_write(query, parameters) for parameters in param_batches]
+
+    def close(self):
+        pass
@@ -0,0 +1,116 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = ['Tom', 'Morgan', 'Meryl', 'Denzel', 'Cate', 'Leonardo', 'Viola', 'Frances', 'Daniel', 'Emma',
+               'Joaquin', 'Natalie', 'Christian', 'Kate', 'Anthony', 'Julia', 'Robert', 'Sigourney', 'Kevin', 'Olivia']
+LAST_NAMES = ['Hanks', 'Freeman', 'Streep', 'Washington', 'Blanchett', 'DiCaprio', 'Davis', 'McDormand', 'Day-Lewis', 'Stone',
+              'Phoenix', 'Portman', 'Bale', 'Winslet', 'Hopkins', 'Roberts', 'De Niro', 'Weaver', 'Spacey', 'Colman']
+TITLE_WORDS = ['The', 'Last', 'Night', 'Return', 'Of', 'King', 'Shadow', 'River', 'Silent', 'Dark', 'Star', 'Road', 'Lost',
+               'City', 'Dream', 'Fire', 'Winter', 'Blue', 'Empire', 'Garden', 'Secret', 'Storm', 'Glass', 'Iron']
+GENRES = ['Drama', 'Comedy', 'Crime', 'Action', 'Thriller', 'Romance', 'Horror', 'Sci-Fi', 'Fantasy', 'Animation',
+          'Documentary', 'Biography', 'History', 'War', 'Western', 'Musical']
+CATEGORIES = ['Best Picture', 'Best Director', 'Actor in a Leading Role', 'Actress in a Leading Role', 'Writing', 'Cinematography']
+WINNER_VALUES = ['True', 'False', '1', '0', 'TRUE', 'FALSE', 'golden', 'finalized']
+
+
+def pick(rng: np.random.Generator, values: list, size: int) -> np.ndarray:
+    return np.array(values, dtype=object)[rng.integers(0, len(values), size)]
+
+
+def make_names(rng: np.random.Generator, population: int) -> np.ndarray:
+    # A fixed population of names, such that names repeat across rows and columns like in the real sources
+    first = pick(rng, FIRST_NAMES, population)
+    last = pick(rng, LAST_NAMES, population)
+    return first + ' ' + last + ' ' + np.arange(population).astype(str).astype(object)
+
+
+def make_codes(size: int, length: int = 4) -> np.ndarray:
+    # Spell the numbers 0 .. size - 1 in letters, e.g. Baaa, a title that ends in a number is only matched exactly
+    digits = np.arange(size)[:, None] // 26 ** np.arange(length - 1, -1, -1) % 26
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'), dtype=object)[digits]
+    letters[:, 0] = np.char.upper(letters[:, 0].astype(str)).astype(object)
+    return letters.sum(axis=1)
+
+
+def drop_letter(word: str) -> str:
+    # Drop the letter before the last one, e.g. Winter -> Wintr
+    return word[:-2] + word[-1] if len(word) > 2 else word
+
+
+def make_lists(rng: np.random.Generator, values, size: int, max_length: int) -> pd.Series:
+    # Join up to max_length values per row with the separators of the sources, commas and semicolons
+    lengths = rng.integers(1, max_length + 1, size)
+    joined = pd.Series(pick(rng, values, size))
+    for i in range(1, max_length):
+        separator = ', ' if i % 2 else '; '
+        joined = joined.where(lengths <= i, joined + separator + pick(rng, values, size))
+    return joined
+
+
+def make_dates(rng: np.random.Generator, size: int) -> pd.Series:
+    # Mix plain years, ISO dates and written out dates, like the sources do
+    # Every date is formatted once and picked by index, which is much faster than formatting every row
+    calendar = pd.date_range('1927-01-01', '2023-12-31', freq='D')
+    formats = np.stack([calendar.strftime('%Y').to_numpy(dtype=object),
+                        calendar.strftime('%Y-%m-%d').to_numpy(dtype=object),
+                        calendar.strftime('%B %d, %Y').to_numpy(dtype=object)])
+    return pd.Series(formats[rng.integers(0, 3, size), rng.integers(0, len(calendar), size)], dtype=object)
+
+
+def make_movies(rows: int, seed: int = 0, duplicate_fraction: float = 0.2) -> pd.DataFrame:
+    """
+    Function that makes a synthetic movie table with the columns and the messiness of the sources.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows, e.g. from 10k to 10M.
+    seed : int
+        The seed of the random generator, such that the same table is made in every run.
+    duplicate_fraction : float
+        The fraction of the rows that repeat another movie, with a dropped letter in the title for half of them.
+
+    Returns
+    -------
+    pd.DataFrame
+        The movie table.
+    """
+    rng = np.random.default_rng(seed)
+    unique = max(1, int(rows * (1 - duplicate_fraction)))
+
+    # The titles end in a code of letters that makes them unique, the matcher only matches titles that end in a number exactly
+    words = [pick(rng, TITLE_WORDS, unique) for _ in range(4)]
+    codes = make_codes(unique, length=max(3, int(np.ceil(np.log(unique + 1) / np.log(26)))))
+    titles = pd.Series(words[0] + ' ' + words[1] + ' ' + words[2] + ' ' + words[3] + ' ' + codes)
+    typo_titles = pd.Series(words[0] + ' ' + pd.Series(words[1]).map(drop_letter).to_numpy() + ' ' + words[2] + ' ' + words[3] + ' ' + codes)
+    dates = make_dates(rng, unique)
+
+    # Repeat some movies, half of them with a dropped letter in a word of the title, such that the matcher has work to do
+    repeats = rng.integers(0, unique, rows - unique)
+    repeated_titles = titles.iloc[repeats].reset_index(drop=True)
+    typo = rng.random(len(repeats)) < 0.5
+    repeated_titles = repeated_titles.where(~typo, typo_titles.iloc[repeats].reset_index(drop=True))
+
+    data = pd.DataFrame({
+        'title': pd.concat([titles, repeated_titles], ignore_index=True),
+        'date': pd.concat([dates, dates.iloc[repeats]], ignore_index=True),
+    })
+    data['rating'] = np.round(rng.uniform(1, 10, rows), 1)
+    people = make_names(rng, max(10, rows // 5))
+    data['genres'] = make_lists(rng, GENRES, rows, 3)
+    data['actors'] = make_lists(rng, people, rows, 4)
+    data['directors'] = make_lists(rng, people, rows, 1)
+    data['writers'] = make_lists(rng, people, rows, 2)
+    data['award_category'] = pick(rng, CATEGORIES, rows)
+    data['award_winner'] = pick(rng, WINNER_VALUES, rows)
+    return data
+
+
+def write_movies(directory: Path, rows: int, seed: int = 0) -> Path:
+    # The table is written once per size, DataWrappers read it from disk like the real sources
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'movies_{rows}_{seed}.csv'
+    if not path.is_file():
+        make_movies(rows, seed).to_csv(path, index=False)
+    return path
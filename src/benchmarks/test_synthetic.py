@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+from src.benchmarks.synthetic import make_movies
+
+# The cleaner modules import each other as top-level modules, like when they are run as scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'cleaner'))
+
+from data_wrapper import DataMatcher
+
+
+def test_the_matcher_finds_the_repeated_movies_with_a_typo():
+    data = make_movies(2000)
+    rows = data.assign(movie_date=data['date'].str.extract(r'(\d{4})')[0].astype(int)).rename(columns={'title': 'movie_name'})
+
+    # Every movie is one group, including its repeats with a dropped letter, and no two movies are merged
+    groups = DataMatcher().match_keys(rows[['movie_name', 'movie_date']], ['movie_name', 'movie_date'])
+    assert len(groups) == 1600
+    assert data['title'].iloc[1600:].isin(data['title'].iloc[:1600]).mean() < 0.6
@@ -1,30 +1,49 @@
 # When this file is executed, it will clean the data in the data folder using the other files in the cleaner folder.
-
-import os
-import threading
-
-# Run the data_wrapper_test.py file 
-os.system('python src/cleaner/data_wrapper_test.py')
-
-
-# Run the following files in parrallel using multithreading
-
-# Define the files to run
-files = ['data_extension_person.py', 'data_extension_budget.py']
-
-# Define a function to run the files
-def run_file(file):
-    os.system('python src/cleaner/' + file)
-
-# Create a list to store the threads
-threads = []
-
-# Iterate over the files and run them in parallel
-for file in files:
-    thread = threading.Thread(target=run_file, args=[file])
-    thread.start()
-    threads.append(thread)
-
-# Wait for the threads to finish
-for thread in threads:
-    thread.join()
+# The stages only run when their inputs changed, e.g. `python src/cleaner/clean.py` cleans and extends the data
+# and `python src/cleaner/clean.py populate` also populates the graph database.
+
+import sys
+from pathlib import Path
+from decouple import config
+from pipeline import Stage, Pipeline
+from data_wrapper_test import SOURCES, DATASETS, stage_path
+
+CLEANED_PATHS = [f'data/cleaned_data/{name}.csv' for name in DATASETS]
+
+# The modules that the cleaning script imports, a stage runs again when one of them changed
+CLEANER = ['src/cleaner/data_wrapper_test.py', 'src/cleaner/data_wrapper.py', 'src/cleaner/data_cache.py',
+           'src/cleaner/instrumentation.py', 'src/cleaner/dtype_schema.py', 'src/cleaner/edge_extractor.py',
+           'src/cleaner/parallel_cleaning.py']
+WIKIDATA = ['src/cleaner/wikidata_client.py', 'src/cleaner/wikidata_index.py'] + \
+           ([config('WIKIDATA_INDEX')] if config('WIKIDATA_INDEX', default='') else [])
+SCRIPT = [sys.executable, 'src/cleaner/data_wrapper_test.py']
+
+# Define the stages with the files they read and write
+# Every source is cleaned in its own stage and every cleaned dataset is matched in its own stage,
+# such that a changed source is only cleaned again and only the datasets it adds to are matched again
+stages = [
+    *[Stage(f'clean {source}', SCRIPT + ['clean', source], inputs=[path.as_posix()] + CLEANER,
+            outputs=[stage_path(source, name) for name in DATASETS])
+      for source, (path, _, _) in SOURCES.items()],
+    *[Stage(f'match {name}', SCRIPT + ['match', name], inputs=[stage_path(source, name) for source in SOURCES] + CLEANER,
+            outputs=[f'data/cleaned_data/{name}.csv'])
+      for name in DATASETS],
+    Stage('extend_person', [sys.executable, 'src/cleaner/data_extension_person.py'],
+          inputs=['data/cleaned_data/Person.csv', 'src/cleaner/data_extension_person.py'] + WIKIDATA,
+          outputs=['data/cleaned_data/Person_extended.csv']),
+    Stage('extend_budget', [sys.executable, 'src/cleaner/data_extension_budget.py'],
+          inputs=['data/cleaned_data/Movie.csv', 'src/cleaner/data_extension_budget.py'] + WIKIDATA,
+          outputs=['data/cleaned_data/Movie_extended.csv', 'Movie_extended.csv']),
+    Stage('populate', [sys.executable, '-m', 'src.population.neo4j_example'],
+          inputs=CLEANED_PATHS + ['data/cleaned_data/merged_movies.csv', 'data/cleaned_data/Person_extended.csv', 
+                                  'src/population/neo4j_example.py'],
+          env={'PYTHONPATH': str(Path('.').resolve())}),
+]
+
+if __name__ == '__main__':
+    # Run the given stages, by default the cleaning and the extension of the data
+    targets = sys.argv[1:] or ['extend_person', 'extend_budget']
+    report = Pipeline(stages).run(targets)
+
+    if any(result['status'] in ['failed', 'blocked'] for result in report.values()):
+        sys.exit(1)
@@ -0,0 +1,8 @@
+# The cleaner modules import each other by their file names, like when they are run from this folder
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# data_wrapper_test.py is the cleaning script and not a test module
+collect_ignore = ['data_wrapper_test.py']
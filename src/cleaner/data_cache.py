@@ -0,0 +1,259 @@
+from pathlib import Path
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Bump the version when a cleaning step changes its output, such that the old entries are not used anymore
+CACHE_VERSION = 2
+
+
+def hash_file(path: Path) -> str:
+    """
+    Function for getting the hash of the bytes of a file.
+
+    Parameters
+    ----------
+    path : Path
+        The path to the file.
+
+    Returns
+    -------
+    str
+        The hash of the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def table_to_frame(table: pa.Table, arrow_lists: bool = False) -> pd.DataFrame:
+    """
+    Function for converting an Arrow table that was made from a frame back to that frame.
+    pandas can not read back the dtypes of the Arrow list columns from the metadata of the table,
+    so those columns are left out of the conversion and wrapped in Arrow arrays again.
+    The lists of objects come back as arrays, so they are made lists again.
+
+    Parameters
+    ----------
+    table : pa.Table
+        The table, e.g. read from a Parquet or Arrow IPC file.
+    arrow_lists : bool
+        Whether to keep all the list columns as Arrow list columns, which skips making a list per row.
+
+    Returns
+    -------
+    pd.DataFrame
+        The frame.
+    """
+    metadata = json.loads(table.schema.metadata[b'pandas'])
+    arrow_columns = [column['name'] for column in metadata['columns'] if str(column['numpy_type']).endswith('[pyarrow]') or
+                     (arrow_lists and pa.types.is_list(table.schema.field(column['name']).type))]
+    if arrow_columns:
+        for column in metadata['columns']:
+            if column['name'] in arrow_columns and str(column['numpy_type']).endswith('[pyarrow]'):
+                column['numpy_type'] = 'object'
+        table = table.replace_schema_metadata({**table.schema.metadata, b'pandas': json.dumps(metadata).encode()})
+
+    # The Arrow columns are left out of the conversion and added as they are, in their original position
+    data = table.drop(arrow_columns).to_pandas()
+    for name in arrow_columns:
+        data.insert(table.column_names.index(name), name, pd.arrays.ArrowExtensionArray(table.column(name)))
+
+    for header in data.columns:
+        if header not in arrow_columns and data[header].dtype == 'object':
+            values = data[header].dropna()
+            if not values.empty and isinstance(values.iloc[0], np.ndarray):
+                data[header] = data[header].map(lambda x: list(x) if isinstance(x, np.ndarray) else x)
+
+    return data
+
+
+class DataCache():
+    """
+    A class used to represent a content-addressed cache for cleaned data.
+    The frames are stored as Parquet files, keyed by a hash of the source file bytes and the cleaning steps.
+
+    Attributes
+    ----------
+    directory : Path
+        The directory in which the cached frames are stored.
+    max_size : int
+        The maximum total size of the cached frames in bytes.
+
+    Methods
+    -------
+    key(*parts)
+        Returns the key for the given source files and parameters.
+    hash_file(path)
+        Returns the hash of the bytes of a file.
+    hash_frame(data)
+        Returns the hash of the content of a frame.
+    load(key)
+        Returns the cached frame for a key, or None if it is not cached.
+    store(key, data)
+        Stores a frame under a key.
+    evict()
+        Removes the least recently used frames until the cache fits its size bound.
+    """
+
+    def __init__(self, directory: Path = Path('data/.cache'), max_size: int = 2 * 1024 ** 3) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # The hashes of the files, such that an unchanged file is only read once per run
+        self.file_hashes = {}
+
+    def key(self, *parts) -> str:
+        """
+        Function for getting the key of a cache entry.
+
+        Parameters
+        ----------
+        *parts : list
+            The source files and the parameters of the entry, files are replaced by the hash of their bytes.
+
+        Returns
+        -------
+        str
+            The key of the entry.
+        """
+        digest = hashlib.sha256(f'version={CACHE_VERSION}'.encode())
+        for part in parts:
+            digest.update(self.hash_file(part).encode() if isinstance(part, Path) else repr(part).encode())
+        return digest.hexdigest()
+
+    def hash_file(self, path: Path) -> str:
+        """
+        Function for getting the hash of the bytes of a file.
+
+        Parameters
+        ----------
+        path : Path
+            The path to the file.
+
+        Returns
+        -------
+        str
+            The hash of the file.
+        """
+        # The hash is only computed again when the size or modification time of the file changed
+        stat = path.stat()
+        signature = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        if signature not in self.file_hashes:
+            self.file_hashes[signature] = hash_file(path)
+        return self.file_hashes[signature]
+
+    def hash_frame(self, data: pd.DataFrame) -> str:
+        """
+        Function for getting the hash of the content of a frame.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            The frame to be hashed.
+
+        Returns
+        -------
+        str
+            The hash of the frame.
+        """
+        digest = hashlib.sha256(repr(list(data.columns)).encode())
+        try:
+            digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+        except TypeError:
+            # Columns with lists can not be hashed directly, so their string representation is hashed
+            digest.update(pd.util.hash_pandas_object(data.astype(str), index=False).values.tobytes())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f'{key}.parquet'
+
+    def load(self, key: str) -> pd.DataFrame:
+        """
+        Function for loading a cached frame.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+
+        Returns
+        -------
+        pd.DataFrame
+            The cached frame, or None if the key is not cached.
+        """
+        path = self.path(key)
+        try:
+            data = table_to_frame(pq.read_table(path))
+            # Mark the entry as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            # The entry is missing, or another process evicted it while it was read
+            return None
+
+        return data
+
+    def store(self, key: str, data: pd.DataFrame) -> bool:
+        """
+        Function for storing a frame in the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry.
+        data : pd.DataFrame
+            The frame to be stored.
+
+        Returns
+        -------
+        bool
+            Whether the frame was stored, columns with mixed types can not be stored as Parquet.
+        """
+        path = self.path(key)
+        # Every writer has its own temporary file, such that processes that store the same key do not collide
+        temporary_path = path.with_name(f'{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp')
+        try:
+            data.to_parquet(temporary_path, index=False)
+        except (ValueError, TypeError, ImportError) as error:
+            print(f'The data could not be cached: {error}')
+            temporary_path.unlink(missing_ok=True)
+            return False
+
+        # Replace the entry at once, such that a crash never leaves a half written entry
+        os.replace(temporary_path, path)
+        self.evict()
+
+        return True
+
+    def evict(self) -> None:
+        """
+        Function that removes the least recently used entries until the cache fits its size bound.
+
+        Returns
+        -------
+        None
+        """
+        # Other processes share the cache, an entry that they removed in the meantime is skipped
+        entries = []
+        for entry in self.directory.glob('*.parquet'):
+            try:
+                entries.append((entry, entry.stat()))
+            except FileNotFoundError:
+                continue
+        entries.sort(key=lambda item: item[1].st_mtime)
+        total_size = sum(stat.st_size for _, stat in entries)
+
+        for entry, stat in entries:
+            if total_size <= self.max_size:
+                break
+            total_size -= stat.st_size
+            entry.unlink(missing_ok=True)
+
+        return
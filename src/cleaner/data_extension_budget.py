@@ -1,7 +1,9 @@
+from pathlib import Path
 import pandas as pd
-from wikidataintegrator import wdi_core
-from fuzzywuzzy import fuzz, process
+from decouple import config
 from tqdm import tqdm
+from wikidata_client import WikidataClient
+from wikidata_index import WikidataIndex
 
 
 # Read the CSV file using pandas
@@ -13,35 +15,37 @@ properties = {
     'revenue': 'P2139',
 }
 
-# Define a function to query Wikidata for a movie's information using fuzzy name matching
-def query_movie_info(movie_name):
-    # Fuzzy name matching to find the closest match
-    matching_names = process.extractOne(movie_name, df['movie_name'], scorer=fuzz.partial_ratio)
-    matched_movie_name = matching_names[0]
-
-    query = '''
-    SELECT ?movie ?movieLabel ?budget ?revenue
-    WHERE
-    {
-        ?movie rdfs:label "%s"@en.
-        OPTIONAL { ?movie wdt:%s ?budget. }
-        OPTIONAL { ?movie wdt:%s ?revenue. }
-        SERVICE wikibase:label { bd:serviceParam wikibase:language "[AUTO_LANGUAGE],en". }
-    }
-    ''' % (matched_movie_name, properties['budget'], properties['revenue'])
-
-    results = wdi_core.WDItemEngine.execute_sparql_query(query)
-    return results['results']['bindings']
+# Define the query for a batch of movies, {values} is replaced by the names in the batch
+query = '''
+SELECT ?label ?movie ?budget ?revenue
+WHERE
+{
+    {values}
+    ?movie rdfs:label ?label.
+    OPTIONAL { ?movie wdt:%s ?budget. }
+    OPTIONAL { ?movie wdt:%s ?revenue. }
+}
+''' % (properties['budget'], properties['revenue'])
+
+# Look up all the movies at once, either in the offline index built from a Wikidata dump or with the Wikidata client
+if config('WIKIDATA_INDEX', default=''):
+    index = WikidataIndex(Path(config('WIKIDATA_INDEX')))
+    results_by_name = index.lookup(df['movie_name'].tolist(), {'budget': properties['budget'], 'revenue': properties['revenue']})
+    index.close()
+else:
+    # The client batches, caches and rate limits the queries
+    client = WikidataClient()
+    results_by_name = client.lookup('movie', df['movie_name'].tolist(), query)
+    client.close()
 
 # Create empty lists to store the queried information
 movie_data = []
 no_nobudget = 0
 names_nobudget = []
 
-# Iterate over the elements of the Series and query Wikidata for each movie
+# Iterate over the movies and extract the relevant information from the results
 for movie_name in tqdm(df['movie_name']):
-    # Query the movie information
-    results = query_movie_info(movie_name)
+    results = results_by_name.get(movie_name, [])
 
     # Extract the relevant information and store it in a dictionary
     movie_info = {
@@ -67,8 +71,3 @@ movie_df.to_csv('data/cleaned_data/Movie_extended.csv', index=False)
 print('We did not find budget for ', no_nobudget, ' movies. The movie names we did not find budget for are: ')
 for movie in names_nobudget:
     print(movie)
-
-
-
-
- 
\ No newline at end of file
@@ -1,11 +1,12 @@
+from pathlib import Path
 import pandas as pd
-from wikidataintegrator import wdi_core
-from fuzzywuzzy import fuzz, process
-from datetime import datetime
+from decouple import config
 from tqdm import tqdm
+from wikidata_client import WikidataClient
+from wikidata_index import WikidataIndex
 
 # Read the CSV file using pandas
-df = pd.read_csv('data/cleaned_data/person.csv')
+df = pd.read_csv('data/cleaned_data/Person.csv')
 
 # Define the properties to query
 properties = {
@@ -14,43 +15,44 @@ properties = {
     'occupation': 'P106',
     'start_activity': 'P2031',
     'end_activity': 'P2032',
-    'instance_of': 'P31'  # Fuzzy name matching addition
 }
 
-# Define a function to query Wikidata for a person's information using fuzzy name matching
-def query_person_info_WIKI(person_name):
-    # Fuzzy name matching to find the closest match
-    matching_names = process.extractOne(person_name, df['person_name'], scorer=fuzz.partial_ratio)
-    matched_person_name = matching_names[0]
-
-    query = '''
-    SELECT ?person ?personLabel ?birthdate ?deathdate ?occupation ?occupationLabel ?start_activity ?end_activity
-    WHERE
-    {
-        ?person rdfs:label "%s"@en.
-        ?person wdt:%s ?birthdate.
-        OPTIONAL { ?person wdt:%s ?deathdate. }
-        ?person wdt:%s ?occupation.
-        ?person wdt:%s ?start_activity.
-        OPTIONAL { ?person wdt:%s ?end_activity. }
-        SERVICE wikibase:label { bd:serviceParam wikibase:language "[AUTO_LANGUAGE],en". }
-    }
-    ''' % (
-    matched_person_name, properties['birth_date'], properties['death_date'], properties['occupation'],
-    properties['start_activity'], properties['end_activity'])
+# Define the query for a batch of persons, {values} is replaced by the names in the batch
+query = '''
+SELECT ?label ?person ?birthdate ?deathdate ?occupation ?start_activity ?end_activity
+WHERE
+{
+    {values}
+    ?person rdfs:label ?label.
+    ?person wdt:%s ?birthdate.
+    OPTIONAL { ?person wdt:%s ?deathdate. }
+    ?person wdt:%s ?occupation.
+    ?person wdt:%s ?start_activity.
+    OPTIONAL { ?person wdt:%s ?end_activity. }
+}
+''' % (properties['birth_date'], properties['death_date'], properties['occupation'],
+       properties['start_activity'], properties['end_activity'])
 
-    results = wdi_core.WDItemEngine.execute_sparql_query(query)
-    return results['results']['bindings']
+# Look up all the persons at once, either in the offline index built from a Wikidata dump or with the Wikidata client
+# The index does not contain the occupations, so only the birth date and the start of the activity are required
+if config('WIKIDATA_INDEX', default=''):
+    index = WikidataIndex(Path(config('WIKIDATA_INDEX')))
+    results = index.lookup(df['person_name'].tolist(), {'birthdate': properties['birth_date'], 'deathdate': properties['death_date'],
+                                                        'start_activity': properties['start_activity'], 'end_activity': properties['end_activity']},
+                           required=['birthdate', 'start_activity'])
+    index.close()
+else:
+    # The client batches, caches and rate limits the queries
+    client = WikidataClient()
+    results = client.lookup('person', df['person_name'].tolist(), query)
+    client.close()
 
 # Create empty lists to store the queried information
 person_data = []
 
-# Iterate over the dataframe rows and query both APIs for each person
-for index, row in tqdm(df.iterrows(), total=len(df), desc='Processing'):
-    person_name = row['person_name']
-
-    # Query the person information from Wikidata
-    results_wiki = query_person_info_WIKI(person_name)
+# Iterate over the persons and extract the relevant information from the results
+for person_name in tqdm(df['person_name'], desc='Processing'):
+    results_wiki = results.get(person_name, [])
 
     # Extract the relevant information from Wikidata and store it in a dictionary
     person_info_wiki = {
@@ -70,8 +72,7 @@ person_df = pd.DataFrame(person_data)
 # Change dates to correct format
 column_names = ['birth_date', 'death_date', 'start_activity', 'end_activity']
 for column_name in column_names:
-    for i in range(len(person_df)):
-        person_df[column_name][i] = str(person_df[column_name][i])[:4]
+    person_df[column_name] = person_df[column_name].astype(str).str[:4]
 
 # Save the dataframe to a CSV file
 person_df.to_csv('data/cleaned_data/Person_extended.csv', index=False)
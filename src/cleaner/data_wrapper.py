@@ -2,9 +2,148 @@ from pathlib import Path
 import re
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from tqdm import tqdm
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz, process
+import copy
+from functools import lru_cache, wraps
 from dateutil import parser
+from data_cache import DataCache
+from dtype_schema import DtypeSchema
+from instrumentation import instrumentation, instrumented
+
+# The date formats that are tried when inferring the format of a column
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d', '%d-%m-%Y', '%d-%b-%Y', '%d/%b/%y', '%d %B %Y',
+                '%B %d, %Y', '%b %d, %Y', '%d/%m/%Y %H:%M', '%m/%d/%Y %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%SZ']
+
+# The credits of the Oscar nominees that are not names, e.g. 'Music by Jerome Kern', 'Art Direction: Cedric Gibbons',
+# 'Walt Disney, Producer' and 'head of department (Score by Max Steiner)'
+CREDIT_PREFIX = r'^[A-Za-z][A-Za-z ]*?(?: by|:)\s+'
+CREDIT_ROLES = ['producer', 'producers', 'co-producer', 'co-producers', 'associate producer', 'executive producer', 'sound director',
+                'head of department', 'musical director']
+NAME_SUFFIXES = ['Jr.', 'Sr.', 'Jr', 'Sr']
+
+
+@lru_cache(maxsize=None)
+def parse_date(value: str):
+    """
+    Function that parses a single date with dateutil, the result is cached for every unique value.
+
+    Parameters
+    ----------
+    value : str
+        The date to be parsed.
+
+    Returns
+    -------
+    pd.Timestamp
+        The parsed date, or NaT if the value can not be parsed.
+    """
+    try:
+        return pd.Timestamp(parser.parse(value))
+    except (ValueError, OverflowError, pd.errors.OutOfBoundsDatetime):
+        return pd.NaT
+
+
+def is_arrow_list(values: pd.Series) -> bool:
+    return isinstance(values.dtype, pd.ArrowDtype) and pa.types.is_list(values.dtype.pyarrow_dtype)
+
+
+def split_arrow_lists(values: pd.Series, pattern: str) -> pd.Series:
+    """
+    Function that splits the strings of a column into an Arrow list column in one vectorized pass.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The strings to be split, missing values become missing lists.
+    pattern : str
+        The regular expression to split on.
+
+    Returns
+    -------
+    pd.Series
+        The lists of strings, backed by a single Arrow array instead of a Python list per row.
+    """
+    lists = pc.split_pattern_regex(pa.array(values.astype('string')), pattern)
+    return pd.Series(pd.arrays.ArrowExtensionArray(lists), index=values.index, name=values.name)
+
+
+def clean_credits(names: pd.Series) -> pd.Series:
+    """
+    Function that reduces the credits of a column of names to one name per value.
+    The credit prefixes, the roles and the parentheses around a name are dropped, the names joined with 'and' are split,
+    and a suffix like Jr. that was split off by a comma is joined to the name before it again.
+
+    Parameters
+    ----------
+    names : pd.Series
+        The names, one per value, with the position of their row as the index and in the order of their lists.
+
+    Returns
+    -------
+    pd.Series
+        The cleaned names, with the positions of their rows as the index.
+    """
+    names = names.dropna().astype(str).str.strip()
+    # A suffix belongs to the name before it in the same list, e.g. 'Robert Towne, Jr.' becomes 'Robert Towne Jr.'
+    suffix = names.isin(NAME_SUFFIXES).to_numpy() & (np.diff(names.index.to_numpy(), prepend=-1) == 0)
+    before = np.zeros_like(suffix)
+    before[:-1] = suffix[1:]
+    names = names.where(~before, names + ' ' + names.shift(-1))[~suffix]
+
+    names = names.str.replace(r'^\((.*)\)$', r'\1', regex=True)
+    # The remarks after a role, e.g. 'head of department (Score by Max Steiner)', the composer is credited elsewhere
+    names = names.str.replace(r'\s*\(.*$', '', regex=True)
+    names = names.str.replace(CREDIT_PREFIX, '', regex=True, flags=re.IGNORECASE)
+    names = names.str.split(r'\s+(?:and|&)\s+', regex=True).explode().str.strip()
+    return names[(names != '') & ~names.str.lower().isin(CREDIT_ROLES)]
+
+
+def explode_arrow_list(data: pd.DataFrame, header: str) -> pd.DataFrame:
+    """
+    Function that explodes an Arrow list column into a row per value, like DataFrame.explode does for lists of objects.
+    The values are flattened by Arrow, the other columns are repeated with a single take.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The data to be exploded.
+    header : str
+        The Arrow list column to be exploded.
+
+    Returns
+    -------
+    pd.DataFrame
+        The exploded data, with the index of the original rows.
+    """
+    lists = pa.array(data[header])
+    lengths = pc.fill_null(pc.list_value_length(lists), 0).to_numpy()
+
+    # Like DataFrame.explode, the missing and empty lists keep their row with a missing value
+    empty = np.flatnonzero(lengths == 0)
+    positions = np.concatenate([pc.list_parent_indices(lists).to_numpy(), empty])
+    values = pa.concat_arrays([pc.list_flatten(lists), pa.nulls(len(empty), lists.type.value_type)])
+    order = np.argsort(positions, kind='stable')
+
+    exploded = data.take(positions[order])
+    exploded[header] = pd.arrays.ArrowExtensionArray(values.take(pa.array(order)))
+    return exploded
+
+
+def cleaning_step(method):
+    """
+    Decorator for the cleaning steps of a DataWrapper.
+    The step is remembered, such that it can be replayed on the chunks of the data or on the lazy data.
+    The steps themselves are not cached, the cleaned data of a lazy wrapper is cached once after all its steps.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.steps.append((method.__name__, args, kwargs))
+        return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class DataWrapper():
@@ -19,6 +158,16 @@ class DataWrapper():
         The order of the headers in the data.
     name : str
         The name of the data.
+    chunksize : int
+        The number of rows per chunk when the data is streamed, None if the data is loaded at once.
+    lazy : bool
+        Whether only the headers are loaded up front and the data is loaded when it is iterated, e.g. in another process.
+    steps : list
+        The cleaning steps that are applied to the data, such that they can be replayed on every chunk.
+    cache : DataCache
+        The cache for the parsed source file, None if the data is not cached.
+    lazy_cache : DataCache
+        The cache for the cleaned data of a lazy wrapper, keyed on the source file and all the cleaning steps.
         
     Methods
     -------
@@ -26,24 +175,53 @@ class DataWrapper():
         Returns the name of the data.
     get_data()
         Returns the data.
-    set_data(data) 
+    set_data(data, **read_kwargs) 
         Sets the data.
+    iter_chunks(chunksize)
+        Returns the data in chunks that went through the same cleaning steps.
+    get_fingerprint()
+        Returns the cache key of the source file and the cleaning steps so far.
     get_headers()
         Returns the headers of the data.
-    set_headers(*args, split_string = ['movie_name'])
+    set_headers(*args, split_string = ['movie_name'], arrow_lists = False)
         Sets the headers of the data.
     order_headers(headers)  
         Orders the headers of the data.
     format_headers(headers)
         Formats the headers of the data.
-    make_date(column_name)
-        Makes a date from the years and from the specific dates in the data.
+    make_date(column_name, target_format='%Y')
+        Makes integer years or datetimes from the years and from the specific dates in the data.
+    strip_credits(column_name)
+        Reduces the credits in a column of name lists to the names.
+    parse_dates(values)
+        Parses a column of dates in bulk with a format inferred from a sample.
+    infer_date_format(strings)
+        Infers the date format of a column from a sample of its values.
     birthday(column_name)
         Makes a birthday from the years and from the specific dates in the data.
     """
 
-    def __init__(self, data_source: Path, name: str = None) -> None:
-        self.data = self.set_data(data_source)
+    def __init__(self, data_source: Path, name: str = None, chunksize: int = None, cache: DataCache = None, lazy: bool = False) -> None:
+        self.data_source = data_source
+        self.chunksize = chunksize
+        self.lazy = lazy
+        # Streamed data is not cached, because only one chunk is in memory at a time
+        # The cleaning steps of lazy data only run on the headers, so only the wrapper that loads the data uses the cache
+        self.cache = cache if not chunksize and not lazy else None
+        self.lazy_cache = cache if not chunksize and lazy else None
+        self.steps = []
+        # When the data is streamed or lazy, only the headers are loaded up front
+        with instrumentation.stage('DataWrapper.read', name) as record:
+            if chunksize or lazy:
+                self.data = self.set_data(data_source, nrows=0)
+            elif self.cache is not None:
+                self.data = self.cache.load(self.get_fingerprint())
+                if self.data is None:
+                    self.data = self.set_data(data_source)
+                    self.cache.store(self.get_fingerprint(), self.data)
+            else:
+                self.data = self.set_data(data_source)
+            record['rows_out'] = len(self.data)
         # The preferred order of the headers
         self.header_order = ['movie_name', 'movie_date', 'movie_rating', 'movie_genre', 'director', 'writer', 'actor', 'award_year']
         self.name = name
@@ -73,7 +251,7 @@ class DataWrapper():
         """
         return self.data
     
-    def set_data(self, data) -> None:
+    def set_data(self, data, **read_kwargs) -> None:
         """
         Function for setting the data.
 
@@ -81,6 +259,8 @@ class DataWrapper():
         ----------
         data : Path
             The path to the data.
+        **read_kwargs
+            Extra arguments for reading the data, e.g. nrows or chunksize.
 
         Returns
         -------
@@ -91,14 +271,84 @@ class DataWrapper():
         
         # Check if is a csv file
         if str(data).endswith('.csv'):
-            return pd.read_csv(data, encoding_errors='ignore')
+            return pd.read_csv(data, encoding_errors='ignore', **read_kwargs)
         elif str(data).endswith('.xlsx'):
-            return pd.read_excel(data)
+            if 'chunksize' in read_kwargs:
+                raise ValueError('Only csv/tsv files can be read in chunks.')
+            return pd.read_excel(data, **read_kwargs)
         elif str(data).endswith('.tsv'):
-            return pd.read_csv(data, sep='\t', header=0)
+            return pd.read_csv(data, sep='\t', header=0, **read_kwargs)
         else:
             raise ValueError('The data must be a csv/xlsx file.')
+
+    def iter_chunks(self, chunksize: int = None):
+        """
+        Function that reads the data in chunks and applies the cleaning steps of this wrapper to every chunk.
+        Only one chunk is in memory at a time.
+        If the data is not streamed and no chunksize is given, the wrapper itself is the only chunk,
+        or for lazy data a wrapper that loaded all the data.
+
+        Parameters
+        ----------
+        chunksize : int, optional
+            The number of rows per chunk. Default is the chunksize of the wrapper.
+
+        Returns
+        -------
+        generator
+            DataWrappers that each hold one cleaned chunk of the data.
+        """
+        chunksize = chunksize or self.chunksize
+        if chunksize is None and not self.lazy:
+            yield self
+            return
+
+        if chunksize is None:
+            # The cleaned data is cached under the source file and all the steps, so the steps only run if one of them changed
+            key = self.lazy_cache.key(self.data_source, self.steps) if self.lazy_cache is not None else None
+            cached_data = self.lazy_cache.load(key) if key is not None else None
+            if cached_data is not None:
+                wrapper = copy.copy(self)
+                wrapper.data = cached_data
+                wrapper.lazy = False
+                wrapper.lazy_cache = None
+                wrapper.steps = list(self.steps)
+                yield wrapper
+                return
+
+            # Load all the lazy data, the parsed source file from the cache if it was read before, and replay the cleaning steps on it
+            wrapper = DataWrapper(self.data_source, self.name, cache=self.lazy_cache)
+            wrapper.header_order = self.header_order
+            for method, args, kwargs in self.steps:
+                getattr(wrapper, method)(*args, **kwargs)
+            if key is not None:
+                self.lazy_cache.store(key, wrapper.data)
+            yield wrapper
+            return
+
+        for chunk in self.set_data(self.data_source, chunksize=chunksize):
+            # Make a wrapper for the chunk and replay the cleaning steps on it
+            chunk_wrapper = copy.copy(self)
+            chunk_wrapper.data = chunk
+            chunk_wrapper.chunksize = None
+            chunk_wrapper.lazy = False
+            chunk_wrapper.cache = None
+            chunk_wrapper.steps = []
+            for method, args, kwargs in self.steps:
+                getattr(chunk_wrapper, method)(*args, **kwargs)
+            yield chunk_wrapper
         
+    def get_fingerprint(self) -> str:
+        """
+        Function for getting the cache key of the data, based on the bytes of the source file and the cleaning steps so far.
+
+        Returns
+        -------
+        str
+            The cache key of the data.
+        """
+        return self.cache.key(self.data_source, self.steps)
+
     def get_headers(self) -> list:
         """
         Function for getting the headers of the data.
@@ -111,13 +361,20 @@ class DataWrapper():
         return self.data.columns.tolist()
 
     
-    def set_headers(self, *args, split_string = ['movie_name']):
+    @instrumented
+    @cleaning_step
+    def set_headers(self, *args, split_string = ['movie_name'], arrow_lists: bool = False):
         """
         Function for setting the headers of the data.
 
         Parameters
         ----------
         *args : list of the headers in the data and their new names
+        split_string : list
+            The headers of the string columns that are not split into lists.
+        arrow_lists : bool
+            Whether to store the lists as Arrow list columns instead of a Python list per row.
+            The Arrow lists are split and exploded in vectorized kernels and take far less memory.
         
         Returns
         -------
@@ -143,7 +400,10 @@ class DataWrapper():
         # If column includes items in a string with a comma, split the string into a list
         for header in self.data.columns:
             if self.data[header].dtype == 'object':
-                if header not in split_string:
+                if header not in split_string and arrow_lists:
+                    # Split on both comma and semi-colon into a single Arrow array
+                    self.data[header] = split_arrow_lists(self.data[header], ',|;')
+                elif header not in split_string:
                     # Split on both comma and semi-colon
                     self.data[header] = self.data[header].str.split(',|;')
                     # Make column a list
@@ -186,32 +446,123 @@ class DataWrapper():
         
         return formatted_headers
 
+    @instrumented
+    @cleaning_step
     def make_date(self, column_name, target_format='%Y'):
         """
         A function that infers the date format in a column and converts it to the target format.
+        The format is inferred once from a sample of the column and the column is converted in bulk,
+        only the values that do not fit the inferred format are parsed one by one.
 
         Parameters
         ----------
         column_name : str
             The name of the column to be converted to a date.
         target_format : str, optional
-            The desired format to convert the column to. Default is '%Y'.
+            '%Y' converts the column to integer years, None converts it to datetimes.
+            Any other format converts it to formatted strings. Default is '%Y'.
 
         Returns
         -------
         None
         """
+        values = self.data[column_name]
+
         # If the values are lists, extract the strings from the lists
-        self.data[column_name] = self.data[column_name].apply(lambda x: x[0] if isinstance(x, list) else x)
-        
-        # # Replace everything that's not a digit, slash, dash, or space
-        # self.data[column_name] = self.data[column_name].replace(r"[^0-9\-/ ]", "", regex=True)
-        
-        # Apply the date parsing and formatting
-        self.data[column_name] = self.data[column_name].apply(lambda x: parser.parse(str(x)).strftime(target_format) if pd.notnull(x) else x)
-        
+        if is_arrow_list(values):
+            values = pd.Series(pd.arrays.ArrowExtensionArray(pc.list_element(pa.array(values), 0)), index=values.index)
+        elif values.dtype == 'object':
+            is_list = values.map(lambda x: isinstance(x, list))
+            if is_list.any():
+                values = values.where(~is_list, values[is_list].str[0])
+
+        dates = self.parse_dates(values)
+
+        if target_format == '%Y':
+            self.data[column_name] = dates.dt.year.astype('Int64') if not self.is_year(dates) else dates
+        elif target_format is None:
+            self.data[column_name] = self.year_to_datetime(dates) if self.is_year(dates) else dates
+        else:
+            self.data[column_name] = (self.year_to_datetime(dates) if self.is_year(dates) else dates).dt.strftime(target_format)
+
         return
-    
+
+    def parse_dates(self, values: pd.Series) -> pd.Series:
+        """
+        A function that parses a column of dates.
+        A column that only contains years is returned as integer years, any other column as datetimes.
+
+        Parameters
+        ----------
+        values : pd.Series
+            The values to be parsed.
+
+        Returns
+        -------
+        pd.Series
+            The parsed dates.
+        """
+        # Fast path for columns that only contain years
+        if pd.api.types.is_numeric_dtype(values):
+            years = values.astype('Float64')
+            if ((years.dropna() % 1 == 0) & years.dropna().between(1, 9999)).all():
+                return years.astype('Int64')
+
+        strings = values.astype('string').str.strip()
+        strings = strings.mask(strings == '')
+        if strings.dropna().str.fullmatch(r'\d{4}(\.0)?').all():
+            return pd.to_numeric(strings.str[:4], errors='coerce').astype('Int64')
+
+        # Infer the format once from a sample and convert all the values in bulk
+        date_format = self.infer_date_format(strings)
+        dates = pd.Series(pd.NaT, index=strings.index, dtype='datetime64[ns]')
+        if date_format is not None:
+            dates = pd.to_datetime(strings, format=date_format, errors='coerce')
+
+        # Parse the values that do not fit the format one by one, but every unique value only once
+        leftover = strings[dates.isna() & strings.notna()]
+        if not leftover.empty:
+            parsed = {value: parse_date(value) for value in leftover.unique()}
+            dates = dates.fillna(leftover.map(parsed).astype('datetime64[ns]'))
+
+        return dates
+
+    def infer_date_format(self, strings: pd.Series, sample_size: int = 1000):
+        """
+        A function that infers the date format of a column from a sample of its values.
+
+        Parameters
+        ----------
+        strings : pd.Series
+            The values of the column as strings.
+        sample_size : int
+            The number of values in the sample.
+
+        Returns
+        -------
+        str
+            The format that parses most values of the sample, or None if no format fits.
+        """
+        sample = strings.dropna()
+        if sample.empty:
+            return None
+        sample = sample.sample(min(sample_size, len(sample)), random_state=0)
+
+        # Count for every format how many values of the sample it parses
+        scores = {date_format: pd.to_datetime(sample, format=date_format, errors='coerce').notna().sum()
+                  for date_format in DATE_FORMATS}
+        best_format = max(scores, key=scores.get)
+
+        return best_format if scores[best_format] > 0 else None
+
+    def is_year(self, dates: pd.Series) -> bool:
+        return not pd.api.types.is_datetime64_any_dtype(dates)
+
+    def year_to_datetime(self, years: pd.Series) -> pd.Series:
+        return pd.to_datetime(years.astype('string'), format='%Y', errors='coerce')
+
+    @instrumented
+    @cleaning_step
     def make_boolean(self, column_name, true_value, false_value):
         """
         A function that converts the values in a column to boolean values.
@@ -230,11 +581,55 @@ class DataWrapper():
         None
         """
         # Convert the data in the column to boolean values
-        
+        # A list never equals a single value, so like the lists of objects the Arrow lists are left as they are
+        if is_arrow_list(self.data[column_name]):
+            return
+
         self.data[column_name] = self.data[column_name].apply(lambda x: True if x == true_value else False if x == false_value else x)
 
         return
     
+    @instrumented
+    @cleaning_step
+    def strip_credits(self, column_name):
+        """
+        A function that reduces the credits in a column of name lists to the names, such that e.g. the Oscar nominee
+        'Music by Jerome Kern; Lyrics by Dorothy Fields and Jimmy McHugh' becomes three persons.
+
+        Parameters
+        ----------
+        column_name : str
+            The name of the column with the lists of names.
+
+        Returns
+        -------
+        None
+        """
+        values = self.data[column_name]
+
+        # Clean all the names of all the lists at once, the index holds the position of the row of every name
+        if is_arrow_list(values):
+            lists = pa.array(values)
+            names = pd.Series(pc.list_flatten(lists).to_numpy(zero_copy_only=False), index=pc.list_parent_indices(lists).to_numpy(),
+                              dtype=object)
+        else:
+            names = values.reset_index(drop=True).explode()
+        names = clean_credits(names)
+
+        if is_arrow_list(values):
+            # The lists are rebuilt from the number of names per row, a row without names gets a missing list
+            counts = np.bincount(names.index.to_numpy(dtype=np.int64), minlength=len(values))
+            offsets = pa.array(np.concatenate([[0], np.cumsum(counts)]), type=pa.int32(), mask=np.concatenate([counts == 0, [False]]))
+            lists = pa.ListArray.from_arrays(offsets, pa.array(names.to_numpy(dtype=object), type=pa.string()))
+            self.data[column_name] = pd.Series(pd.arrays.ArrowExtensionArray(lists), index=values.index)
+        else:
+            lists = names.groupby(level=0).agg(list).reindex(range(len(values)))
+            # Like the lists that set_headers makes, a row without names gets a list with a missing value
+            self.data[column_name] = pd.Series([x if isinstance(x, list) else [np.nan] for x in lists], index=values.index, dtype=object)
+
+        return
+
+    @instrumented
     def drop_nan(self, column_name):
         """
         A function that drops the rows with NaN values in a column.
@@ -254,6 +649,7 @@ class DataWrapper():
         return
    
         
+    @instrumented
     def export_cleaned_data(self, name: str, format: str = 'csv', destination: Path = Path('data\cleaned_data')):
         """
         A function that exports the cleaned data to a csv file.
@@ -289,14 +685,39 @@ class DataWrapper():
 
 
 class DataSet():
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, cache: DataCache = None, schema: DtypeSchema = None) -> None:
         self.name = name
+        self.cache = cache
+        # The compact dtypes of the data, the categoricals share their dictionaries with the other DataSets of the schema
+        self.schema = schema
+        self.schema_version = None
+        # The added data is buffered in fragments and only concatenated once it is needed
+        self.fragments = []
+        self.pending_fragments = []
         self.data = None
         self.headers = None
         self.header_order = ['movie_name', 'movie_date', 'movie_rating', 'movie_genre', 'director', 'writer', 'actor', 'award_year', 'person_name', 'person_dateofbirth']
 
     def __call__(self):
         return self.data
+
+    @property
+    def data(self) -> pd.DataFrame:
+        if self.fragments or self.pending_fragments:
+            self.finalize()
+        elif self.schema is not None and self._data is not None and self.schema_version != self.schema.version:
+            # Another DataSet grew a dictionary, align the categoricals such that joins still use the codes
+            self._data = self.schema.apply(self._data)
+            self.schema_version = self.schema.version
+        return self._data
+
+    @data.setter
+    def data(self, data: pd.DataFrame) -> None:
+        self._data = data
+        self.fragments = []
+        self.pending_fragments = []
+        # The schema is applied to the new data the next time it is read
+        self.schema_version = None
     
     def get_name(self) -> str:
         return self.name
@@ -317,8 +738,28 @@ class DataSet():
     def update_data(self, data: pd.DataFrame) -> None:
         self.data = data
 
-    def add_data(self, data: pd.DataFrame) -> None:
-        self.data = pd.concat([self.data, data], ignore_index=True)
+    def add_data(self, data: pd.DataFrame, exploded: bool = False) -> None:
+        # Buffer the data, it is exploded and concatenated later on
+        if not exploded:
+            self.pending_fragments.append(data)
+        # Data that was already exploded, e.g. by the EdgeExtractor, is only compacted
+        elif self.schema is not None:
+            self.fragments.append(self.schema.apply(data))
+        else:
+            self.fragments.append(data)
+
+    @instrumented
+    def finalize(self) -> None:
+        # Concatenate all the buffered fragments at once, such that the data is only copied once
+        fragments = [fragment for fragment in [self._data] + self.fragments + self.pending_fragments if fragment is not None]
+        self.fragments = []
+        self.pending_fragments = []
+        if self.schema is not None:
+            # The fragments get the same dictionaries first, otherwise the categoricals are concatenated as objects
+            fragments = [self.schema.apply(fragment) for fragment in fragments]
+            self.schema_version = self.schema.version
+        if fragments:
+            self._data = pd.concat(fragments, ignore_index=True)
 
     def order_headers(self, headers: list) -> list:
         """
@@ -341,6 +782,7 @@ class DataSet():
         
         return sorted_names
     
+    @instrumented
     def export_cleaned_data(self, format: str = 'csv', destination: Path = Path('data\cleaned_data')):
         """
         A function that exports the cleaned data to a csv file.
@@ -368,24 +810,52 @@ class DataSet():
         # Order the columns
         self.data = self.data[self.order_headers(self.get_headers())]
 
+        # Skip the export if exactly this data was exported before and the file was not changed since
+        file_path = destination / f'{self.name}.{format}'
+        if self.cache is not None:
+            key = self.cache.key('export', self.name, format, self.cache.hash_frame(self.data))
+            cache_path = self.cache.path(key)
+            if cache_path.is_file() and file_path.is_file() and file_path.stat().st_mtime <= cache_path.stat().st_mtime:
+                return
+
         # Export the data
         if format == 'csv':
-            self.data.to_csv(destination / f'{self.name}.csv', index=False)
+            self.data.to_csv(file_path, index=False)
         elif format == 'xlsx':
-            self.data.to_excel(destination / f'{self.name}.csv', index=False)
+            self.data.to_excel(file_path, index=False)
+
+        # Keep a columnar copy of the exported data in the cache
+        if self.cache is not None:
+            self.cache.store(key, self.data)
         
         return
     
+    @instrumented
     def explode_data(self):
+        # Only the fragments that were added since the last explode have to be exploded
+        if not self.pending_fragments:
+            self.data = self.explode_fragment(self.data)
+            return
+
+        # With a schema, the exploded fragments are compacted right away, such that the buffered strings do not pile up
+        exploded_fragments = (self.explode_fragment(fragment) for fragment in self.pending_fragments)
+        self.fragments.extend(self.schema.apply(fragment) if self.schema is not None else fragment for fragment in exploded_fragments)
+        self.pending_fragments = []
+
+        return
+
+    def explode_fragment(self, data: pd.DataFrame) -> pd.DataFrame:
         # For all the objects in the data, if it is a list, explode the list into multiple rows
-        for header in self.data.columns:
-            if self.data[header].dtype == 'object':
-                # print(f'Exploding {header}')
+        for header in data.columns:
+            if is_arrow_list(data[header]):
+                data = explode_arrow_list(data, header)
+            elif data[header].dtype == 'object' and data[header].map(lambda x: isinstance(x, list)).any():
                 # Explode the list into multiple rows
-                self.data = self.data.explode(header)
+                data = data.explode(header)
 
-        return
+        return data
     
+    @instrumented
     def drop_unknown(self, *columns):
         # Drop the rows with unknown values, nan values, empty strings, empty lists, empty rows if any of the columns are empty
         # Drop the empty values if any of the columns are empty
@@ -393,6 +863,7 @@ class DataSet():
 
         return
     
+    @instrumented
     def drop_winner(self, column_name, inverse = False):
         # Function that drops the row if the value in the column_name is True
         if inverse:
@@ -400,6 +871,7 @@ class DataSet():
         else:
             self.data = self.data[self.data[column_name] == True]
     
+    @instrumented
     def melt_data(self, *columns):
         # Melt the columns into a single column
         # Create a new DataFrame with the 'writer', 'director', and 'actor' columns melted into separate rows
@@ -431,15 +903,19 @@ class DataSet():
 
 
 class DataMatcher():
-    def __init__(self) -> None:
-        pass
+    def __init__(self, cache: DataCache = None) -> None:
+        self.cache = cache
 
-    def aggregate(self, dataframe: pd.DataFrame, *columns, automatic: bool = True, drop_nan_keys: bool = True, dif_timestamps= False):
+    @instrumented
+    def aggregate(self, dataframe: pd.DataFrame, *columns, automatic: bool = True, drop_nan_keys: bool = True, dif_timestamps= False, use_cache: bool = True,
+                  policies: dict = None):
         """
         A function that looks for duplicate rows in a dataframe and aggregates them.
         It is possible to have different columns filled in for the same given header.
-        It will be matched on the columns that are given.
-        If there are conflicts, it will print these conflicts and ask for user input.
+        It will be matched on the columns that are given, the rows whose keys are (almost) the same form a cluster.
+        The other columns of a cluster are merged in one groupby per column: numbers take the maximum, booleans are true
+        when any row is true, lists take the union of their values and any other column takes its first value that is not missing.
+        If there are conflicts and the aggregation is not automatic, it will print these conflicts and ask for user input.
 
         Parameters
         ----------
@@ -450,150 +926,383 @@ class DataMatcher():
         automatic : bool
             Whether to automatically aggregate the rows or not.
         drop_nan_keys : bool
-            Whether to drop the rows with nan values in the columns that are matched on.
+            Whether to keep the rows with nan or nat values in the key out of the matching,
+            they are only merged with the rows with exactly the same key. If not, they are all kept as they are.
         dif_timestamps : bool
             Whether to check if the timestamps are different.
+        use_cache : bool
+            Whether to use the cache of the matcher, if it has one.
+        policies : dict, optional
+            The policy of a column that overrides its default: 'max', 'any', 'union', 'first', any other groupby reduction
+            such as 'min' or 'last', or a callable that gets the values of a cluster and returns the merged value.
 
         Returns
         -------
         pd.DataFrame
             The aggregated dataframe.
         """
+        policies = policies or {}
 
         # If the column consists of strings, strip the strings from the leading spaces
         for column in columns:
             if dataframe[column].dtype == 'object':
                 dataframe[column] = dataframe[column].str.strip()
 
-        # Check if there are duplicate rows
-        if dataframe.duplicated(subset=columns).any():
-            # Get the duplicated rows
-            duplicated_rows = dataframe[dataframe.duplicated(subset=columns)]
-            # Get the unique rows
-            unique_rows = dataframe[~dataframe.duplicated(subset=columns)]
-
-            other_columns = [column for column in dataframe.columns if column not in columns]
-
-            print(f'There are {len(duplicated_rows)} duplicate rows.'
-                f'\nThese rows will be aggregated.')
-            print(f'There are {len(unique_rows)} unique rows.'
-                f'\nThese rows will be kept.')
-
-            # Check if in the duplicated rows there are nan or nat values and filter out those rows
-            if drop_nan_keys:
-                duplicated_rows = duplicated_rows.dropna(subset=columns, how='any')
-
-            print(f'There are {len(duplicated_rows)} duplicate rows without nan or nat values.')
-
-            # Compare the duplicate rows
-            # Create a dictionary to store row combinations based on the column values
-            row_combinations = {}
-            pattern_roman = re.compile(r"\b(I|II|III|IV|V|VI|VII|VIII|IX|X)\b")  # Regex pattern for matching Roman numerals
-            pattern_last = re.compile(r"(\D+)\d+$")  # Regex pattern for matching the non-numeric part of the string at the end
-
-            for row_index, row_values in tqdm(duplicated_rows.iterrows(), total=duplicated_rows.shape[0], desc="Decreasing the row combinations"):
-                key = tuple(row_values[list(columns)].values)
-                fuzzy_match = False
-                for existing_key in row_combinations.keys():
-                    # Calculate the similarity score between the keys using fuzzy matching
-                    similarity_score = fuzz.ratio(key, existing_key)
-                    # If key or existing key are nat or nan, skip
-                    if any([pd.isnull(key_value) for key_value in key]) or any([pd.isnull(existing_key_value) for existing_key_value in existing_key]):
-                        continue
-                    # If key or existing key contain a TimeStamp, only match if 100% similar
-                    elif dif_timestamps and key[0] == existing_key[0] and any([isinstance(key_value, pd.Timestamp) for key_value in key]) and any([isinstance(existing_key_value, pd.Timestamp) for existing_key_value in existing_key]):
-
-                        if similarity_score == 100:
-                            row_combinations[existing_key].append(row_index)
-                            fuzzy_match = True
-                            continue
-                        else:
-                            fuzzy_match = False
-                            print('\nDifferent timestamps: ', key, existing_key)
-                            continue
+        # The automatic aggregation of the same data with the same parameters is loaded from the cache
+        if self.cache is not None and automatic and use_cache:
+            # The default policies are part of the key as well, such that a changed default does not load an old result
+            policy_names = sorted((column, getattr(policy, '__qualname__', policy)) for column, policy in
+                                  ((column, policies.get(column, self.get_policy(dataframe[column]))) for column in dataframe.columns
+                                   if column not in columns))
+            key = self.cache.key('aggregate', self.cache.hash_frame(dataframe), columns, drop_nan_keys, dif_timestamps, policy_names)
+            cached_data = self.cache.load(key)
+            if cached_data is not None:
+                return cached_data
+            aggregated_data = self.aggregate(dataframe, *columns, automatic=automatic, drop_nan_keys=drop_nan_keys, dif_timestamps=dif_timestamps, 
+                                             use_cache=False, policies=policies)
+            self.cache.store(key, aggregated_data)
+            return aggregated_data
+
+        columns = list(columns)
+        rows = dataframe.reset_index(drop=True)
+        clusters = self.cluster_rows(rows, columns, dif_timestamps=dif_timestamps, merge_nan_keys=drop_nan_keys)
+        cluster_count = clusters.max() + 1 if len(clusters) else 0
+
+        print(f'There are {len(rows) - cluster_count} duplicate rows.'
+            f'\nThese rows will be aggregated.')
+        print(f'There are {cluster_count} unique rows.'
+            f'\nThese rows will be kept.')
+
+        aggregated_data = self.merge_clusters(rows, clusters, columns, policies)
+        if not automatic:
+            aggregated_data = self.resolve_conflicts(rows, clusters, aggregated_data, columns)
+
+        return aggregated_data
+
+    def cluster_rows(self, rows: pd.DataFrame, columns: list, dif_timestamps: bool = False, merge_nan_keys: bool = True) -> np.ndarray:
+        """
+        A function that gives every row the number of its cluster, the rows whose keys are (almost) the same share a cluster.
+        Only the keys that occur more than once are matched, the other rows are grouped on exactly the same key.
+        Rows with a nan or nat value in their key are never matched.
 
-                    if similarity_score == 100:
-                        # If the similarity score is 100, consider them the same keys
-                        row_combinations[existing_key].append(row_index)
-                        fuzzy_match = True
-                        continue
-                    elif pattern_roman.search(key[0]) or pattern_roman.search(existing_key[0]):
-                        fuzzy_match = False
-                        continue
-                    elif pattern_last.search(key[0]) or pattern_last.search(existing_key[0]):
-                        fuzzy_match = False
-                        continue
-                    elif similarity_score >= 98:  # Set a threshold for similarity
-                        # If the similarity score is above the threshold, consider them similar keys
-                        row_combinations[existing_key].append(row_index)
-
-                        if similarity_score < 100:
-                            print(f'\nSimilar keys: {key} and {existing_key} with a similarity score of {similarity_score}.')
-
-                        fuzzy_match = True
-                        continue
-                if not fuzzy_match:
-                    row_combinations[key] = [row_index]
-
-            columns = list(columns)
-
-            # Iterate over the row combinations and handle conflicts
-            for key, rows in tqdm(row_combinations.items(), desc="Handeling conflicts between rows", position=0, smoothing=0.4, leave=False):
-                try:
-                    row1 = rows[0]
-                    row2 = rows[1]
-
-                    # Get the values of the other columns
-                    row1_values = dataframe.loc[row1, ~dataframe.columns.isin(columns)].values
-                    row2_values = dataframe.loc[row2, ~dataframe.columns.isin(columns)].values
-
-                    # If the values are not the same, print the values and ask for user input
-                    if not np.array_equal(row1_values, row2_values):
-                        # Ask for user input
-                        if automatic:
-                            for i, col in enumerate(other_columns):
-                                if dataframe.loc[row1, col] is str:
-                                    dataframe.loc[row1, col] = row1_values[i] + row2_values[i]
-                                elif dataframe.loc[row1, col] is list:
-                                    dataframe.loc[row1, col] = row1_values[i] + row2_values[i]
-                                elif dataframe.loc[row1, col] is float:
-                                    dataframe.loc[row1, col] = max(row1_values[i], row2_values[i])
-                                else:
-                                    dataframe.loc[row1, col] = row1_values[i]
-                            dataframe.drop(row2, inplace=False)
-                        else:
-                            tqdm.write(f'\nThere is a conflict for the following information:')
-                            tqdm.write(f'\n{columns}\n{dataframe.loc[row1, columns].values}')
-                            tqdm.write(f'\nWhich row do you want to keep?\n1: {row1_values}\n2: {row2_values}')
-
-                            user_input = input('Which value do you want to keep? (1/2/3(Both)): ')
-                            # If the user input is 1, keep the first row, else keep the second row
-                            if user_input == '1':
-                                dataframe.loc[row2, ~dataframe.columns.isin(columns)] = row1_values
-                                dataframe.drop(row1, inplace=False)
-                            elif user_input == '2':
-                                dataframe.loc[row1, ~dataframe.columns.isin(columns)] = row2_values
-                                dataframe.drop(row2, inplace=False)
-                            elif user_input == '3':
-                                # If the user input is 3, keep both values but in one row
-                                for i, col in enumerate(other_columns):
-                                    if dataframe.loc[row1, col] is str:
-                                        dataframe.loc[row1, col] = row1_values[i] + row2_values[i]
-                                    if dataframe.loc[row1, col] is list:
-                                        dataframe.loc[row1, col] = row1_values[i] + row2_values[i]
-                                    if dataframe.loc[row1, col] is float:
-                                        dataframe.loc[row1, col] = max(row1_values[i], row2_values[i])
-                                    if dataframe.loc[row1, col] is object:
-                                        dataframe.loc[row1, col] = row1_values[i]
-                                dataframe.drop(row2, inplace=False)
-                            tqdm.write(f"New data: {dataframe.loc[row1].values}")
-                except:
-                    continue
+        Parameters
+        ----------
+        rows : pd.DataFrame
+            The rows to be clustered, with a RangeIndex.
+        columns : list
+            The columns that make up the key of a row.
+        dif_timestamps : bool
+            Whether keys with the same name but a different timestamp should be kept apart.
+        merge_nan_keys : bool
+            Whether the rows with a nan or nat value in their key share a cluster with the rows with exactly the same key,
+            or each get a cluster of their own.
 
-            # Concatenate the unique rows and the updated dataframe
-            dataframe = pd.concat([unique_rows, dataframe], ignore_index=True)
+        Returns
+        -------
+        np.ndarray
+            The cluster of every row, numbered in the order in which the clusters first appear.
+        """
+        clusters = np.full(len(rows), -1, dtype=np.int64)
+        has_nan_key = rows[columns].isna().any(axis=1).to_numpy()
+        duplicated = rows.duplicated(subset=columns, keep=False).to_numpy() & ~has_nan_key
+
+        row_combinations = self.match_keys(rows[duplicated], columns, dif_timestamps=dif_timestamps)
+        if row_combinations:
+            groups = list(row_combinations.values())
+            clusters[np.concatenate(groups)] = np.repeat(np.arange(len(groups)), [len(group) for group in groups])
+            # Only the first column of the key is matched on similarity, the years and other columns must be the same,
+            # e.g. the nominations of a category in 1941 and 1942 are not merged
+            if len(columns) > 1:
+                matched = rows[duplicated].assign(cluster=clusters[duplicated])
+                clusters[duplicated] = matched.groupby(['cluster'] + columns[1:], sort=False, observed=True).ngroup().to_numpy()
+
+        # The other rows are grouped on exactly the same key
+        unmatched = (clusters == -1) & (merge_nan_keys | ~has_nan_key)
+        if unmatched.any():
+            clusters[unmatched] = rows[unmatched].groupby(columns, dropna=False, sort=False, observed=True).ngroup().to_numpy() + clusters.max() + 1
+        # The rows with a nan or nat value in their key each get a cluster of their own if they are not merged
+        if (clusters == -1).any():
+            clusters[clusters == -1] = np.arange((clusters == -1).sum()) + clusters.max() + 1
+
+        return pd.factorize(clusters)[0]
+
+    def get_policy(self, values: pd.Series) -> str:
+        # Lists are united, numbers take the maximum, booleans are true when any value is true (e.g. a nomination that was won)
+        # and anything else takes its first value that is not missing
+        if is_arrow_list(values) or (values.dtype == 'object' and values.map(lambda x: isinstance(x, list)).any()):
+            return 'union'
+        if pd.api.types.is_bool_dtype(values) or (values.dtype == 'object' and values.notna().any()
+                                                  and values.dropna().map(lambda x: isinstance(x, (bool, np.bool_))).all()):
+            return 'any'
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            return 'max'
+        return 'first'
+
+    def merge_clusters(self, rows: pd.DataFrame, clusters: np.ndarray, columns: list, policies: dict = None) -> pd.DataFrame:
+        """
+        A function that merges the rows of every cluster into one row, with one groupby per column.
 
-            # Drop the duplicate rows
-            dataframe.drop_duplicates(subset=columns, inplace=True)
-        return dataframe
+        Parameters
+        ----------
+        rows : pd.DataFrame
+            The rows to be merged, with a RangeIndex.
+        clusters : np.ndarray
+            The cluster of every row, numbered in the order in which the clusters first appear.
+        columns : list
+            The columns that make up the key of a row, a cluster keeps the key of its first row.
+        policies : dict, optional
+            The policy of a column that overrides its default.
 
+        Returns
+        -------
+        pd.DataFrame
+            A row per cluster.
+        """
+        policies = policies or {}
+        # The first row of every cluster, in the order of the clusters
+        first_rows = ~pd.Series(clusters).duplicated().to_numpy()
+        merged = rows[first_rows].reset_index(drop=True)
+
+        grouped = rows.groupby(clusters, sort=True)
+        for column in rows.columns:
+            if column in columns:
+                continue
+            policy = policies.get(column, self.get_policy(rows[column]))
+            if callable(policy):
+                merged[column] = grouped[column].agg(policy)
+            elif policy == 'union':
+                merged[column] = self.union_lists(rows[column], clusters)
+            elif policy == 'any':
+                # The missing values are skipped, a cluster is only missing when all its values are
+                values = rows[column].astype('boolean').groupby(clusters, sort=True).max()
+                if rows[column].dtype == bool:
+                    values = values.astype(bool)
+                elif rows[column].dtype == 'object':
+                    values = values.astype(object).where(values.notna(), None)
+                merged[column] = values
+            else:
+                merged[column] = getattr(grouped[column], policy)()
+
+        return merged
+
+    def union_lists(self, values: pd.Series, clusters: np.ndarray) -> pd.Series:
+        """
+        A function that unites the lists of every cluster, in the order in which the values first appear.
+        The values are sorted on their cluster once and cut into the lists at the offsets of the clusters.
+
+        Parameters
+        ----------
+        values : pd.Series
+            The lists, or single values, of the rows.
+        clusters : np.ndarray
+            The cluster of every row.
+
+        Returns
+        -------
+        pd.Series
+            The united list of every cluster, nan if a cluster has no values.
+        """
+        if is_arrow_list(values):
+            # The Arrow lists are flattened instead of exploded, their cells are arrays and not lists
+            lists = pa.array(values)
+            exploded = pd.DataFrame({'cluster': clusters[pc.list_parent_indices(lists).to_numpy()],
+                                     'value': pc.list_flatten(lists).to_pandas()})
+        else:
+            exploded = pd.DataFrame({'cluster': clusters, 'value': values.astype(object).to_numpy()}).explode('value')
+        exploded = exploded[exploded['value'].notna()].drop_duplicates()
+        exploded = exploded.iloc[np.argsort(exploded['cluster'].to_numpy(), kind='stable')]
+
+        cluster_count = clusters.max() + 1 if len(clusters) else 0
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(exploded['cluster'].to_numpy(), minlength=cluster_count))])
+        has_values = offsets[1:] > offsets[:-1]
+
+        if is_arrow_list(values):
+            # A missing offset makes a missing list
+            offsets = pa.array(offsets.astype(np.int32), mask=~np.append(has_values, True))
+            lists = pa.ListArray.from_arrays(offsets, pa.array(exploded['value'], type=values.dtype.pyarrow_dtype.value_type))
+            return pd.Series(pd.arrays.ArrowExtensionArray(lists))
+
+        lists = np.split(exploded['value'].to_numpy(), offsets[1:-1])
+        return pd.Series([list(chunk) if has_value else np.nan for chunk, has_value in zip(lists, has_values)], dtype=object)
+
+    def resolve_conflicts(self, rows: pd.DataFrame, clusters: np.ndarray, merged: pd.DataFrame, columns: list) -> pd.DataFrame:
+        """
+        A function that asks which row to keep for every cluster whose rows have different values.
+
+        Parameters
+        ----------
+        rows : pd.DataFrame
+            The rows, with a RangeIndex.
+        clusters : np.ndarray
+            The cluster of every row.
+        merged : pd.DataFrame
+            The merged row of every cluster.
+        columns : list
+            The columns that make up the key of a row.
+
+        Returns
+        -------
+        pd.DataFrame
+            The merged rows, with the rows the user chose to keep instead.
+        """
+        other_columns = [column for column in rows.columns if column not in columns]
+        cluster_rows = pd.Series(np.arange(len(rows))).groupby(clusters).indices
+
+        for cluster, positions in tqdm(cluster_rows.items(), desc="Handeling conflicts between rows", position=0, smoothing=0.4, leave=False):
+            values = rows.iloc[positions][other_columns]
+            if len(positions) < 2 or len(values.astype(str).drop_duplicates()) < 2:
+                continue
+
+            tqdm.write(f'\nThere is a conflict for the following information:')
+            tqdm.write(f'\n{columns}\n{merged.loc[cluster, columns].values}')
+            tqdm.write(f'\nWhich row do you want to keep?')
+            for number, row_values in enumerate(values.itertuples(index=False, name=None), start=1):
+                tqdm.write(f'{number}: {list(row_values)}')
+            tqdm.write(f'm: {merged.loc[cluster, other_columns].tolist()}')
+
+            user_input = input(f'Which value do you want to keep? (1-{len(positions)}/m(Merged)): ')
+            # If the user input is the number of a row, keep that row, else keep the merged row
+            if user_input.isdigit() and 1 <= int(user_input) <= len(positions):
+                for column, value in zip(other_columns, values.iloc[int(user_input) - 1]):
+                    merged.at[cluster, column] = value
+            tqdm.write(f"New data: {merged.loc[cluster].values}")
+
+        return merged
+
+
+    def block_keys(self, key_strings: pd.Series, block_length: int = 6) -> list:
+        """
+        A function that puts the keys in blocks, such that only the keys that share a block have to be compared.
+        Keys with a similarity score of 98 or higher differ in only one or two characters,
+        so their names share either the start or the end of their normalized string.
+
+        Parameters
+        ----------
+        key_strings : pd.Series
+            The first value of every key, e.g. the name, as a string.
+        block_length : int
+            The number of characters of the normalized prefix and suffix that make up a block.
+
+        Returns
+        -------
+        list
+            The positions of the keys in every block with more than one key.
+        """
+        # Normalize the keys by only keeping the lowercase letters and digits
+        normalized = key_strings.str.lower().str.replace(r'[^0-9a-z]', '', regex=True)
+
+        blocks = []
+        for block_key in [normalized.str[:block_length], normalized.str[-block_length:]]:
+            # Get the positions of the keys per block and keep the blocks that contain a candidate pair
+            positions = pd.Series(np.arange(len(block_key))).groupby(block_key.values).indices
+            blocks.extend(block for block in positions.values() if len(block) > 1)
+
+        return blocks
+
+    def match_keys(self, rows: pd.DataFrame, columns: list, dif_timestamps: bool = False, threshold: int = 98) -> dict:
+        """
+        A function that groups the rows whose keys are (almost) the same.
+        Only the keys that share a block are scored, all the scores of a block are computed in one go.
+
+        Parameters
+        ----------
+        rows : pd.DataFrame
+            The rows to be grouped.
+        columns : list
+            The columns that make up the key of a row.
+        dif_timestamps : bool
+            Whether keys with the same name but a different timestamp should be kept apart.
+        threshold : int
+            The minimal similarity score for two keys to be considered the same.
+
+        Returns
+        -------
+        dict
+            The first key of every group and the indices of the rows in that group.
+        """
+        pattern_roman = re.compile(r"\b(?:I|II|III|IV|V|VI|VII|VIII|IX|X)\b")  # Regex pattern for matching Roman numerals
+        pattern_last = re.compile(r"(?:\D+)\d+$")  # Regex pattern for matching the non-numeric part of the string at the end
+
+        # Group the rows with exactly the same key, keys with nan or nat values are never matched
+        keys = []
+        key_rows = []
+        key_positions = {}
+        for row_index, key in zip(rows.index, rows[columns].itertuples(index=False, name=None)):
+            if any(pd.isnull(key_value) for key_value in key):
+                keys.append(key)
+                key_rows.append([row_index])
+            elif key in key_positions:
+                key_rows[key_positions[key]].append(row_index)
+            else:
+                key_positions[key] = len(keys)
+                keys.append(key)
+                key_rows.append([row_index])
+
+        # Compute the properties of every key once instead of for every pair
+        key_strings = pd.Series([str(key) for key in keys], dtype='object')
+        first_values = pd.Series([str(key[0]) for key in keys], dtype='object')
+        has_null = np.array([any(pd.isnull(key_value) for key_value in key) for key in keys], dtype=bool)
+        has_timestamp = np.array([any(isinstance(key_value, pd.Timestamp) for key_value in key) for key in keys], dtype=bool)
+        # Keys with a Roman numeral or a number at the end (e.g. sequels) are only matched when they are the same
+        exact_only = (first_values.str.contains(pattern_roman) | first_values.str.contains(pattern_last)).to_numpy()
+        # Take the keys of a block from an array, indexing the Series per block costs more than scoring the block
+        key_array = key_strings.to_numpy()
+
+        # Keep track of the groups of keys with a union-find structure
+        parent = list(range(len(keys)))
+
+        def find(position):
+            while parent[position] != position:
+                parent[position] = parent[parent[position]]
+                position = parent[position]
+            return position
+
+        def union(position1, position2):
+            root1, root2 = find(position1), find(position2)
+            # The key that was seen first stays the key of the group
+            if root1 != root2:
+                parent[max(root1, root2)] = min(root1, root2)
+
+        compared = set()
+        # The keys are blocked on their first value, the name, the repr of a tuple with a timestamp always ends in the same digits
+        for block in tqdm(self.block_keys(first_values), desc="Decreasing the row combinations"):
+            block = block[~has_null[block]]
+            if len(block) < 2:
+                continue
+
+            # Score all the keys in the block against each other, the scores are rounded like fuzzywuzzy does
+            block_strings = key_array[block].tolist()
+            scores = np.rint(process.cdist(block_strings, block_strings,
+                                           scorer=fuzz.ratio, score_cutoff=threshold - 0.5, workers=-1))
+
+            for i, j in zip(*np.nonzero(np.triu(scores, k=1))):
+                position1, position2 = block[i], block[j]
+                if (position1, position2) in compared:
+                    continue
+                compared.add((position1, position2))
+                similarity_score = scores[i, j]
+                key, existing_key = keys[position2], keys[position1]
+
+                # If both keys contain a TimeStamp, only match if 100% similar
+                if dif_timestamps and key[0] == existing_key[0] and has_timestamp[position1] and has_timestamp[position2]:
+                    if similarity_score == 100:
+                        union(position1, position2)
+                    else:
+                        print('\nDifferent timestamps: ', key, existing_key)
+                elif similarity_score == 100:
+                    # If the similarity score is 100, consider them the same keys
+                    union(position1, position2)
+                elif exact_only[position1] or exact_only[position2]:
+                    continue
+                else:
+                    # If the similarity score is above the threshold, consider them similar keys
+                    union(position1, position2)
+
+        # Create a dictionary to store row combinations based on the column values
+        row_combinations = {}
+        for position, key in enumerate(keys):
+            if has_null[position]:
+                continue
+            row_combinations.setdefault(keys[find(position)], []).extend(key_rows[position])
+
+        return row_combinations
@@ -1,91 +1,124 @@
+import sys
 from pathlib import Path
+import pandas as pd
 from data_wrapper import DataWrapper, DataSet, DataMatcher
-
-# Making DataWrappers for all the datasets
+from data_cache import DataCache
+from instrumentation import instrumentation
+from dtype_schema import DtypeSchema, schema
+from edge_extractor import EdgeExtractor
+from parallel_cleaning import ParallelCleaner
+from decouple import config
+
+# The sources with their paths, headers and the arguments of their DataWrappers
 # Design choice: Drop all columns that are not used by prefixing a '_' to the column name
-IMDB_top_250 = DataWrapper(Path('data\IMDB Top 250 Movies.csv'), 'IMDB Top 250 Movies')
-IMDB_top_250.set_headers('_', 'movie_name', 'movie_date', 'movie_rating', 'movie_genre', 'movie_censor', 'movie_runtime', 
-                         'movie_overview', 'movie_budget', 'movie_box_office', 'actors', 'directors', 'writers')
-IMDB_all_genres = DataWrapper(Path('data\IMDb_All_Genres_etf_clean1.csv'), 'IMDb All Genres')
-IMDB_all_genres.set_headers('movie_name', 'movie_date', 'director', 'actors', 'movie_rating', 'movie_runtime', 
-                            'movie_censor', 'movie_gross', 'movie_genre', 'movie_side_genre')
-movies = DataWrapper(Path('data\movies.csv'), 'movies')
-movies.set_headers('movie_name', 'movie_censor', 'movie_genre', 'movie_date', 'movie_date', '_movie_rating', 
-                   '_movie_rating_count', 'director', 'writer', 'actor', 'movie_country', 'movie_budget', 'movie_gross', 
-                   'movie_company', 'movie_runtime')
-mymovies = DataWrapper(Path('data\mymoviedb.csv'), 'mymoviedb')
-mymovies.set_headers('movie_date', 'movie_name', '_movie_overview', 'movie_popularity', '_movie_rating_count', '_movie_rating', 
-                     'movie_language', 'movie_genre', 'movie_poster')
-oscar_demographics = DataWrapper(Path('data\Oscars-demographics-DFE.csv'), 'Oscars demographics')
-oscar_demographics.set_headers('movie_id', 'award_winner', '_', 'movie_rating', 'movie_rating_time', 'person_birthplace', 
-                               '_confidence_birthplace', 'person_dateofbirth', '_confidence_dateofbirth', 'person_race', 
-                               '_confidence_race', 'person_religion', '_confidence_religion', 'person_sexualorientation', 
-                               '_confidence_sexualorientation', 'award_year', '_confidence_award_year', 'award_category', 
-                               'person_bio', '_birthplace_gold', '_dateofbirth_gold', 'movie_name', 'person_name', '_r', '_re', 
-                               '_s', '_y' )
-oscar_award = DataWrapper(Path('data\\the_oscar_award.csv'), 'Oscar award')
-oscar_award.set_headers('movie_date', 'award_year', '_award_ceremony_number', 'award_category', 'person_name', 'movie_name', 
-                        'award_winner')
-character_meta = DataWrapper(Path('data\character.metadata.tsv'), 'Character metadata')
-character_meta.set_headers('_', '_', 'movie_date', 'character_name', 'person_dateofbirth', 'person_gender', '_person_height', '_person_ethnicity', 'person_name', 'person_age_movie', '_', '_', "_")
-movie_meta = DataWrapper(Path('data\movie.metadata.tsv'), 'Movie metadata')
-movie_meta.set_headers('_', '_', 'movie_name', 'movie_date', 'movie_revenue', 'movie_runtime', 'movie_language', 'movie_country', 'movie_genre')
-
-
-# Making a list of all the datasets
-# Design choice: Dropped the character metadata and movie metadata datasets, because they are big 
-# and increasing the runtime of the program by hours.
-datasets = [IMDB_top_250, IMDB_all_genres, movies, mymovies, oscar_demographics, oscar_award]
-
-# Making the cleaned datasets by using a DataSet object
-cleaned_movies  = DataSet('Movie')
-cleaned_movies.set_headers('movie_name', 'movie_date', 'movie_censor', 'movie_genre', 'movie_rating')
-cleaned_persons = DataSet('Person')
-cleaned_persons.set_headers('person_name', 'person_dateofbirth', 'actor', 'director', 'writer')
-cleaned_awards  = DataSet('Award')
-cleaned_awards.set_headers('award_category', 'award_year')
-cleaned_genres  = DataSet('Genre')
-cleaned_genres.set_headers('movie_genre')
-
-cleaned_acted_in = DataSet('Acted in')
-cleaned_acted_in.set_headers('movie_name', 'movie_date', 'actor')
-cleaned_directed = DataSet('Directed')
-cleaned_directed.set_headers('movie_name', 'movie_date', 'director')
-cleaned_wrote = DataSet('Wrote')
-cleaned_wrote.set_headers('movie_name', 'movie_date', 'writer')
-
-cleaned_nominated_for = DataSet('Nominated for (Movie)')
-cleaned_nominated_for.set_headers('movie_name', 'movie_date', 'award_category', 'award_year', 'award_winner')
-cleaned_won = DataSet('Won (Movie)')
-cleaned_won.set_headers('movie_name', 'movie_date', 'award_category', 'award_year', 'award_winner')
-cleaned_nominated_for_person = DataSet('Nominated for (Person)')
-cleaned_nominated_for_person.set_headers('person_name', "award_category", 'award_year', 'award_winner')
-cleaned_won_person = DataSet('Won (Person)')
-cleaned_won_person.set_headers('person_name', "award_category", 'award_year', 'award_winner') 
-
-cleaned_has_genre = DataSet('Has genre')
-cleaned_has_genre.set_headers('movie_name', 'movie_date', 'movie_genre',)
-
-# For each dataset, add data to the cleaned datasets, but only for the columns that are in the cleaned datasets
-for data in datasets:
+# Design choice: The datasets are lazy, only their headers are read here and they are loaded and cleaned in parallel
+# Design choice: The character metadata and movie metadata datasets are big, so they are streamed in chunks
+# of 100000 rows instead of being loaded at once.
+SOURCES = {
+    'IMDB Top 250 Movies': (Path('data/IMDB Top 250 Movies.csv'), {'lazy': True},
+                            ['_', 'movie_name', 'movie_date', 'movie_rating', 'movie_genre', 'movie_censor', 'movie_runtime',
+                             'movie_overview', 'movie_budget', 'movie_box_office', 'actors', 'directors', 'writers']),
+    'IMDb All Genres': (Path('data/IMDb_All_Genres_etf_clean1.csv'), {'lazy': True},
+                        ['movie_name', 'movie_date', 'director', 'actors', 'movie_rating', 'movie_runtime',
+                         'movie_censor', 'movie_gross', 'movie_genre', 'movie_side_genre']),
+    'movies': (Path('data/movies.csv'), {'lazy': True},
+               ['movie_name', 'movie_censor', 'movie_genre', 'movie_date', 'movie_date', '_movie_rating',
+                '_movie_rating_count', 'director', 'writer', 'actor', 'movie_country', 'movie_budget', 'movie_gross',
+                'movie_company', 'movie_runtime']),
+    'mymoviedb': (Path('data/mymoviedb.csv'), {'lazy': True},
+                  ['movie_date', 'movie_name', '_movie_overview', 'movie_popularity', '_movie_rating_count', '_movie_rating',
+                   'movie_language', 'movie_genre', 'movie_poster']),
+    'Oscars demographics': (Path('data/Oscars-demographics-DFE.csv'), {'lazy': True},
+                            ['movie_id', 'award_winner', '_', 'movie_rating', 'movie_rating_time', 'person_birthplace',
+                             '_confidence_birthplace', 'person_dateofbirth', '_confidence_dateofbirth', 'person_race',
+                             '_confidence_race', 'person_religion', '_confidence_religion', 'person_sexualorientation',
+                             '_confidence_sexualorientation', 'award_year', '_confidence_award_year', 'award_category',
+                             'person_bio', '_birthplace_gold', '_dateofbirth_gold', 'movie_name', 'person_name', '_r', '_re',
+                             '_s', '_y']),
+    'Oscar award': (Path('data/the_oscar_award.csv'), {'lazy': True},
+                    ['movie_date', 'award_year', '_award_ceremony_number', 'award_category', 'person_name', 'movie_name',
+                     'award_winner']),
+    'Character metadata': (Path('data/character.metadata.tsv'), {'chunksize': 100000},
+                           ['_', '_', 'movie_date', 'character_name', 'person_dateofbirth', 'person_gender', '_person_height',
+                            '_person_ethnicity', 'person_name', 'person_age_movie', '_', '_', '_']),
+    'Movie metadata': (Path('data/movie.metadata.tsv'), {'chunksize': 100000},
+                       ['_', '_', 'movie_name', 'movie_date', 'movie_revenue', 'movie_runtime', 'movie_language',
+                        'movie_country', 'movie_genre']),
+}
+
+# The cleaned datasets with their headers and the columns on which their rows are matched
+DATASETS = {
+    'Movie': (['movie_name', 'movie_date', 'movie_censor', 'movie_genre', 'movie_rating'], ['movie_name', 'movie_date']),
+    'Person': (['person_name', 'person_dateofbirth'], ['person_name']),
+    'Award': (['award_category', 'award_year'], ['award_category', 'award_year']),
+    'Genre': (['movie_genre'], ['movie_genre']),
+    'Acted in': (['movie_name', 'movie_date', 'actor'], ['movie_name', 'movie_date', 'actor']),
+    'Directed': (['movie_name', 'movie_date', 'director'], ['movie_name', 'movie_date', 'director']),
+    'Wrote': (['movie_name', 'movie_date', 'writer'], ['movie_name', 'movie_date', 'writer']),
+    'Nominated for (Movie)': (['movie_name', 'movie_date', 'award_category', 'award_year', 'award_winner'],
+                              ['movie_name', 'movie_date', 'award_category', 'award_year']),
+    'Won (Movie)': (['movie_name', 'movie_date', 'award_category', 'award_year', 'award_winner'],
+                    ['movie_name', 'movie_date', 'award_category', 'award_year']),
+    'Nominated for (Person)': (['person_name', 'award_category', 'award_year', 'award_winner'],
+                               ['person_name', 'award_category', 'award_year']),
+    'Won (Person)': (['person_name', 'award_category', 'award_year', 'award_winner'],
+                     ['person_name', 'award_category', 'award_year']),
+    'Has genre': (['movie_name', 'movie_date', 'movie_genre'], ['movie_name', 'movie_date', 'movie_genre']),
+}
+
+# The node datasets are taken from the columns of the sources, the other datasets are extracted by the EdgeExtractor
+# Design choice: Every edge table only explodes its own columns, so e.g. the actors of a movie are never multiplied with its genres
+NODE_DATASETS = ['Movie', 'Award', 'Genre']
+EDGE_DATASETS = {'Acted in': ['Acted in'], 'Directed': ['Directed'], 'Wrote': ['Wrote'], 'Has genre': ['Has genre'],
+                 'Nominated for (Movie)': ['Nominated for (Movie)', 'Won (Movie)'],
+                 'Nominated for (Person)': ['Nominated for (Person)', 'Won (Person)']}
+
+# The wins are the nominations that were won
+WINS = ['Won (Movie)', 'Won (Person)']
+
+# The cleaned data of every source is kept per cleaned dataset in this folder, such that the stages of the pipeline
+# only clean the sources that changed and only match the datasets that changed
+STAGE_DIRECTORY = Path('data/.stages')
+
+
+def make_wrapper(name: str, cache: DataCache) -> DataWrapper:
+    path, kwargs, headers = SOURCES[name]
+    wrapper = DataWrapper(path, name, cache=cache, **kwargs)
+    wrapper.set_headers(*headers)
+
+    # The date and boolean steps are added to every dataset, such that the workers replay them on the data
     # Making date columns datetime
     for col in ['person_dateofbirth', 'movie_date', 'movie_rating_time', 'award_year']:
-        if col in data.get_headers():
+        if col in wrapper.get_headers():
             # For the given columns, make it datetime
-            data.make_date(col)
+            wrapper.make_date(col)
+    # The Oscar nominees are credits, e.g. 'Music by Jerome Kern; Lyrics by Dorothy Fields and Jimmy McHugh'
+    if 'person_name' in wrapper.get_headers():
+        wrapper.strip_credits('person_name')
     for col in ['award_winner']:
-        if col in data.get_headers():
+        if col in wrapper.get_headers():
             # For the given columns, make it boolean
-            data.make_boolean(col, 'True', 'False')
-            data.make_boolean(col, '1', '0')
-            data.make_boolean(col, 'TRUE', 'FALSE')
-            data.make_boolean(col, 'golden', 'finalized')
+            wrapper.make_boolean(col, 'True', 'False')
+            wrapper.make_boolean(col, '1', '0')
+            wrapper.make_boolean(col, 'TRUE', 'FALSE')
+            wrapper.make_boolean(col, 'golden', 'finalized')
+    return wrapper
 
-    # For each dataset, add data to the cleaned datasets, but only for the columns that are in the cleaned datasets
-    for cleaned_data in [cleaned_movies, cleaned_persons, cleaned_awards, cleaned_genres, \
-                         cleaned_acted_in, cleaned_directed, cleaned_wrote, \
-                         cleaned_nominated_for, cleaned_won, cleaned_nominated_for_person, \
-                         cleaned_won_person, cleaned_has_genre]:
+
+def make_datasets(names: list, cache: DataCache, schema: DtypeSchema) -> dict:
+    # Design choice: The DataSets share one dtype schema, such that the names, genres and categories are stored once
+    # as categoricals with the same dictionary in every DataSet, and the years and ratings as small nullable numbers
+    datasets = {}
+    for name in names:
+        datasets[name] = DataSet(name, cache, schema)
+        datasets[name].set_headers(*DATASETS[name][0])
+    return datasets
+
+
+def add_chunk(data: DataWrapper, datasets: dict, extractor: EdgeExtractor) -> None:
+    # For each dataset, add data to the node datasets, but only for the columns that are in the node datasets
+    for name in NODE_DATASETS:
+        cleaned_data = datasets[name]
 
         # Get the columns that are in both datasets
         common_cols = list(set(data.get_headers()).intersection(cleaned_data.get_headers()))
@@ -96,54 +129,106 @@ for data in datasets:
         # Add the data to the cleaned dataset
         cleaned_data.add_data(df)
 
-        # For the data with multiple values in one cell, explode the data (e.g. multiple actors for one movie)
+        # For the data with multiple values in one cell, explode the data (e.g. multiple genres for one movie)
         cleaned_data.explode_data()
 
-# melt the columns of person, actor, writer and director in just one column
-cleaned_persons.melt_data('person_dateofbirth', 'person_name')
-
-# Use the DataMatcher to match the data from the different datasets
-# The data is matched on the specified columns in the dataset and the cleaned datasets are updated accordingly
-# The DataMatcher also drops the unknown values from the cleaned datasets for the specified columns
-# The DataMatcher also exports the cleaned datasets to csv files such that they can be used in the next step of the knowledge graph.
-datamatcher = DataMatcher()
-# cleaned_movies.update_data(datamatcher.aggregate(cleaned_movies.get_data(), "movie_name", "movie_date", dif_timestamps=True))
-# cleaned_movies.drop_unknown('movie_name', "movie_date")
-# cleaned_movies.export_cleaned_data()
-# cleaned_persons.update_data(datamatcher.aggregate(cleaned_persons.get_data(), "person_name"))
-# cleaned_persons.drop_unknown('person_name')
-# cleaned_persons.export_cleaned_data()
-# cleaned_awards.update_data(datamatcher.aggregate(cleaned_awards.get_data(), "award_category", "award_year"))
-# cleaned_awards.drop_unknown('award_category', "award_year")
-# cleaned_awards.export_cleaned_data()
-# cleaned_genres.update_data(datamatcher.aggregate(cleaned_genres.get_data(), "movie_genre"))
-# cleaned_genres.drop_unknown('movie_genre')
-# cleaned_genres.export_cleaned_data()
-
-# cleaned_acted_in.update_data(datamatcher.aggregate(cleaned_acted_in.get_data(), "movie_name", "movie_date", "actor"))
-# cleaned_acted_in.drop_unknown('movie_name', "movie_date", "actor")
-# cleaned_acted_in.export_cleaned_data() 
-# cleaned_directed.update_data(datamatcher.aggregate(cleaned_directed.get_data(), "movie_name", "movie_date", "director"))
-# cleaned_directed.drop_unknown('movie_name', "movie_date", "director")
-# cleaned_directed.export_cleaned_data()
-# cleaned_wrote.update_data(datamatcher.aggregate(cleaned_wrote.get_data(), "movie_name", "movie_date", "writer"))
-# cleaned_wrote.drop_unknown('movie_name', "movie_date", "writer")
-# cleaned_wrote.export_cleaned_data()
-
-cleaned_nominated_for.update_data(datamatcher.aggregate(cleaned_nominated_for.get_data(), "movie_name", "movie_date", "award_category", "award_year"))
-cleaned_nominated_for.drop_unknown('movie_name', "movie_date", "award_category", "award_year")
-cleaned_nominated_for.export_cleaned_data()
-cleaned_won.update_data(datamatcher.aggregate(cleaned_won.get_data(), "movie_name", "movie_date", "award_category", "award_year"))
-cleaned_won.drop_unknown('movie_name', "movie_date", "award_category", "award_year")
-cleaned_won.drop_winner('award_winner')
-cleaned_won.export_cleaned_data()
-cleaned_nominated_for_person.update_data(datamatcher.aggregate(cleaned_nominated_for_person.get_data(), "person_name", "award_category", "award_year"))
-cleaned_nominated_for_person.drop_unknown("person_name", "award_category", "award_year")
-cleaned_nominated_for_person.export_cleaned_data()
-cleaned_won_person.update_data(datamatcher.aggregate(cleaned_won_person.get_data(), "person_name", "award_category", "award_year"))
-cleaned_won_person.drop_unknown("person_name", "award_category", "award_year")
-cleaned_won_person.drop_winner('award_winner')
-cleaned_won_person.export_cleaned_data()
-# cleaned_has_genre.update_data(datamatcher.aggregate(cleaned_has_genre.get_data(), "movie_name", "movie_date", "movie_genre"))
-# cleaned_has_genre.drop_unknown('movie_name', "movie_date", "movie_genre")
-# cleaned_has_genre.export_cleaned_data()
+    # The lists are only looked up once per chunk for the edge tables and the persons
+    list_columns = extractor.get_list_columns(data.get_data())
+
+    # Add the exploded edge tables to the edge datasets
+    for name, edges in extractor.extract(data, list_columns).items():
+        for dataset_name in EDGE_DATASETS[name]:
+            datasets[dataset_name].add_data(edges, exploded=True)
+
+    # Stack the person, actor, writer and director names into just one column
+    persons = extractor.extract_persons(data, list_columns)
+    if persons is not None:
+        datasets['Person'].add_data(persons, exploded=True)
+
+
+def match_dataset(dataset: DataSet, datamatcher: DataMatcher) -> None:
+    # The data is matched on the specified columns in the dataset and the cleaned dataset is updated accordingly
+    # The unknown values of the specified columns are dropped and the cleaned dataset is exported to a csv file,
+    # such that it can be used in the next step of the knowledge graph
+    # Design choice: The movies are also matched when only their dates differ, the sources disagree on the release dates
+    columns = DATASETS[dataset.get_name()][1]
+    dataset.update_data(datamatcher.aggregate(dataset.get_data(), *columns, dif_timestamps=dataset.get_name() == 'Movie'))
+    dataset.drop_unknown(*columns)
+    if dataset.get_name() in WINS:
+        dataset.drop_winner('award_winner')
+    dataset.export_cleaned_data(destination=Path('data/cleaned_data'))
+
+
+def stage_path(source: str, dataset: str) -> Path:
+    return STAGE_DIRECTORY / source / f'{dataset}.pkl'
+
+
+def clean_source(source: str, cache: DataCache) -> None:
+    # Clean one source and keep its part of every cleaned dataset for the match stages
+    # Design choice: The parts are pickled, because the boolean columns with missing values are mixed objects for parquet
+    datasets = make_datasets(list(DATASETS), cache, schema)
+    extractor = EdgeExtractor()
+    for data in make_wrapper(source, cache).iter_chunks():
+        add_chunk(data, datasets, extractor)
+
+    stage_path(source, '').parent.mkdir(parents=True, exist_ok=True)
+    for name, dataset in datasets.items():
+        data = dataset.get_data()
+        # A source without any of the columns still writes an empty part, such that the stage has all of its outputs
+        data = pd.DataFrame(columns=DATASETS[name][0]) if data is None else data
+        data.to_pickle(stage_path(source, name))
+
+
+def match(name: str, cache: DataCache) -> None:
+    # Match the parts of one cleaned dataset from all the sources, in the order of the sources
+    dataset = make_datasets([name], cache, schema)[name]
+    for source in SOURCES:
+        data = pd.read_pickle(stage_path(source, name))
+        if len(data):
+            dataset.add_data(data, exploded=True)
+    match_dataset(dataset, DataMatcher(cache))
+
+
+def clean_all(cache: DataCache) -> None:
+    # Making DataWrappers for all the datasets and the cleaned datasets by using a DataSet object
+    wrappers = [make_wrapper(name, cache) for name in SOURCES]
+    datasets = make_datasets(list(DATASETS), cache, schema)
+
+    # The datasets are loaded and cleaned in a pool of CLEANING_WORKERS processes (all cores by default, 1 cleans them here)
+    # Design choice: The workers hand the cleaned data back as Arrow IPC files instead of pickling the DataFrames
+    cleaner = ParallelCleaner(config('CLEANING_WORKERS', default=0, cast=int))
+
+    # For each dataset, add data to the cleaned datasets, but only for the columns that are in the cleaned datasets
+    # The streamed datasets are cleaned and added chunk by chunk, the other datasets are a single chunk
+    extractor = EdgeExtractor()
+    for data in cleaner.iter_chunks(wrappers):
+        add_chunk(data, datasets, extractor)
+
+    # Use the DataMatcher to match the data from the different datasets
+    datamatcher = DataMatcher(cache)
+    for dataset in datasets.values():
+        match_dataset(dataset, datamatcher)
+
+
+# The workers that clean the datasets import this script again when they are spawned, so it only runs as the main script
+# Without arguments, all the sources are cleaned and matched at once. The stages of src/cleaner/clean.py run
+# `data_wrapper_test.py clean <source>` for every source and `data_wrapper_test.py match <dataset>` for every cleaned dataset.
+if __name__ == '__main__':
+    # The cleaned data is cached, such that unchanged sources are not cleaned again
+    cache = DataCache(Path('data/.cache'))
+
+    mode, name = sys.argv[1:3] if len(sys.argv) > 2 else (None, None)
+    if mode == 'clean':
+        clean_source(name, cache)
+        report = Path('data/reports/clean') / name
+    elif mode == 'match':
+        match(name, cache)
+        report = Path('data/reports/match') / name
+    else:
+        clean_all(cache)
+        report = Path('data/reports/cleaning')
+
+    # Write the wall time, the rows in and out and the peak memory of every cleaning stage per source
+    # as a JSON run report and as Prometheus metrics
+    instrumentation.write_report(report.with_name(f'{report.name}_report.json'))
+    instrumentation.write_prometheus(report.with_name(f'{report.name}.prom'))
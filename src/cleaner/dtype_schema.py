@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+# The domain of every categorical column, the columns of a domain share one dictionary of categories
+# such that e.g. the actors of 'Acted in' and the names of 'Person' have exactly the same dtype
+CATEGORY_DOMAINS = {
+    'movie_name': 'movie_name',
+    'movie_genre': 'genre',
+    'movie_censor': 'censor',
+    'award_category': 'award_category',
+    'person_name': 'person_name',
+    'actor': 'person_name',
+    'director': 'person_name',
+    'writer': 'person_name',
+}
+
+# The smallest nullable types that hold the values of the numeric columns
+NUMERIC_DTYPES = {
+    'movie_date': 'Int16',
+    'award_year': 'Int16',
+    'person_dateofbirth': 'Int16',
+    'movie_rating': 'Float32',
+}
+
+
+def compact_numbers(values: pd.Series, dtype: str) -> pd.Series:
+    """
+    Function that casts a numeric column to a smaller nullable type, if the values fit in it.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The values to be cast.
+    dtype : str
+        The nullable type, e.g. Int16 or Float32.
+
+    Returns
+    -------
+    pd.Series
+        The cast values, or the values as they are if they are not numeric or do not fit in the type.
+    """
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values) or values.dtype == dtype:
+        return values
+
+    # pandas wraps the integers around instead of raising, so the range is checked first
+    if pd.api.types.is_integer_dtype(pd.api.types.pandas_dtype(dtype)):
+        limits = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+        if values.notna().any() and (values.min() < limits.min or values.max() > limits.max):
+            return values
+
+    try:
+        return values.astype(dtype)
+    except (TypeError, ValueError):
+        # e.g. years with a fraction
+        return values
+
+
+class DtypeSchema():
+    """
+    A class used to apply a compact dtype schema to the cleaned data.
+    The strings of a domain become categoricals that share one growing dictionary,
+    the years and ratings become small nullable numbers.
+
+    Attributes
+    ----------
+    domains : dict
+        The domain of every categorical column.
+    numeric_dtypes : dict
+        The nullable type of every numeric column.
+    categories : dict
+        The dictionary of every domain, sorted such that sorting a categorical column sorts its strings.
+    version : int
+        The number of times a dictionary grew, such that frames with an older dictionary can be aligned.
+
+    Methods
+    -------
+    apply(data)
+        Returns the data with the schema applied.
+    extend(domain, values)
+        Adds the new values to the dictionary of a domain.
+    """
+
+    def __init__(self, domains: dict = CATEGORY_DOMAINS, numeric_dtypes: dict = NUMERIC_DTYPES) -> None:
+        self.domains = domains
+        self.numeric_dtypes = numeric_dtypes
+        self.categories = {}
+        self.version = 0
+
+    def apply(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Function that applies the schema to the data.
+        Columns that hold lists, or anything else than strings or numbers, are left as they are.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            The data.
+
+        Returns
+        -------
+        pd.DataFrame
+            The data with categorical and small numeric columns.
+        """
+        columns = {}
+        for header in data.columns:
+            if header in self.domains:
+                values = self.categorize(data[header], self.domains[header])
+            elif header in self.numeric_dtypes:
+                values = compact_numbers(data[header], self.numeric_dtypes[header])
+            else:
+                continue
+            if values is not data[header]:
+                columns[header] = values
+
+        return data.assign(**columns) if columns else data
+
+    def categorize(self, values: pd.Series, domain: str) -> pd.Series:
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # A column made with an older dictionary, or read from the cache, is aligned with the dictionary
+            self.extend(domain, values.cat.categories.to_series())
+            if values.cat.categories.equals(self.categories[domain]):
+                return values
+            return values.cat.set_categories(self.categories[domain])
+
+        if pd.api.types.infer_dtype(values, skipna=True) not in ['string', 'empty']:
+            return values
+
+        # The strings are stripped like the keys of the DataMatcher, such that ' Drama' and 'Drama' are one category
+        strings = values.astype(object).str.strip()
+        self.extend(domain, strings)
+        return pd.Series(pd.Categorical(strings, categories=self.categories[domain]), index=values.index, name=values.name)
+
+    def extend(self, domain: str, values: pd.Series) -> None:
+        """
+        Function that adds the new values to the dictionary of a domain.
+
+        Parameters
+        ----------
+        domain : str
+            The domain of the values.
+        values : pd.Series
+            The strings of the domain.
+
+        Returns
+        -------
+        None
+        """
+        categories = self.categories.get(domain, pd.Index([], dtype=object))
+        new_values = pd.Index(values.dropna().unique()).difference(categories)
+        if len(new_values):
+            self.categories[domain] = categories.append(new_values).sort_values()
+            self.version += 1
+        else:
+            self.categories[domain] = categories
+
+
+# The schema of this process, shared by all the DataSets such that their categoricals can be joined on the codes
+schema = DtypeSchema()
@@ -0,0 +1,136 @@
+import pandas as pd
+from data_wrapper import DataWrapper, is_arrow_list, explode_arrow_list
+from instrumentation import instrumentation
+
+# The columns of every edge table that must be in a source to extract the table, and the columns that are added if they are there
+EDGE_TABLES = {
+    'Acted in': (['movie_name', 'movie_date', 'actor'], []),
+    'Directed': (['movie_name', 'movie_date', 'director'], []),
+    'Wrote': (['movie_name', 'movie_date', 'writer'], []),
+    'Has genre': (['movie_name', 'movie_date', 'movie_genre'], []),
+    'Nominated for (Movie)': (['movie_name', 'movie_date', 'award_category', 'award_year'], ['award_winner']),
+    'Nominated for (Person)': (['person_name', 'award_category', 'award_year'], ['award_winner']),
+}
+
+# The columns that hold the names of persons, they are stacked into one column instead of being exploded against each other
+PERSON_COLUMNS = ['person_name', 'actor', 'director', 'writer']
+
+
+class EdgeExtractor():
+    """
+    A class used to extract the normalized edge tables from the data of a DataWrapper.
+    Every table only takes the columns it needs and only explodes those,
+    so the actors of a movie are never multiplied with its genres, directors or writers.
+
+    Attributes
+    ----------
+    edge_tables : dict
+        The required and the optional columns of every edge table.
+    person_columns : list
+        The columns that hold the names of persons.
+
+    Methods
+    -------
+    extract(wrapper)
+        Returns the edge tables of the data of a wrapper.
+    extract_persons(wrapper)
+        Returns the names and dates of birth of all the persons in the data of a wrapper.
+    get_list_columns(data)
+        Returns the columns that hold lists.
+    explode(data, list_columns)
+        Explodes the list columns of a table.
+    """
+
+    def __init__(self, edge_tables: dict = EDGE_TABLES, person_columns: list = PERSON_COLUMNS) -> None:
+        self.edge_tables = edge_tables
+        self.person_columns = person_columns
+
+    def get_list_columns(self, data: pd.DataFrame) -> set:
+        """
+        Function that finds the columns that hold lists, every column is scanned once per source.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            The data of a source.
+
+        Returns
+        -------
+        set
+            The headers of the columns with Arrow lists or with lists of objects.
+        """
+        return {header for header in data.columns
+                if is_arrow_list(data[header]) or
+                (data[header].dtype == 'object' and data[header].map(lambda x: isinstance(x, list)).any())}
+
+    def explode(self, data: pd.DataFrame, list_columns: set) -> pd.DataFrame:
+        for header in data.columns:
+            if header in list_columns:
+                data = explode_arrow_list(data, header) if is_arrow_list(data[header]) else data.explode(header)
+        return data
+
+    def extract(self, wrapper: DataWrapper, list_columns: set = None) -> dict:
+        """
+        Function that extracts the edge tables of the data of a wrapper.
+
+        Parameters
+        ----------
+        wrapper : DataWrapper
+            The wrapper with the cleaned data of a source.
+        list_columns : set, optional
+            The columns that hold lists, they are found if they are not given.
+
+        Returns
+        -------
+        dict
+            The name and the exploded data of every edge table whose required columns are in the source.
+        """
+        data = wrapper.get_data()
+        with instrumentation.stage('EdgeExtractor.extract', wrapper.get_name(), len(data)) as record:
+            if list_columns is None:
+                list_columns = self.get_list_columns(data)
+
+            tables = {}
+            for name, (required_columns, optional_columns) in self.edge_tables.items():
+                if not all(column in data.columns for column in required_columns):
+                    continue
+                columns = required_columns + [column for column in optional_columns if column in data.columns]
+                tables[name] = self.explode(data[columns], list_columns)
+
+            record['rows_out'] = sum(len(table) for table in tables.values())
+        return tables
+
+    def extract_persons(self, wrapper: DataWrapper, list_columns: set = None) -> pd.DataFrame:
+        """
+        Function that extracts the persons of the data of a wrapper.
+        Every column with names is exploded on its own and the names are stacked into the person_name column,
+        only the names of the person_name column have a date of birth.
+
+        Parameters
+        ----------
+        wrapper : DataWrapper
+            The wrapper with the cleaned data of a source.
+        list_columns : set, optional
+            The columns that hold lists, they are found if they are not given.
+
+        Returns
+        -------
+        pd.DataFrame
+            The person_name and person_dateofbirth of every person, or None if the source has no persons.
+        """
+        data = wrapper.get_data()
+        with instrumentation.stage('EdgeExtractor.extract_persons', wrapper.get_name(), len(data)) as record:
+            if list_columns is None:
+                list_columns = self.get_list_columns(data)
+
+            persons = []
+            for header in self.person_columns:
+                if header not in data.columns:
+                    continue
+                columns = [header] + (['person_dateofbirth'] if header == 'person_name' and 'person_dateofbirth' in data.columns else [])
+                names = self.explode(data[columns], list_columns).rename(columns={header: 'person_name'})
+                persons.append(names.dropna(subset=['person_name']))
+
+            persons = pd.concat(persons, ignore_index=True) if persons else None
+            record['rows_out'] = len(persons) if persons is not None else 0
+        return persons
@@ -0,0 +1,320 @@
+from pathlib import Path
+from contextlib import contextmanager
+from functools import wraps
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import pandas as pd
+from decouple import config
+
+try:
+    import resource
+except ImportError:
+    # The resource module only exists on Unix, the peak memory is not measured elsewhere
+    resource = None
+
+
+def get_peak_rss():
+    """
+    Function for getting the peak resident set size of the process.
+
+    Returns
+    -------
+    int
+        The peak memory of the process in bytes, or None if it can not be measured on this platform.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def get_rss():
+    """
+    Function for getting the current resident set size of the process.
+
+    Returns
+    -------
+    int
+        The memory of the process in bytes, or None if it can not be measured on this platform.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        # Only Linux has /proc, the current memory is not measured elsewhere
+        return None
+
+
+def count_rows(obj):
+    # Count the rows of a frame, or of the data of a DataWrapper or DataSet
+    if isinstance(obj, pd.DataFrame):
+        return len(obj)
+    if hasattr(obj, 'fragments'):
+        # The buffered fragments of a DataSet are counted without concatenating them
+        data = obj.__dict__.get('_data')
+        return sum(len(fragment) for fragment in obj.fragments + obj.pending_fragments) + (len(data) if data is not None else 0)
+    data = getattr(obj, 'data', None)
+    return len(data) if isinstance(data, pd.DataFrame) else None
+
+
+class Instrumentation():
+    """
+    A class used to record the wall time, the rows in and out, and the peak memory of the stages of a cleaning run.
+    While a stage runs, a thread samples the resident memory of the process, such that the peak of every stage is
+    recorded, also when the memory is released again before the stage ends. The peak is recorded as is and as the
+    growth over the resident memory at the start of the stage, such that a stage is not charged for the memory of the
+    stages before it. Spikes that are shorter than the sample interval can be missed. With trace_memory, the peak memory
+    that a stage allocated on top of what was allocated at its start is also measured exactly with tracemalloc, which
+    makes the run several times slower.
+
+    Attributes
+    ----------
+    records : list
+        A record for every stage that ran, in the order in which they finished.
+    trace_memory : bool
+        Whether the peak memory of every stage is traced, CLEANING_TRACE_MEMORY by default.
+    sample_interval : float
+        The number of seconds between two samples of the resident memory, CLEANING_RSS_INTERVAL (0.01) by default.
+
+    Methods
+    -------
+    stage(name, source, rows_in)
+        Context manager that records a stage.
+    instrument(method)
+        Decorator that records every call of a method as a stage.
+    get_report()
+        Returns the records and the totals per source and stage.
+    write_report(path)
+        Writes the report as JSON.
+    to_prometheus()
+        Returns the totals per source and stage in the Prometheus text format.
+    write_prometheus(path)
+        Writes the Prometheus metrics, e.g. for the textfile collector of the node exporter.
+    """
+
+    def __init__(self, trace_memory: bool = None, sample_interval: float = None) -> None:
+        self.records = []
+        self.trace_memory = config('CLEANING_TRACE_MEMORY', default=False, cast=bool) if trace_memory is None else trace_memory
+        self.sample_interval = config('CLEANING_RSS_INTERVAL', default=0.01, cast=float) if sample_interval is None else sample_interval
+        self.started = time.time()
+        self.lock = threading.Lock()
+        # The stages that are running, such that a method that calls itself is only recorded once
+        self.active = threading.local()
+        # The memory at the start and the peak so far of the stages that are running, the stages can be nested
+        self.running = []
+        # The resident memory at the start and the peak so far of the stages that are running, updated by the sampler
+        self.sampled = []
+        self.sampling = threading.Event()
+        # The process of the sampler thread, a forked worker process starts a sampler of its own
+        self.sampler_pid = None
+
+    def after_fork(self) -> None:
+        # A forked worker process inherits the lock, which the sampler may hold, and the stages of its parent,
+        # but not the sampler thread
+        self.lock = threading.Lock()
+        self.running = []
+        self.sampled = []
+        self.sampling = threading.Event()
+        self.sampler_pid = None
+
+    def sample(self) -> None:
+        # Runs in the sampler thread, it waits while no stage is running
+        while True:
+            self.sampling.wait()
+            self.update_rss()
+            time.sleep(self.sample_interval)
+
+    def update_rss(self) -> None:
+        rss = get_rss()
+        with self.lock:
+            for memory in self.sampled:
+                memory['peak'] = max(memory['peak'], rss)
+
+    def start_sampler(self) -> None:
+        if self.sampler_pid != os.getpid():
+            self.sampler_pid = os.getpid()
+            threading.Thread(target=self.sample, name='rss-sampler', daemon=True).start()
+
+    def update_peaks(self) -> int:
+        # Hand the peak since the last reset to all the running stages, such that the next stage starts its own peak
+        current, peak = tracemalloc.get_traced_memory()
+        for memory in self.running:
+            memory['peak'] = max(memory['peak'], peak)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextmanager
+    def stage(self, name: str, source: str = None, rows_in: int = None):
+        """
+        Context manager that records a stage.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage, e.g. DataWrapper.make_date.
+        source : str
+            The name of the data the stage runs on.
+        rows_in : int
+            The number of rows before the stage.
+
+        Yields
+        ------
+        dict
+            The record of the stage, set its rows_out before the block ends.
+        """
+        record = {'stage': name, 'source': source, 'rows_in': rows_in, 'rows_out': None}
+        memory = None
+        if self.trace_memory:
+            with self.lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                current = self.update_peaks()
+                memory = {'start': current, 'peak': current}
+                self.running.append(memory)
+        rss = get_rss()
+        rss_memory = None
+        if rss is not None:
+            with self.lock:
+                rss_memory = {'start': rss, 'peak': rss}
+                self.sampled.append(rss_memory)
+                self.start_sampler()
+                self.sampling.set()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 6)
+            record['peak_rss_bytes'] = record['rss_growth_bytes'] = None
+            if rss_memory is not None:
+                # A last sample, such that a stage that is shorter than the sample interval is measured too
+                self.update_rss()
+            with self.lock:
+                if rss_memory is not None:
+                    self.sampled.remove(rss_memory)
+                    if not self.sampled:
+                        self.sampling.clear()
+                    record['peak_rss_bytes'] = rss_memory['peak']
+                    record['rss_growth_bytes'] = rss_memory['peak'] - rss_memory['start']
+                record['peak_bytes'] = None
+                if memory is not None:
+                    self.update_peaks()
+                    self.running.remove(memory)
+                    record['peak_bytes'] = memory['peak'] - memory['start']
+                self.records.append(record)
+
+    def instrument(self, method):
+        """
+        Decorator that records every call of a method as a stage.
+        The rows in are the rows of the first DataFrame argument, or else of the data of the object.
+        The rows out are the rows of the returned DataFrame, or else of the data of the object.
+        """
+        name = method.__qualname__
+
+        @wraps(method)
+        def wrapper(obj, *args, **kwargs):
+            active = self.active.__dict__.setdefault('stages', set())
+            if (id(obj), name) in active:
+                return method(obj, *args, **kwargs)
+
+            frames = [arg for arg in args if isinstance(arg, pd.DataFrame)]
+            rows_in = len(frames[0]) if frames else count_rows(obj)
+            source = obj.get_name() if hasattr(obj, 'get_name') else None
+
+            active.add((id(obj), name))
+            try:
+                with self.stage(name, source, rows_in) as record:
+                    result = method(obj, *args, **kwargs)
+                    record['rows_out'] = len(result) if isinstance(result, pd.DataFrame) else count_rows(obj)
+            finally:
+                active.discard((id(obj), name))
+            return result
+
+        return wrapper
+
+    def get_report(self) -> dict:
+        """
+        Function for getting the report of the run.
+
+        Returns
+        -------
+        dict
+            The records of the stages, the calls, seconds, rows and peak memory per source and stage,
+            and the peak resident memory of the whole process.
+        """
+        with self.lock:
+            records = list(self.records)
+
+        totals = {}
+        for record in records:
+            key = (record['source'] or '', record['stage'])
+            total = totals.setdefault(key, {'source': key[0], 'stage': key[1], 'calls': 0, 'seconds': 0.0,
+                                            'rows_in': 0, 'rows_out': 0, 'peak_rss_bytes': None, 'rss_growth_bytes': None,
+                                            'peak_bytes': None})
+            total['calls'] += 1
+            total['seconds'] = round(total['seconds'] + record['seconds'], 6)
+            total['rows_in'] += record['rows_in'] or 0
+            total['rows_out'] += record['rows_out'] or 0
+            # The memory of the call that needed the most
+            for field in ['peak_rss_bytes', 'rss_growth_bytes', 'peak_bytes']:
+                if record.get(field) is not None:
+                    total[field] = max(record[field], total[field] if total[field] is not None else record[field])
+
+        return {'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+                'seconds': round(time.time() - self.started, 3), 'peak_rss_bytes': get_peak_rss(),
+                'totals': list(totals.values()), 'stages': records}
+
+    def write_report(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.get_report(), indent=4))
+
+    def to_prometheus(self) -> str:
+        """
+        Function for getting the totals per source and stage in the Prometheus text format.
+
+        Returns
+        -------
+        str
+            The metrics.
+        """
+        metrics = [
+            ('cleaning_stage_calls_total', 'counter', 'Number of times a cleaning stage ran.', 'calls'),
+            ('cleaning_stage_seconds_total', 'counter', 'Wall time spent in a cleaning stage.', 'seconds'),
+            ('cleaning_stage_rows_in_total', 'counter', 'Rows that went into a cleaning stage.', 'rows_in'),
+            ('cleaning_stage_rows_out_total', 'counter', 'Rows that came out of a cleaning stage.', 'rows_out'),
+            ('cleaning_stage_peak_rss_bytes', 'gauge', 'Peak resident memory of the process during a cleaning stage.', 'peak_rss_bytes'),
+            ('cleaning_stage_rss_growth_bytes', 'gauge', 'Peak growth of the resident memory over its value at the start of a cleaning stage.', 'rss_growth_bytes'),
+            ('cleaning_stage_peak_bytes', 'gauge', 'Peak memory allocated by a cleaning stage on top of the memory at its start.', 'peak_bytes'),
+        ]
+        totals = self.get_report()['totals']
+
+        lines = []
+        for metric, metric_type, description, field in metrics:
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} {metric_type}')
+            for total in totals:
+                if total[field] is not None:
+                    labels = f'source="{self.escape(total["source"])}",stage="{self.escape(total["stage"])}"'
+                    lines.append(f'{metric}{{{labels}}} {total[field]}')
+        return '\n'.join(lines) + '\n'
+
+    def escape(self, value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def write_prometheus(self, path: Path) -> None:
+        # Write to a temporary file first, such that a collector never reads half a file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(path.suffix + '.tmp')
+        temporary_path.write_text(self.to_prometheus())
+        temporary_path.replace(path)
+
+
+# The instrumentation of this process, shared by the DataWrappers, DataSets and DataMatchers
+instrumentation = Instrumentation()
+instrumented = instrumentation.instrument
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=instrumentation.after_fork)
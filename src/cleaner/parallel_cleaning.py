@@ -0,0 +1,153 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import os
+import tempfile
+import uuid
+import pandas as pd
+import pyarrow as pa
+from data_cache import table_to_frame
+from data_wrapper import DataWrapper
+from instrumentation import instrumentation
+
+
+def write_frame(data: pd.DataFrame, path: Path) -> Path:
+    """
+    Function that writes a frame to an uncompressed Arrow IPC file, such that another process reads it without unpickling.
+    Columns that Arrow can not hold, e.g. lists mixed with single values, are pickled instead.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The frame to be written.
+    path : Path
+        The path of the file, without a suffix.
+
+    Returns
+    -------
+    Path
+        The path of the written file.
+    """
+    try:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as error:
+        print(f'The data of {path.name} could not be converted to Arrow, it is pickled instead: {error}')
+        data.to_pickle(path.with_suffix('.pkl'))
+        return path.with_suffix('.pkl')
+
+    with pa.OSFile(str(path.with_suffix('.arrow')), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path.with_suffix('.arrow')
+
+
+def read_frame(path: Path) -> pd.DataFrame:
+    """
+    Function that reads a frame written by write_frame and removes the file.
+    The lists come back as Arrow list columns, like with DataWrapper.set_headers(arrow_lists=True),
+    because making a Python list per row again would cost more than cleaning the data.
+
+    Parameters
+    ----------
+    path : Path
+        The path of the file.
+
+    Returns
+    -------
+    pd.DataFrame
+        The frame.
+    """
+    if path.suffix == '.pkl':
+        data = pd.read_pickle(path)
+    else:
+        # The file is read into memory and closed before it is removed, a memory map would keep it open on Windows
+        with pa.OSFile(str(path)) as source:
+            data = table_to_frame(pa.ipc.open_file(source).read_all(), arrow_lists=True)
+    path.unlink()
+    return data
+
+
+def clean_source(wrapper: DataWrapper, directory: Path) -> tuple:
+    """
+    Function that runs in a worker process: it loads the data of a lazy wrapper, replays its cleaning steps
+    and writes every cleaned chunk to an Arrow IPC file.
+
+    Parameters
+    ----------
+    wrapper : DataWrapper
+        The lazy or streamed wrapper, which only holds the headers and the cleaning steps.
+    directory : Path
+        The directory of the files.
+
+    Returns
+    -------
+    tuple
+        The paths of the chunks in order, and the records of the instrumentation of the worker.
+    """
+    # A worker cleans several sources, and a forked worker starts with the records of its parent
+    first_record = len(instrumentation.records)
+    paths = []
+    for chunk in wrapper.iter_chunks():
+        paths.append(write_frame(chunk.get_data(), directory / f'{uuid.uuid4().hex}'))
+    return paths, instrumentation.records[first_record:]
+
+
+class ParallelCleaner():
+    """
+    A class used to clean independent sources in a pool of processes.
+    The workers load and clean the sources and hand the cleaned chunks back as Arrow IPC files,
+    so the frames are not pickled between the processes and the lists come back as Arrow list columns.
+
+    Attributes
+    ----------
+    workers : int
+        The number of processes, the sources are cleaned in this process if it is 1.
+    directory : Path
+        The directory of the files, a temporary directory by default.
+
+    Methods
+    -------
+    iter_chunks(wrappers)
+        Returns the cleaned chunks of all the wrappers.
+    """
+
+    def __init__(self, workers: int = None, directory: Path = None) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.directory = directory
+
+    def iter_chunks(self, wrappers: list):
+        """
+        Function that cleans the wrappers in parallel and returns their cleaned chunks.
+        The wrappers must be lazy or streamed, such that only their headers and cleaning steps are sent to the workers.
+        The chunks are returned in the order of the wrappers, such that the aggregated data does not depend on which worker is done first.
+
+        Parameters
+        ----------
+        wrappers : list
+            The DataWrappers to be cleaned.
+
+        Returns
+        -------
+        generator
+            DataWrappers that each hold one cleaned chunk of a source.
+        """
+        if self.workers == 1 or len(wrappers) < 2:
+            for wrapper in wrappers:
+                yield from wrapper.iter_chunks()
+            return
+
+        with tempfile.TemporaryDirectory(dir=self.directory) as directory, \
+                ProcessPoolExecutor(max_workers=min(self.workers, len(wrappers))) as executor:
+            futures = [executor.submit(clean_source, wrapper, Path(directory)) for wrapper in wrappers]
+            for wrapper, future in zip(wrappers, futures):
+                paths, records = future.result()
+                instrumentation.records.extend(records)
+
+                # Only one chunk is read back at a time, the other chunks wait on disk
+                for path in paths:
+                    chunk_wrapper = copy.copy(wrapper)
+                    chunk_wrapper.data = read_frame(path)
+                    chunk_wrapper.chunksize = None
+                    chunk_wrapper.lazy = False
+                    chunk_wrapper.steps = list(wrapper.steps)
+                    yield chunk_wrapper
@@ -0,0 +1,206 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import hashlib
+import json
+import os
+import subprocess
+import time
+from data_cache import hash_file
+
+
+class Stage():
+    """
+    A class used to represent a stage of the pipeline.
+
+    Attributes
+    ----------
+    name : str
+        The name of the stage.
+    command : list
+        The command that runs the stage.
+    inputs : list
+        The files the stage reads, the stage runs again when one of them changed.
+    outputs : list
+        The files the stage writes, the stages that read them depend on this stage.
+    env : dict
+        Extra environment variables for the command.
+    """
+
+    def __init__(self, name: str, command: list, inputs: list = [], outputs: list = [], env: dict = {}) -> None:
+        self.name = name
+        self.command = command
+        self.inputs = [Path(path) for path in inputs]
+        self.outputs = [Path(path) for path in outputs]
+        self.env = env
+        self.fingerprint = None
+
+    def __str__(self):
+        return f'Stage(name={self.name}, inputs={len(self.inputs)}, outputs={len(self.outputs)})'
+
+    def get_fingerprint(self) -> str:
+        """
+        Function for getting the fingerprint of the stage, based on its command and the bytes of its inputs.
+
+        Returns
+        -------
+        str
+            The fingerprint of the stage.
+        """
+        digest = hashlib.sha256(repr((self.command, sorted(self.env.items()))).encode())
+        for path in self.inputs:
+            digest.update(str(path).encode())
+            digest.update(hash_file(path).encode() if path.is_file() else b'missing')
+        return digest.hexdigest()
+
+
+def run_stage(stage: Stage) -> tuple:
+    """
+    Function that runs the command of a stage in a separate process.
+
+    Parameters
+    ----------
+    stage : Stage
+        The stage to be run.
+
+    Returns
+    -------
+    tuple
+        The return code of the command and the wall time in seconds.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(stage.command, env={**os.environ, **stage.env})
+    return result.returncode, time.perf_counter() - start
+
+
+class Pipeline():
+    """
+    A class used to represent an incremental pipeline of stages.
+    A stage only runs when its inputs changed since its last successful run or when one of its outputs is missing.
+    Stages that do not depend on each other run in parallel in a process pool.
+
+    Attributes
+    ----------
+    stages : dict
+        The stages of the pipeline by name.
+    state_path : Path
+        The file in which the fingerprints of the last successful runs are stored.
+    max_workers : int
+        The maximum number of stages that run at the same time.
+    """
+
+    def __init__(self, stages: list, state_path: Path = Path('data/.pipeline_state.json'), max_workers: int = None) -> None:
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.state = json.loads(state_path.read_text()) if state_path.is_file() else {}
+
+    def get_dependencies(self, stage: Stage) -> list:
+        """
+        Function for getting the stages that write the inputs of a stage.
+
+        Parameters
+        ----------
+        stage : Stage
+            The stage to get the dependencies of.
+
+        Returns
+        -------
+        list
+            The names of the stages the stage depends on.
+        """
+        return [other.name for other in self.stages.values()
+                if other is not stage and set(other.outputs).intersection(stage.inputs)]
+
+    def select(self, targets: list) -> list:
+        """
+        Function for getting the targets and all the stages they depend on.
+
+        Parameters
+        ----------
+        targets : list
+            The names of the stages to be run, all the stages if empty.
+
+        Returns
+        -------
+        list
+            The names of the selected stages.
+        """
+        selected = []
+        pending = list(targets) if targets else list(self.stages.keys())
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f'There is no stage called {name}.')
+            if name not in selected:
+                selected.append(name)
+                pending.extend(self.get_dependencies(self.stages[name]))
+        return selected
+
+    def is_up_to_date(self, stage: Stage, fingerprint: str) -> bool:
+        return self.state.get(stage.name) == fingerprint and all(path.exists() for path in stage.outputs)
+
+    def run(self, targets: list = []) -> dict:
+        """
+        Function that runs the stages that are out of date.
+
+        Parameters
+        ----------
+        targets : list
+            The names of the stages to be run, together with the stages they depend on. All the stages if empty.
+
+        Returns
+        -------
+        dict
+            The status and the wall time in seconds of every selected stage.
+        """
+        selected = self.select(targets)
+        dependencies = {name: [dependency for dependency in self.get_dependencies(self.stages[name]) if dependency in selected]
+                        for name in selected}
+        report = {}
+        running = {}
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(report) < len(selected):
+                # Start every stage whose dependencies are finished
+                for name in selected:
+                    if name in report or name in running.values():
+                        continue
+                    if any(report.get(dependency, {}).get('status') in ['failed', 'blocked'] for dependency in dependencies[name]):
+                        report[name] = {'status': 'blocked', 'seconds': 0.0}
+                        continue
+                    if not all(dependency in report for dependency in dependencies[name]):
+                        continue
+
+                    # The fingerprint is computed now, because the inputs are only final once the dependencies finished
+                    stage = self.stages[name]
+                    fingerprint = stage.get_fingerprint()
+                    if self.is_up_to_date(stage, fingerprint):
+                        report[name] = {'status': 'skipped', 'seconds': 0.0}
+                        continue
+                    running[executor.submit(run_stage, stage)] = name
+                    self.state[name] = None
+                    stage.fingerprint = fingerprint
+
+                if not running:
+                    continue
+
+                # Wait for a stage to finish and record its result
+                done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    return_code, seconds = future.result()
+                    report[name] = {'status': 'ran' if return_code == 0 else 'failed', 'seconds': round(seconds, 3)}
+                    self.state[name] = self.stages[name].fingerprint if return_code == 0 else None
+                    self.save_state()
+
+        self.print_report(report)
+        return report
+
+    def save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps({name: fingerprint for name, fingerprint in self.state.items() if fingerprint}, indent=4))
+
+    def print_report(self, report: dict) -> None:
+        print(f'\n{"Stage":<30}{"Status":<10}{"Seconds":>10}')
+        for name, result in report.items():
+            print(f'{name:<30}{result["status"]:<10}{result["seconds"]:>10.3f}')
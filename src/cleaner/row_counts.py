@@ -0,0 +1,69 @@
+from pathlib import Path
+import argparse
+import json
+import sys
+import pandas as pd
+from data_wrapper_test import DATASETS
+
+
+def count_rows(directory: Path = Path('data/cleaned_data')) -> dict:
+    """
+    Function for counting the rows of every cleaned dataset.
+
+    Parameters
+    ----------
+    directory : Path
+        The directory with the cleaned data.
+
+    Returns
+    -------
+    dict
+        The number of rows of every cleaned dataset, None if it was not exported.
+    """
+    counts = {}
+    for name in DATASETS:
+        path = directory / f'{name}.csv'
+        # Only the first column is read, the rows are counted by pandas such that quoted line breaks are not counted
+        counts[name] = len(pd.read_csv(path, usecols=[0])) if path.is_file() else None
+    return counts
+
+
+def compare(counts: dict, baseline: dict) -> list:
+    """
+    Function for comparing the row counts with a baseline.
+
+    Parameters
+    ----------
+    counts : dict
+        The number of rows of every cleaned dataset.
+    baseline : dict
+        The number of rows of every cleaned dataset in the baseline.
+
+    Returns
+    -------
+    list
+        A message for every dataset of which the number of rows changed.
+    """
+    return [f'{name}: {baseline.get(name)} -> {counts.get(name)} rows' for name in sorted(set(counts) | set(baseline))
+            if counts.get(name) != baseline.get(name)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check that the cleaned datasets have the same number of rows as the baseline.')
+    parser.add_argument('--directory', type=Path, default=Path('data/cleaned_data'), help='The directory with the cleaned data.')
+    parser.add_argument('--baseline', type=Path, default=Path('data/row_counts.json'), help='The row counts of the baseline.')
+    parser.add_argument('--save', action='store_true', help='Save the row counts as the new baseline.')
+    args = parser.parse_args()
+
+    counts = count_rows(args.directory)
+    if args.save:
+        args.baseline.write_text(json.dumps(counts, indent=4) + '\n')
+        print(f'Saved the row counts of {len(counts)} datasets to {args.baseline}.')
+        sys.exit(0)
+
+    differences = compare(counts, json.loads(args.baseline.read_text()))
+    for difference in differences:
+        print(difference)
+    if differences:
+        sys.exit(1)
+    print(f'The row counts of all {len(counts)} datasets match {args.baseline}.')
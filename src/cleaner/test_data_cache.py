@@ -0,0 +1,32 @@
+from pathlib import Path
+import pandas as pd
+from data_cache import DataCache
+
+
+def test_store_writes_through_a_temporary_file_of_its_own(tmp_path, monkeypatch):
+    cache = DataCache(tmp_path)
+    written = []
+    to_parquet = pd.DataFrame.to_parquet
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', lambda self, path, **kwargs: written.append(path) or to_parquet(self, path, **kwargs))
+
+    data = pd.DataFrame({'title': ['Up', 'Heat']})
+    assert cache.store('movies', data) and cache.store('movies', data)
+
+    # Two writers of the same key never share a temporary file, and none is left behind
+    assert len(set(written)) == 2
+    assert [path.name for path in tmp_path.iterdir()] == ['movies.parquet']
+    pd.testing.assert_frame_equal(cache.load('movies'), data)
+
+
+def test_evict_skips_the_entries_that_another_process_removed(tmp_path, monkeypatch):
+    cache = DataCache(tmp_path, max_size=0)
+    cache.store('movies', pd.DataFrame({'title': ['Up']}))
+    (tmp_path / 'persons.parquet').write_bytes(b'stale')
+
+    # Another process evicts the entry between the listing and the stat
+    glob = Path.glob
+    monkeypatch.setattr(Path, 'glob', lambda self, pattern: [*glob(self, pattern), tmp_path / 'gone.parquet'])
+    cache.evict()
+
+    assert list(tmp_path.iterdir()) == []
+    assert cache.load('movies') is None
@@ -0,0 +1,81 @@
+import numpy as np
+import pyarrow as pa
+import pandas as pd
+from data_wrapper import DataMatcher
+
+
+def groups(row_combinations: dict) -> list:
+    return sorted(sorted(rows) for rows in row_combinations.values())
+
+
+def test_match_keys_groups_exact_and_similar_keys():
+    rows = pd.DataFrame({'movie_name': ['The Chronicles of Narnia: The Lion; the Witch and the Wardrobe', 'Heat',
+                                        'The Chronicles of Narnia: The Lion, the Witch and the Wardrobe', 'Heat', 'Alien']})
+    assert groups(DataMatcher().match_keys(rows, ['movie_name'])) == [[0, 2], [1, 3], [4]]
+
+
+def test_match_keys_unites_chains_of_similar_keys():
+    # a ~ b and b ~ c put a, b and c in one group, even if a and c are not similar enough
+    rows = pd.DataFrame({'movie_name': ['Lock, Stock and Two Smoking Barrels', 'Lock; Stock and Two Smoking Barrels',
+                                        'Lock; Stock and Two Smoking Barrels!']})
+    assert groups(DataMatcher().match_keys(rows, ['movie_name'])) == [[0, 1, 2]]
+
+
+def test_match_keys_keeps_sequels_and_nan_keys_apart():
+    rows = pd.DataFrame({'movie_name': ['Rocky II', 'Rocky III', 'Police Academy 2', 'Police Academy 3', None, None]})
+    assert groups(DataMatcher().match_keys(rows, ['movie_name'])) == [[0], [1], [2], [3]]
+
+
+def test_match_keys_with_timestamps_blocks_on_the_name():
+    letters = np.random.default_rng(0).choice(list('abcdefghijklmnopqrstuvwxyz'), size=(200, 12))
+    rows = pd.DataFrame({'movie_name': [''.join(name) for name in letters], 'movie_date': pd.Timestamp('2000-01-01')})
+
+    # Keep the blocks that are scored, every key in one block would score all the pairs
+    class BlockMatcher(DataMatcher):
+        def block_keys(self, key_strings, block_length=6):
+            self.blocks = super().block_keys(key_strings, block_length)
+            return self.blocks
+
+    matcher = BlockMatcher()
+    assert len(matcher.match_keys(rows, ['movie_name', 'movie_date'], dif_timestamps=True)) == len(rows)
+    assert max((len(block) for block in matcher.blocks), default=0) < 10
+
+
+def test_merge_clusters_applies_the_policy_of_every_column():
+    rows = pd.DataFrame({'movie_name': ['Heat', 'Heat!', 'Alien'], 'movie_rating': [7.1, 8.3, None],
+                         'movie_censor': [None, 'R', 'R'], 'movie_genre': [['Crime'], ['Drama', 'Crime'], None],
+                         'award_winner': [None, True, None], 'movie_budget': [60, 50, 11]})
+    merged = DataMatcher().merge_clusters(rows, np.array([0, 0, 1]), ['movie_name'], policies={'movie_budget': 'min'})
+
+    assert merged['movie_name'].tolist() == ['Heat', 'Alien']
+    assert merged['movie_rating'].tolist()[0] == 8.3 and pd.isna(merged['movie_rating'].iloc[1])
+    assert merged['movie_censor'].tolist() == ['R', 'R']
+    assert merged['movie_genre'].iloc[0] == ['Crime', 'Drama'] and pd.isna(merged['movie_genre'].iloc[1])
+    # A cluster has won when any of its rows won, and is unknown when none of its rows is known
+    assert merged['award_winner'].tolist() == [True, None]
+    assert merged['movie_budget'].tolist() == [50, 11]
+
+
+def test_merge_clusters_unites_arrow_lists_and_takes_callables():
+    rows = pd.DataFrame({'movie_name': ['Heat', 'Heat', 'Alien'],
+                         'actors': pd.Series([['Al Pacino'], ['Robert De Niro', 'Al Pacino'], ['Sigourney Weaver']],
+                                             dtype=pd.ArrowDtype(pa.list_(pa.string()))),
+                         'movie_runtime': [170, 171, 117]})
+    merged = DataMatcher().merge_clusters(rows, np.array([0, 0, 1]), ['movie_name'], policies={'movie_runtime': 'mean'})
+    assert [list(actors) for actors in merged['actors']] == [['Al Pacino', 'Robert De Niro'], ['Sigourney Weaver']]
+    assert merged['movie_runtime'].tolist() == [170.5, 117]
+
+    merged = DataMatcher().merge_clusters(rows, np.array([0, 0, 1]), ['movie_name'], policies={'movie_runtime': lambda values: values.iloc[-1]})
+    assert merged['movie_runtime'].tolist() == [171, 117]
+
+
+def test_aggregate_keeps_the_wins_of_matched_nominations():
+    # The nominee is spelled differently in the sources and only one spelling is known to have won,
+    # every spelling occurs twice, because only the keys that occur more than once are matched
+    names = ['Richard D. Zanuck and David Brown, Producers', 'Richard D. Zanuck and David Brown, Producer']
+    nominations = pd.DataFrame({'person_name': [names[0], names[0], names[1], names[1]] * 2,
+                                'award_category': 'BEST PICTURE', 'award_year': [1979] * 4 + [1989] * 4,
+                                'award_winner': [False, False, True, True, True, True, False, False]})
+    aggregated = DataMatcher().aggregate(nominations, 'person_name', 'award_category', 'award_year')
+    assert aggregated['award_year'].tolist() == [1979, 1989]
+    assert aggregated['award_winner'].tolist() == [True, True]
@@ -0,0 +1,54 @@
+import pandas as pd
+from data_wrapper import DataWrapper
+
+
+def make_wrapper(tmp_path, data: pd.DataFrame) -> DataWrapper:
+    path = tmp_path / 'data.csv'
+    data.to_csv(path, index=False)
+    return DataWrapper(path, 'test')
+
+
+def test_infer_date_format_tells_days_and_months_apart(tmp_path):
+    wrapper = make_wrapper(tmp_path, pd.DataFrame({'movie_date': ['1']}))
+    assert wrapper.infer_date_format(pd.Series(['25/12/2000', '13/01/1999', '01/02/2003'])) == '%d/%m/%Y'
+    assert wrapper.infer_date_format(pd.Series(['12/25/2000', '01/13/1999', '01/02/2003'])) == '%m/%d/%Y'
+    assert wrapper.infer_date_format(pd.Series(['March 3, 1999', 'July 14, 2001'])) == '%B %d, %Y'
+    assert wrapper.infer_date_format(pd.Series(['unknown', None])) is None
+
+
+def test_make_date_converts_dates_to_years(tmp_path):
+    wrapper = make_wrapper(tmp_path, pd.DataFrame({'person_dateofbirth': ['1956-07-09', '1962-07-03', None, 'July 4, 1970']}))
+    wrapper.make_date('person_dateofbirth')
+    # The last value does not fit the inferred format and is parsed on its own
+    assert wrapper.get_data()['person_dateofbirth'].tolist() == [1956, 1962, pd.NA, 1970]
+    assert wrapper.get_data()['person_dateofbirth'].dtype == 'Int64'
+
+
+def test_make_date_keeps_years_and_makes_datetimes(tmp_path):
+    wrapper = make_wrapper(tmp_path, pd.DataFrame({'award_year': [1999, 2000, None], 'movie_date': ['1999', '2000.0', '']}))
+    wrapper.make_date('award_year')
+    wrapper.make_date('movie_date', target_format=None)
+    assert wrapper.get_data()['award_year'].tolist() == [1999, 2000, pd.NA]
+    assert wrapper.get_data()['movie_date'].tolist()[:2] == [pd.Timestamp('1999-01-01'), pd.Timestamp('2000-01-01')]
+    assert pd.isna(wrapper.get_data()['movie_date'].iloc[2])
+
+
+def test_make_date_takes_the_first_date_of_a_list(tmp_path):
+    wrapper = make_wrapper(tmp_path, pd.DataFrame({'movie_date': ['x', 'y']}))
+    wrapper.data['movie_date'] = pd.Series([['2001-05-01', '2002-01-01'], '2003-03-03'], dtype=object)
+    wrapper.make_date('movie_date')
+    assert wrapper.get_data()['movie_date'].tolist() == [2001, 2003]
+
+
+def test_strip_credits_keeps_the_names_of_the_nominees(tmp_path):
+    credits = ['Music by Jerome Kern; Lyrics by Dorothy Fields and Jimmy McHugh', 'Walt Disney, Producer',
+               'Robert Towne, Jr.', 'Leo Forbstein, head of department  (Score by Max Steiner)', None]
+    for arrow_lists in [False, True]:
+        wrapper = make_wrapper(tmp_path, pd.DataFrame({'name': credits}))
+        wrapper.set_headers('person_name', arrow_lists=arrow_lists)
+        wrapper.strip_credits('person_name')
+        names = wrapper.get_data()['person_name'].tolist()
+        assert [list(x) for x in names[:4]] == [['Jerome Kern', 'Dorothy Fields', 'Jimmy McHugh'], ['Walt Disney'],
+                                                ['Robert Towne Jr.'], ['Leo Forbstein']]
+        # A row without names keeps a missing value, like the rows that set_headers splits
+        assert pd.isna(names[4]) if arrow_lists else pd.isna(names[4][0])
@@ -0,0 +1,49 @@
+import time
+from instrumentation import Instrumentation, get_rss
+
+MB = 1024 ** 2
+
+
+def test_stages_record_their_own_peak_memory():
+    instrumentation = Instrumentation(trace_memory=True)
+    with instrumentation.stage('outer', 'test'):
+        kept = bytearray(4 * MB)
+        with instrumentation.stage('inner', 'test'):
+            temporary = bytearray(2 * MB)
+            del temporary
+    with instrumentation.stage('after', 'test'):
+        pass
+
+    peaks = {record['stage']: record['peak_bytes'] for record in instrumentation.records}
+    # The inner stage is not charged for the memory the outer stage allocated before it, the outer stage includes the inner one
+    assert 2 * MB <= peaks['inner'] < 3 * MB
+    assert 6 * MB <= peaks['outer'] < 7 * MB
+    # A stage after a stage with a high peak starts its own peak
+    assert peaks['after'] < MB
+    assert 'cleaning_stage_peak_bytes{source="test",stage="inner"}' in instrumentation.to_prometheus()
+    del kept
+
+
+def test_stages_record_the_peak_of_the_resident_memory():
+    instrumentation = Instrumentation(trace_memory=False, sample_interval=0.001)
+    with instrumentation.stage('spike', 'test'):
+        # The memory is released again before the stage ends, only a sample during the stage sees it
+        temporary = bytearray(64 * MB)
+        temporary[::4096] = b'x' * len(temporary[::4096])
+        time.sleep(0.05)
+        del temporary
+    with instrumentation.stage('after', 'test'):
+        pass
+
+    records = {record['stage']: record for record in instrumentation.records}
+    assert records['spike']['peak_bytes'] is None
+    if get_rss() is None:
+        assert records['spike']['peak_rss_bytes'] is None
+        return
+    assert records['spike']['rss_growth_bytes'] >= 32 * MB
+    assert records['spike']['peak_rss_bytes'] >= records['spike']['rss_growth_bytes']
+    # A stage after a stage with a spike starts its own peak
+    assert records['after']['rss_growth_bytes'] < 16 * MB
+    assert instrumentation.get_report()['totals'][0]['peak_rss_bytes'] == records['spike']['peak_rss_bytes']
+    assert f'cleaning_stage_peak_rss_bytes{{source="test",stage="spike"}} {records["spike"]["peak_rss_bytes"]}' \
+        in instrumentation.to_prometheus()
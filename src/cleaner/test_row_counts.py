@@ -0,0 +1,18 @@
+import pandas as pd
+from row_counts import compare, count_rows
+
+
+def test_count_rows_counts_the_exported_datasets(tmp_path):
+    pd.DataFrame({'title': ['Up', 'Heat\nand dust'], 'year': [2009, 1983]}).to_csv(tmp_path / 'Movie.csv', index=False)
+    counts = count_rows(tmp_path)
+
+    # A quoted line break is not a row, a dataset that was not exported has no count
+    assert counts['Movie'] == 2
+    assert counts['Won (Person)'] is None
+
+
+def test_compare_reports_every_changed_dataset():
+    baseline = {'Movie': 10, 'Won (Person)': 5, 'Genre': 3}
+    assert compare({'Movie': 10, 'Won (Person)': 5, 'Genre': 3}, baseline) == []
+    assert compare({'Movie': 10, 'Won (Person)': 4, 'Award': 1}, baseline) == [
+        'Award: None -> 1 rows', 'Genre: 3 -> None rows', 'Won (Person): 5 -> 4 rows']
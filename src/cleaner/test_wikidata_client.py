@@ -0,0 +1,24 @@
+from wikidata_client import WikidataClient
+
+
+class RecordingClient(WikidataClient):
+    # Answers every query with one binding per label and keeps the queries that were sent
+    def post(self, query: str) -> dict:
+        self.queries.append(query)
+        labels = [value.split('"')[1] for value in query.split('VALUES ?label {')[1].split('@en')[:-1]]
+        return {'results': {'bindings': [{'label': {'value': label}, 'query': {'value': query[:5]}} for label in labels]}}
+
+
+def test_lookup_caches_the_results_per_query(tmp_path):
+    client = RecordingClient(cache_path=tmp_path / 'wikidata.sqlite', requests_per_second=1000)
+    client.queries = []
+
+    first = client.lookup('person', ['Tom Hanks', 'Meg Ryan'], 'QUERY {values}')
+    assert client.lookup('person', ['Tom Hanks'], 'QUERY {values}') == {'Tom Hanks': first['Tom Hanks']}
+    assert len(client.queries) == 1
+
+    # The results of the old query are not returned for a changed query
+    changed = client.lookup('person', ['Tom Hanks'], 'OTHER {values}')
+    assert len(client.queries) == 2
+    assert changed['Tom Hanks'][0]['query']['value'] == 'OTHER'
+    client.close()
@@ -0,0 +1,39 @@
+import bz2
+import json
+from wikidata_index import WikidataIndex
+
+
+def claim(value: dict, rank: str = 'normal') -> dict:
+    return {'rank': rank, 'mainsnak': {'datavalue': {'value': value}}}
+
+
+ENTITIES = [
+    {'id': 'Q2263', 'labels': {'en': {'value': 'Tom Hanks'}},
+     'claims': {'P569': [claim({'time': '+1956-07-09T00:00:00Z'})],
+                'P570': [claim({'time': '+1900-01-01T00:00:00Z'}, 'deprecated')]}},
+    {'id': 'Q40831', 'labels': {'en': {'value': 'Heat'}},
+     'claims': {'P2130': [claim({'amount': '+50000000'}), claim({'amount': '+60000000'}, 'preferred')]}},
+    # Entities without a label or without any of the properties are skipped
+    {'id': 'Q1', 'labels': {}, 'claims': {'P569': [claim({'time': '+2000-01-01T00:00:00Z'})]}},
+    {'id': 'Q2', 'labels': {'en': {'value': 'Earth'}}, 'claims': {'P31': [claim({'id': 'Q3504248'})]}},
+]
+
+
+def test_build_and_lookup_a_compressed_dump(tmp_path):
+    dump = tmp_path / 'dump.json.bz2'
+    with bz2.open(dump, 'wt', encoding='utf-8') as file:
+        file.write('[\n' + ',\n'.join(json.dumps(entity) for entity in ENTITIES) + '\n]\n')
+
+    index = WikidataIndex(tmp_path / 'index.sqlite')
+    assert index.build(dump) == 2
+
+    results = index.lookup(['Tom Hanks', 'Heat', 'Earth', None], {'birthdate': 'P569', 'deathdate': 'P570'})
+    # The deprecated death date is skipped and the time is formatted like the SPARQL endpoint does
+    assert results['Tom Hanks'] == [{'label': {'value': 'Tom Hanks'}, 'entity': {'value': 'Q2263'},
+                                     'birthdate': {'value': '1956-07-09T00:00:00Z'}}]
+    assert results['Earth'] == []
+
+    # The preferred claim wins and entities without the required variables are left out
+    assert index.lookup(['Heat'], {'budget': 'P2130'}, required=['budget'])['Heat'][0]['budget'] == {'value': '60000000'}
+    assert index.lookup(['Heat'], {'birthdate': 'P569'}, required=['birthdate']) == {'Heat': []}
+    index.close()
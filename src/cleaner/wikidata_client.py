@@ -0,0 +1,191 @@
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from decouple import config
+from tqdm import tqdm
+
+
+class WikidataClient():
+    """
+    A class used to represent a client for enriching the data with Wikidata.
+    Many labels are looked up in one query, the queries are sent concurrently with a bounded rate,
+    and the results are cached on disk such that finished lookups are never repeated.
+
+    Attributes
+    ----------
+    endpoint : str
+        The SPARQL endpoint, e.g. a local stand-in server for testing.
+    cache_path : Path
+        The SQLite file in which the results per label are cached, per kind and query.
+    batch_size : int
+        The number of labels per query.
+    max_concurrency : int
+        The maximum number of queries that are sent at the same time.
+    requests_per_second : float
+        The maximum number of queries that are started per second.
+
+    Methods
+    -------
+    lookup(kind, labels, query_template)
+        Returns the bindings of every label, querying only the labels that are not cached.
+    build_query(labels, query_template)
+        Returns the query for a batch of labels.
+    cache_key(kind, query_template)
+        Returns the key under which the results of a kind and query are cached.
+    """
+
+    def __init__(self, endpoint: str = None, cache_path: Path = Path('data/.cache/wikidata.sqlite'), batch_size: int = 50,
+                 max_concurrency: int = 4, requests_per_second: float = 5.0, timeout: float = 60.0, max_retries: int = 5) -> None:
+        self.endpoint = endpoint or config('WIKIDATA_ENDPOINT', default='https://query.wikidata.org/sparql')
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.cache_path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results (kind TEXT, label TEXT, bindings TEXT, PRIMARY KEY (kind, label))')
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def lookup(self, kind: str, labels: list, query_template: str) -> dict:
+        """
+        Function for looking up the labels in Wikidata.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of lookup, the results are cached per kind, query and label.
+        labels : list
+            The labels to be looked up.
+        query_template : str
+            The query, in which {values} is replaced by the VALUES clause of a batch of labels.
+            The query must select the ?label variable.
+
+        Returns
+        -------
+        dict
+            The list of bindings for every label.
+        """
+        labels = list(dict.fromkeys(label for label in labels if isinstance(label, str)))
+        results = self.load_cached(self.cache_key(kind, query_template), labels)
+
+        # Only the labels that are not cached are queried
+        missing = [label for label in labels if label not in results]
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        if batches:
+            results.update(asyncio.run(self.fetch_batches(kind, batches, query_template)))
+
+        return results
+
+    def load_cached(self, kind: str, labels: list) -> dict:
+        results = {}
+        for i in range(0, len(labels), 500):
+            batch = labels[i:i + 500]
+            rows = self.connection.execute(f'SELECT label, bindings FROM results WHERE kind = ? AND label IN ({", ".join("?" * len(batch))})',
+                                           [kind, *batch])
+            results.update({label: json.loads(bindings) for label, bindings in rows})
+        return results
+
+    def store(self, kind: str, results: dict) -> None:
+        self.connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                    [(kind, label, json.dumps(bindings)) for label, bindings in results.items()])
+        self.connection.commit()
+
+    def cache_key(self, kind: str, query_template: str) -> str:
+        # A changed query gives other bindings, so its results are cached apart from those of the old query
+        return f'{kind}:{hashlib.sha256(query_template.encode()).hexdigest()[:16]}'
+
+    def build_query(self, labels: list, query_template: str) -> str:
+        """
+        Function for building the query of a batch of labels.
+
+        Parameters
+        ----------
+        labels : list
+            The labels in the batch.
+        query_template : str
+            The query, in which {values} is replaced by the VALUES clause.
+
+        Returns
+        -------
+        str
+            The query.
+        """
+        # Escape the backslashes and quotes in the labels
+        values = " ".join('"%s"@en' % label.replace('\\', '\\\\').replace('"', '\\"') for label in labels)
+        return query_template.replace('{values}', f'VALUES ?label {{ {values} }}')
+
+    async def fetch_batches(self, kind: str, batches: list, query_template: str) -> dict:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        rate_lock = asyncio.Lock()
+        next_start = [0.0]
+
+        async def fetch(labels):
+            async with semaphore:
+                # Start at most requests_per_second queries per second
+                async with rate_lock:
+                    delay = next_start[0] - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    next_start[0] = time.monotonic() + 1 / self.requests_per_second
+                response = await asyncio.to_thread(self.post, self.build_query(labels, query_template))
+
+            # Group the bindings by label, labels without results get an empty list
+            results = {label: [] for label in labels}
+            for binding in response['results']['bindings']:
+                label = binding.get('label', {}).get('value')
+                if label in results:
+                    results[label].append(binding)
+            return results
+
+        results = {}
+        for task in tqdm(asyncio.as_completed([fetch(labels) for labels in batches]), total=len(batches), desc=f'Querying {kind}'):
+            batch_results = await task
+            # Store every finished batch at once, such that a crash does not repeat it
+            self.store(self.cache_key(kind, query_template), batch_results)
+            results.update(batch_results)
+
+        return results
+
+    def post(self, query: str) -> dict:
+        """
+        Function that sends a query to the endpoint, retrying when the endpoint is busy.
+
+        Parameters
+        ----------
+        query : str
+            The query to be sent.
+
+        Returns
+        -------
+        dict
+            The JSON response of the endpoint.
+        """
+        data = urllib.parse.urlencode({'query': query}).encode()
+        headers = {'Accept': 'application/sparql-results+json', 'User-Agent': 'Knowledge-Engineering enrichment client'}
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                request = urllib.request.Request(self.endpoint, data=data, headers=headers)
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as error:
+                # Only retry when the endpoint is rate limiting or temporarily unavailable
+                if error.code not in [429, 500, 502, 503, 504] or attempt == self.max_retries:
+                    raise
+                retry_after = error.headers.get('Retry-After')
+                time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt)
+            except urllib.error.URLError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(2 ** attempt)
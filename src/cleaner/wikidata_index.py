@@ -0,0 +1,176 @@
+from pathlib import Path
+import argparse
+import bz2
+import gzip
+import json
+import sqlite3
+from tqdm import tqdm
+
+# The properties that are used by the enrichment scripts
+PROPERTIES = {
+    'P569': 'birth_date',
+    'P570': 'death_date',
+    'P2031': 'start_activity',
+    'P2032': 'end_activity',
+    'P2130': 'budget',
+    'P2139': 'revenue',
+}
+
+
+class WikidataIndex():
+    """
+    A class used to represent an offline label to entity index built from a Wikidata JSON dump.
+    Only the English labels and the properties of the enrichment scripts are kept, such that the index stays small.
+
+    Attributes
+    ----------
+    path : Path
+        The SQLite file of the index.
+
+    Methods
+    -------
+    build(dump_path)
+        Builds the index from a (bz2/gz) Wikidata JSON dump or a filtered extract of it.
+    lookup(labels, variables, required)
+        Returns the bindings of every label in the same format as the Wikidata client.
+    """
+
+    def __init__(self, path: Path = Path('data/.cache/wikidata_index.sqlite')) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        columns = ", ".join(f'{column} TEXT' for column in PROPERTIES.values())
+        self.connection.execute(f'CREATE TABLE IF NOT EXISTS entities (label TEXT, entity TEXT, {columns})')
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def build(self, dump_path: Path, batch_size: int = 10000) -> int:
+        """
+        Function that builds the index from a Wikidata JSON dump.
+        The dump is streamed, so it never has to fit in memory.
+
+        Parameters
+        ----------
+        dump_path : Path
+            The path to the dump, either a JSON array with one entity per line or JSON lines, optionally compressed.
+        batch_size : int
+            The number of entities that are inserted at once.
+
+        Returns
+        -------
+        int
+            The number of entities in the index.
+        """
+        self.connection.execute('DELETE FROM entities')
+        self.connection.execute('DROP INDEX IF EXISTS entities_label')
+
+        rows = []
+        count = 0
+        for entity in tqdm(self.read_dump(dump_path), desc='Indexing entities', unit=' entities'):
+            row = self.make_row(entity)
+            if row is None:
+                continue
+            rows.append(row)
+            if len(rows) >= batch_size:
+                count += self.insert(rows)
+                rows = []
+        count += self.insert(rows)
+
+        # The index on the labels is created after inserting, which is much faster than keeping it up to date
+        self.connection.execute('CREATE INDEX entities_label ON entities (label)')
+        self.connection.commit()
+
+        return count
+
+    def read_dump(self, dump_path: Path):
+        # Open the dump based on its compression
+        if dump_path.suffix == '.bz2':
+            file = bz2.open(dump_path, 'rt', encoding='utf-8')
+        elif dump_path.suffix == '.gz':
+            file = gzip.open(dump_path, 'rt', encoding='utf-8')
+        else:
+            file = open(dump_path, 'r', encoding='utf-8')
+
+        # Only parse the lines that mention one of the properties, most entities are skipped without parsing them
+        needles = [f'"{property_id}"' for property_id in PROPERTIES.keys()]
+        with file:
+            for line in file:
+                line = line.strip().rstrip(',')
+                if line in ['[', ']', ''] or not any(needle in line for needle in needles):
+                    continue
+                yield json.loads(line)
+
+    def make_row(self, entity: dict):
+        label = entity.get('labels', {}).get('en', {}).get('value')
+        if label is None:
+            return None
+
+        values = [self.get_value(entity.get('claims', {}).get(property_id, [])) for property_id in PROPERTIES.keys()]
+        if all(value is None for value in values):
+            return None
+
+        return (label, entity.get('id'), *values)
+
+    def get_value(self, claims: list):
+        # Prefer the claims with a preferred rank and skip the deprecated ones
+        claims = [claim for claim in claims if claim.get('rank') != 'deprecated']
+        claims.sort(key=lambda claim: claim.get('rank') != 'preferred')
+
+        for claim in claims:
+            value = claim.get('mainsnak', {}).get('datavalue', {}).get('value')
+            if isinstance(value, dict) and 'time' in value:
+                # Format the time like the SPARQL endpoint does, e.g. +1975-07-06T00:00:00Z -> 1975-07-06T00:00:00Z
+                return value['time'].lstrip('+')
+            if isinstance(value, dict) and 'amount' in value:
+                return value['amount'].lstrip('+')
+        return None
+
+    def insert(self, rows: list) -> int:
+        if rows:
+            self.connection.executemany(f'INSERT INTO entities VALUES ({", ".join("?" * (len(PROPERTIES) + 2))})', rows)
+        return len(rows)
+
+    def lookup(self, labels: list, variables: dict, required: list = []) -> dict:
+        """
+        Function for looking up the labels in the index.
+
+        Parameters
+        ----------
+        labels : list
+            The labels to be looked up.
+        variables : dict
+            The query variable for every property, e.g. {'birthdate': 'P569'}.
+        required : list
+            The variables an entity must have to be returned, like the non-optional patterns of a query.
+
+        Returns
+        -------
+        dict
+            The list of bindings for every label, in the same format as the Wikidata client.
+        """
+        labels = list(dict.fromkeys(label for label in labels if isinstance(label, str)))
+        results = {label: [] for label in labels}
+        columns = ['label', 'entity'] + [PROPERTIES[property_id] for property_id in variables.values()]
+
+        for i in range(0, len(labels), 500):
+            batch = labels[i:i + 500]
+            rows = self.connection.execute(f'SELECT {", ".join(columns)} FROM entities WHERE label IN ({", ".join("?" * len(batch))})', batch)
+            for label, entity, *values in rows:
+                binding = {'label': {'value': label}, 'entity': {'value': entity}}
+                binding.update({variable: {'value': value} for variable, value in zip(variables.keys(), values) if value is not None})
+                if all(variable in binding for variable in required):
+                    results[label].append(binding)
+
+        return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the offline enrichment index from a Wikidata JSON dump.')
+    parser.add_argument('dump', type=Path, help='The (bz2/gz) Wikidata JSON dump or a filtered extract of it.')
+    parser.add_argument('--index', type=Path, default=Path('data/.cache/wikidata_index.sqlite'), help='The index to be built.')
+    args = parser.parse_args()
+
+    index = WikidataIndex(args.index)
+    print(f'Indexed {index.build(args.dump)} entities in {args.index}.')
+    index.close()
@@ -0,0 +1,262 @@
+import numpy as np
+import pandas as pd
+from src.domainmodel.neo4j_object import Neo4jObject
+from src.domainmodel.neo4j_node import Node
+from src.neo4j_utils.schema_manager import describe
+
+
+def to_list(values: pd.Series) -> list:
+    # Replace the NaNs with nulls in one pass, the list holds plain Python values the driver can send
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def group_by_nulls(data: pd.DataFrame, columns: list):
+    """
+    Function that groups the rows of a table by the columns that are not null.
+    Properties that are null are left out of a merge, like Node.create() does, so every group gets its own query.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The table.
+    columns : list
+        The columns of which the nulls are checked.
+
+    Yields
+    ------
+    tuple
+        The columns that are not null and the rows of the group.
+    """
+    mask = data[columns].notna().to_numpy()
+    # Encode the pattern of every row as one number, such that the groups are found without a Python loop over the rows
+    codes = mask @ (1 << np.arange(len(columns), dtype=np.int64))
+    for code in np.unique(codes):
+        present = [column for i, column in enumerate(columns) if code >> i & 1]
+        yield present, data[codes == code]
+
+
+class NodeBatch():
+    """
+    A class used to create many nodes of one label from a table, without making a domain object per row.
+    The columns are sent as lists, one per property, so the parameters are built with a few vectorized operations.
+
+    Attributes
+    ----------
+    label : str
+        The label of the nodes.
+    keys : tuple
+        The natural keys of the label.
+    data : pd.DataFrame
+        The properties of the nodes, one column per property.
+
+    Methods
+    -------
+    create(batch_size)
+        Merges the nodes and registers their element IDs.
+    partition(workers)
+        Splits the batch into batches of which the natural keys do not overlap.
+    """
+
+    def __init__(self, domain_class, data: pd.DataFrame, columns: dict = None) -> None:
+        self.domain_class = domain_class
+        self.label, self.keys = describe(domain_class)
+        self.data = data.rename(columns=columns)[list(columns.values())] if columns else data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __str__(self):
+        return f'NodeBatch(label={self.label}, rows={len(self.data)}, properties={list(self.data.columns)})'
+
+    def slice(self, start: int, stop: int):
+        return self._with_data(self.data.iloc[start:stop])
+
+    def partition(self, workers: int) -> list:
+        # Rows with the same natural keys always end up in the same partition
+        codes = pd.util.hash_pandas_object(self.data[list(self.keys)].astype('string'), index=False).to_numpy() % workers
+        return [self._with_data(self.data[codes == i]) for i in range(workers) if (codes == i).any()]
+
+    def _with_data(self, data: pd.DataFrame):
+        batch = NodeBatch.__new__(NodeBatch)
+        batch.__dict__.update({**self.__dict__, 'data': data})
+        return batch
+
+    def get_parameters(self):
+        """
+        Function for getting the query parameters of the batch.
+
+        Yields
+        ------
+        tuple
+            The properties that are set and a dict with the list of values of every property.
+        """
+        for properties, group in group_by_nulls(self.data, list(self.data.columns)):
+            if properties:
+                yield properties, {prop: to_list(group[prop]) for prop in properties}
+
+    def create(self, batch_size: int = 1000) -> int:
+        """
+        Function that merges the nodes on their natural keys and sets their other properties, like Node.create_many().
+
+        Parameters
+        ----------
+        batch_size : int
+            The number of nodes per query.
+
+        Returns
+        -------
+        int
+            The number of merged nodes.
+        """
+        count = 0
+        for properties, parameters in self.get_parameters():
+            keys = [prop for prop in properties if prop in self.keys] or properties
+            keys_string = ", ".join(f"{prop}: ${prop}[i]" for prop in keys)
+            others = [prop for prop in properties if prop not in keys]
+            set_string = " SET " + ", ".join(f"n.{prop} = ${prop}[i]" for prop in others) if others else ""
+            query = f"UNWIND range(0, $row_count - 1) AS i MERGE (n:{self.label} {{{keys_string}}}){set_string} " \
+                    f"RETURN i, elementId(n) AS element_id"
+            size = len(parameters[properties[0]])
+            for start in range(0, size, batch_size):
+                chunk = {prop: values[start:start + batch_size] for prop, values in parameters.items()}
+                result = Neo4jObject.execute_query(query, {**chunk, 'row_count': len(chunk[properties[0]])})
+                # The keys of every returned row are taken from the parameters, such that the nodes themselves are not sent back
+                for record in result:
+                    values = (chunk[key][record['i']] if key in chunk else None for key in self.keys)
+                    Node.registry.register_values(self.label, values, record['element_id'])
+                count += len(result)
+        return count
+
+
+class RelationBatch():
+    """
+    A class used to create many relations of one type from a table, without making domain objects per row.
+    The endpoints that are in the node registry are addressed by element ID, the others are matched on the columns of their keys
+    that are not null, like Relation.create_many().
+
+    Attributes
+    ----------
+    label : str
+        The type of the relations.
+    subject_label, object_label : str
+        The labels of the start and end nodes.
+    data : pd.DataFrame
+        The keys of the start nodes (prefixed with a_), of the end nodes (prefixed with b_) and the properties.
+    skipped : int
+        The number of rows of the last create of which an endpoint has no element ID and no key that is set.
+
+    Methods
+    -------
+    create(batch_size)
+        Merges the relations.
+    partition(workers, by)
+        Splits the batch into batches of which the start or end nodes do not overlap.
+    """
+
+    def __init__(self, domain_class, data: pd.DataFrame, subject_class, subject_columns: dict,
+                 object_class, object_columns: dict, columns: dict = None) -> None:
+        columns = columns or {}
+        self.domain_class = domain_class
+        self.label = describe(domain_class)[0]
+        self.subject_label, self.subject_keys = describe(subject_class)
+        self.object_label, self.object_keys = describe(object_class)
+        self.data = pd.DataFrame({
+            **{f'a_{prop}': data[column] for column, prop in subject_columns.items()},
+            **{f'b_{prop}': data[column] for column, prop in object_columns.items()},
+            **{prop: data[column] for column, prop in columns.items()},
+        }, index=data.index)
+        self.properties = list(columns.values())
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __str__(self):
+        return f'RelationBatch(label={self.label}, rows={len(self.data)}, subject={self.subject_label}, object={self.object_label})'
+
+    def slice(self, start: int, stop: int):
+        return self._with_data(self.data.iloc[start:stop])
+
+    def partition(self, workers: int, by: str = 'object') -> list:
+        # Rows with the same start or end node always end up in the same partition
+        prefix = 'a_' if by == 'subject' else 'b_'
+        columns = [column for column in self.data.columns if column.startswith(prefix)]
+        codes = pd.util.hash_pandas_object(self.data[columns].astype('string'), index=False).to_numpy() % workers
+        return [self._with_data(self.data[codes == i]) for i in range(workers) if (codes == i).any()]
+
+    def _with_data(self, data: pd.DataFrame):
+        batch = RelationBatch.__new__(RelationBatch)
+        batch.__dict__.update({**self.__dict__, 'data': data})
+        return batch
+
+    def resolve(self, alias: str, label: str, keys: tuple) -> pd.Series:
+        # Only endpoints of which all the natural keys are known can be found in the registry
+        columns = [f'{alias}_{key}' for key in keys]
+        if not all(column in self.data.columns for column in columns):
+            return pd.Series(None, index=self.data.index, dtype=object)
+        rows = zip(*(to_list(self.data[column]) for column in columns))
+        element_ids = [Node.registry.get_values(label, row) for row in rows]
+        return pd.Series(element_ids, index=self.data.index, dtype=object)
+
+    def get_parameters(self):
+        """
+        Function for getting the query parameters of the batch.
+
+        Yields
+        ------
+        tuple
+            The columns that are used and a dict with the list of values of every column.
+        """
+        data = self.data.assign(a_element_id=self.resolve('a', self.subject_label, self.subject_keys),
+                                b_element_id=self.resolve('b', self.object_label, self.object_keys))
+        # Endpoints with an element ID are not matched on their keys
+        for alias in ['a', 'b']:
+            keys = [column for column in self.data.columns if column.startswith(f'{alias}_')]
+            data.loc[data[f'{alias}_element_id'].notna(), keys] = None
+
+        self.skipped = 0
+        for columns, group in group_by_nulls(data, list(data.columns)):
+            # Rows of which an endpoint has neither an element ID nor a key cannot be matched, they are counted instead
+            if not all(any(column.startswith(f'{alias}_') for column in columns) for alias in ['a', 'b']):
+                self.skipped += len(group)
+                continue
+            yield columns, {column: to_list(group[column]) for column in columns}
+
+    def make_match_string(self, alias: str, columns: list) -> str:
+        if f'{alias}_element_id' in columns:
+            return f"elementId({alias}) = ${alias}_element_id[i]"
+        return " AND ".join(f"{alias}.{column[2:]} = ${column}[i]" for column in columns if column.startswith(f'{alias}_'))
+
+    def create(self, batch_size: int = 1000) -> int:
+        """
+        Function that merges the relations between the matched nodes, like Relation.create_many().
+
+        Parameters
+        ----------
+        batch_size : int
+            The number of relations per query.
+
+        Returns
+        -------
+        int
+            The number of merged relations.
+        """
+        count = 0
+        for columns, parameters in self.get_parameters():
+            properties_string = ", ".join(f"{prop}: ${prop}[i]" for prop in self.properties if prop in columns)
+            query = f"UNWIND range(0, $row_count - 1) AS i " \
+                    f"MATCH (a:{self.subject_label}) " \
+                    f"WHERE {self.make_match_string('a', columns)} " \
+                    f"WITH a, i " \
+                    f"MATCH (b:{self.object_label}) " \
+                    f"WHERE {self.make_match_string('b', columns)} " \
+                    f"MERGE (a)-[r:{self.label} {{{properties_string}}}]->(b) " \
+                    f"RETURN count(r) AS count"
+            size = len(parameters[columns[0]])
+            for start in range(0, size, batch_size):
+                chunk = {column: values[start:start + batch_size] for column, values in parameters.items()}
+                result = Neo4jObject.execute_query(query, {**chunk, 'row_count': len(chunk[columns[0]])})
+                count += result[0]['count'] if result else 0
+        if self.skipped:
+            print(f'Skipped {self.skipped} {self.label} rows of which an endpoint has no key that is set.')
+        return count
@@ -1,10 +1,15 @@
 from dataclasses import dataclass, asdict
+import inspect
 from src.domainmodel.neo4j_object import Neo4jObject
+from src.domainmodel.node_registry import NodeRegistry
 import math
 
 @dataclass
 class Node(Neo4jObject):
 
+    # The element IDs of the created and read nodes, shared by all the node classes
+    registry = NodeRegistry()
+
     def __init__(self):
         self._fill_null()
 
@@ -17,20 +22,38 @@ class Node(Neo4jObject):
         parameters = {key: value for key, value in keys.items()}
         return keys_string, parameters
 
-    def create(self):
+    def get_properties(self):
         properties = asdict(self)
-        properties = {k: v for k, v in properties.items() if v is not None}
-        properties_string = ", ".join(f"{key}: ${key}" for key in properties.keys())
-        query = f"MERGE (n:{self.label} {{{properties_string}}}) RETURN n"
-        result = self.execute_query(query, properties)
+        return {k: v for k, v in properties.items() if v is not None}
+
+    def known_keys(self) -> dict:
+        # A key that is null never matches, so e.g. an actor of which only the name is known is matched on the name
+        return {key: value for key, value in self.natural_keys().items()
+                if value is not None and not (isinstance(value, float) and math.isnan(value))}
+
+    def create(self):
+        # Merge on the natural keys that are known, such that the constraint's index is used, and set the other properties
+        properties = self.get_properties()
+        keys = self.known_keys() or properties
+        keys_string = ", ".join(f"{key}: ${key}" for key in keys.keys())
+        query = f"MERGE (n:{self.label} {{{keys_string}}}) SET n += $properties RETURN n"
+        result = self.execute_query(query, {**keys, 'properties': properties})
+        if result:
+            self._register(result[0])
         return result[0] if result else None
     
     def read(self):
         keys_string, parameters = self._generate_key_string_and_params()
         query = f"MATCH (n:{self.label}) WHERE {keys_string} RETURN n"
-        result = self.execute_query(query, parameters)
+        result = self.execute_read(query, parameters)
+        if result:
+            self._register(result[0])
         return result[0] if result else None
 
+    def _register(self, record):
+        self.id = record['n'].element_id
+        Node.registry.register(self, self.id)
+
     def update(self):
         properties = asdict(self)
         properties = {k: v for k, v in properties.items() if v is not None}
@@ -45,6 +68,7 @@ class Node(Neo4jObject):
         keys_string, parameters = self._generate_key_string_and_params()
         query = f"MATCH (n:{self.label}) WHERE {keys_string} DELETE n"
         result = self.execute_query(query, parameters)
+        Node.registry.forget(self)
         return result[0] if result else None   
      
     def create_index_if_not_exists(self):
@@ -53,6 +77,96 @@ class Node(Neo4jObject):
         result = self.execute_query(query)
         return result[0] if result else None   
 
+    @classmethod
+    def create_many(cls, nodes, batch_size: int = 1000):
+        """
+        Creates many nodes with one UNWIND query per batch instead of one query per node.
+        The nodes are grouped by label and property keys, and merged on their natural keys like create().
+        The element IDs of the created nodes are registered, such that relations can refer to them.
+        """
+        results = []
+        groups = {}
+        key_names = {}
+        for node in nodes:
+            properties = node.get_properties()
+            key_names.setdefault(node.label, tuple(node.natural_keys().keys()))
+            group = groups.setdefault((node.label, tuple(properties.keys())), [])
+            group.append(properties)
+            if len(group) >= batch_size:
+                results.extend(cls._create_batch(node.label, group, key_names[node.label]))
+                groups[(node.label, tuple(properties.keys()))] = []
+
+        for (label, _), group in groups.items():
+            if group:
+                results.extend(cls._create_batch(label, group, key_names[label]))
+        return results
+
+    @classmethod
+    def _create_batch(cls, label: str, rows: list, key_names: tuple = ()):
+        keys = [key for key in key_names if key in rows[0]] or list(rows[0].keys())
+        keys_string = ", ".join(f"{key}: row.{key}" for key in keys)
+        query = f"UNWIND $rows AS row MERGE (n:{label} {{{keys_string}}}) SET n += row RETURN n"
+        result = cls.execute_query(query, {'rows': rows})
+        # The records are not guaranteed to be in the order of the rows, so they are registered by their properties
+        for record in result:
+            Node.registry.register_properties(label, key_names, record['n'], record['n'].element_id)
+        return result
+
+    @classmethod
+    def find(cls, filters: dict = None, batch_size: int = 1000):
+        """
+        Finds the nodes of this class page by page, ordered by their natural keys.
+        Every page starts after the last node of the previous page (keyset pagination), so only one page is in memory
+        at a time and no page skips or repeats nodes, e.g. to export the graph or to compare it with the cleaned tables.
+        The element ID breaks ties between nodes with the same keys, e.g. when a key is null.
+        The cursor predicate has to handle null keys, so it cannot use the key index: every page scans and sorts the
+        nodes of the label that match the filters. A large batch size keeps the number of scans low.
+
+        Parameters
+        ----------
+        filters : dict
+            The values the properties must be equal to.
+        batch_size : int
+            The number of nodes per page.
+
+        Yields
+        ------
+        Node
+            The nodes as objects of this class.
+        """
+        # The schema manager imports the node classes, so its helper is imported when it is used
+        from src.neo4j_utils.schema_manager import describe
+        label, keys = describe(cls)
+        filters = filters or {}
+        parameter_names = list(inspect.signature(cls.__init__).parameters)[1:]
+
+        filters_string = " AND ".join(f"n.{key} = $f_{key}" for key in filters.keys()) or "true"
+        order_string = ", ".join([f"n.{key}" for key in keys] + ["element_id"])
+
+        # The nodes after the cursor, nulls are ordered after all the other values like in ORDER BY
+        equal = [f"(n.{key} = $c_{key} OR (n.{key} IS NULL AND $c_{key} IS NULL))" for key in keys]
+        greater = [f"(n.{key} > $c_{key} OR (n.{key} IS NULL AND $c_{key} IS NOT NULL))" for key in keys]
+        greater.append("elementId(n) > $c_element_id")
+        cursor_string = " OR ".join("(" + " AND ".join(equal[:i] + [greater[i]]) + ")" for i in range(len(greater)))
+
+        parameters = {f"f_{key}": value for key, value in filters.items()}
+        cursor = None
+        while True:
+            query = f"MATCH (n:{label}) WHERE {filters_string} " \
+                    f"{'AND (' + cursor_string + ') ' if cursor else ''}" \
+                    f"WITH n, elementId(n) AS element_id ORDER BY {order_string} LIMIT $batch_size " \
+                    f"RETURN n, element_id"
+            result = cls.execute_read(query, {**parameters, **(cursor or {}), 'batch_size': batch_size})
+            for record in result:
+                node = cls(*[record['n'].get(name) for name in parameter_names])
+                node.id = record['element_id']
+                Node.registry.register(node, node.id)
+                yield node
+            if len(result) < batch_size:
+                return
+            last = result[-1]
+            cursor = {**{f"c_{key}": last['n'].get(key) for key in keys}, 'c_element_id': last['element_id']}
+
     def _fill_null(self):
         for key, value in asdict(self).items():
             # check if dtype is float
@@ -60,6 +60,10 @@ class Neo4jObject(ABC):
     @staticmethod
     def execute_query(query, parameters={}):
         return Neo4jObject.neo4j_client.execute_query(query, parameters)
+
+    @staticmethod
+    def execute_read(query, parameters={}):
+        return Neo4jObject.neo4j_client.execute_read(query, parameters)
     
     @abstractmethod
     def create_index_if_not_exists(self):
@@ -19,16 +19,28 @@ class Relation(Neo4jObject):
         return properties
     
     def _generate_key_string_and_params(self, node: Node, alias: str):
-        keys = node.natural_keys()
+        keys = node.known_keys()
         keys_string = " AND ".join(f"{alias}.{key} = ${alias + '_' + key}" for key in keys.keys())
         parameters = {alias + '_' + key: value for key, value in keys.items()}
         return keys_string, parameters
+
+    def _generate_endpoint_string_and_params(self, node: Node, alias: str):
+        # Address the node by its element ID if it was created or read before, otherwise match it on its natural keys
+        element_id = Node.registry.get(node)
+        if element_id is None:
+            return self._generate_key_string_and_params(node, alias)
+        return f"elementId({alias}) = ${alias}_element_id", {f"{alias}_element_id": element_id}
+
+    @staticmethod
+    def _get_endpoint_keys(node: Node) -> dict:
+        element_id = Node.registry.get(node)
+        return node.known_keys() if element_id is None else {'element_id': element_id}
     
     def create(self):
         properties = self.get_properties()
         properties_string = ", ".join(f"{key}: ${key}" for key in properties.keys())
-        subject_keys_string, subject_parameters = self._generate_key_string_and_params(self.subject, 'a')
-        object_keys_string, object_parameters = self._generate_key_string_and_params(self.object, 'b')
+        subject_keys_string, subject_parameters = self._generate_endpoint_string_and_params(self.subject, 'a')
+        object_keys_string, object_parameters = self._generate_endpoint_string_and_params(self.object, 'b')
         query = f"MATCH (a:{self.subject.label}) " \
                 f"WHERE {subject_keys_string} " \
                 f"WITH a " \
@@ -40,13 +52,63 @@ class Relation(Neo4jObject):
         result = self.execute_query(query, parameters)
         return result[0] if result else None
 
+    @classmethod
+    def create_many(cls, relations, batch_size: int = 1000):
+        """
+        Creates many relations with one UNWIND query per batch instead of one query per relation.
+        The relations are grouped by label, endpoint labels and keys, and property keys.
+        The endpoints are addressed by element ID if they are registered, and matched on their natural keys that are set otherwise.
+        """
+        results = []
+        groups = {}
+        for relation in relations:
+            properties = relation.get_properties()
+            subject_keys = cls._get_endpoint_keys(relation.subject)
+            object_keys = cls._get_endpoint_keys(relation.object)
+            group_key = (relation.label, relation.subject.label, tuple(subject_keys.keys()),
+                         relation.object.label, tuple(object_keys.keys()), tuple(properties.keys()))
+            group = groups.setdefault(group_key, [])
+            group.append({**{'a_' + key: value for key, value in subject_keys.items()},
+                          **{'b_' + key: value for key, value in object_keys.items()},
+                          **properties})
+            if len(group) >= batch_size:
+                results.extend(cls._create_batch(group_key, group))
+                groups[group_key] = []
+
+        for group_key, group in groups.items():
+            if group:
+                results.extend(cls._create_batch(group_key, group))
+        return results
+
+    @classmethod
+    def _create_batch(cls, group_key: tuple, rows: list):
+        label, subject_label, subject_keys, object_label, object_keys, property_keys = group_key
+        subject_keys_string = cls._generate_row_key_string(subject_keys, 'a')
+        object_keys_string = cls._generate_row_key_string(object_keys, 'b')
+        properties_string = ", ".join(f"{key}: row.{key}" for key in property_keys)
+        query = f"UNWIND $rows AS row " \
+                f"MATCH (a:{subject_label}) " \
+                f"WHERE {subject_keys_string} " \
+                f"WITH a, row " \
+                f"MATCH (b:{object_label}) " \
+                f"WHERE {object_keys_string} " \
+                f"MERGE (a)-[r:{label} {{{properties_string}}}]->(b) " \
+                f"RETURN r"
+        return cls.execute_query(query, {'rows': rows})
+
+    @staticmethod
+    def _generate_row_key_string(keys: tuple, alias: str) -> str:
+        if keys == ('element_id',):
+            return f"elementId({alias}) = row.{alias}_element_id"
+        return " AND ".join(f"{alias}.{key} = row.{alias}_{key}" for key in keys)
+
     def read(self):
         subject_keys_string, subject_parameters = self._generate_key_string_and_params(self.subject, 'a')
         object_keys_string, object_parameters = self._generate_key_string_and_params(self.object, 'b')
         query = f"MATCH (a:{self.subject.label})-[r:{self.label}]->(b:{self.object.label}) " \
                 f"WHERE {subject_keys_string} AND {object_keys_string} RETURN r"
         parameters = {**subject_parameters, **object_parameters}
-        result = self.execute_query(query, parameters)
+        result = self.execute_read(query, parameters)
         return result[0] if result else None
 
     def update(self):
@@ -0,0 +1,56 @@
+class NodeRegistry():
+    """
+    A class used to remember the element IDs of the nodes that were created or read in this process.
+    The nodes are registered by their label and natural keys, such that a relation can address its endpoints
+    by element ID instead of matching them on their properties again.
+
+    Methods
+    -------
+    register(node, element_id)
+        Records the element ID of a node.
+    register_properties(label, key_names, properties, element_id)
+        Records the element ID of a node of which only the label and the properties are known, e.g. a returned record.
+    register_values(label, values, element_id)
+        Records the element ID of a node of which only the label and the values of the natural keys are known.
+    get(node)
+        Returns the element ID of a node, or None if it is not registered.
+    get_values(label, values)
+        Returns the element ID of a node by its label and the values of its natural keys.
+    forget(node)
+        Removes a node from the registry, e.g. after it was deleted.
+    clear()
+        Removes all the nodes from the registry, e.g. after the database was emptied.
+    """
+
+    def __init__(self) -> None:
+        # Reading and writing a single dict entry is atomic, so the loader's threads can share the registry
+        self.element_ids = {}
+
+    def __len__(self):
+        return len(self.element_ids)
+
+    def make_key(self, label: str, values) -> tuple:
+        return (label, tuple(values))
+
+    def register(self, node, element_id: str) -> None:
+        if element_id is not None:
+            self.register_values(node.label, node.natural_keys().values(), element_id)
+
+    def register_properties(self, label: str, key_names, properties, element_id: str) -> None:
+        # Keys that are not set on the node are null, like on the domain object
+        self.register_values(label, (properties.get(key) for key in key_names), element_id)
+
+    def register_values(self, label: str, values, element_id: str) -> None:
+        self.element_ids[self.make_key(label, values)] = element_id
+
+    def get(self, node):
+        return self.get_values(node.label, node.natural_keys().values())
+
+    def get_values(self, label: str, values):
+        return self.element_ids.get(self.make_key(label, values))
+
+    def forget(self, node) -> None:
+        self.element_ids.pop(self.make_key(node.label, node.natural_keys().values()), None)
+
+    def clear(self) -> None:
+        self.element_ids.clear()
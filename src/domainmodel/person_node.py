@@ -4,8 +4,8 @@ from src.domainmodel.neo4j_node import Node
 @dataclass
 class Person(Node):
     name: str
-    dob: int
-    dod: int
+    date_of_birth: int
+    date_of_death: int
     start_year: int
     end_year: int
 
@@ -17,6 +17,7 @@ class Person(Node):
         self.date_of_death = date_of_death
         self.start_year = start_year
         self.end_year = end_year
+        super().__init__()
 
     def natural_keys(self) -> dict:
         return {'name': self.name, 'date_of_birth': self.date_of_birth}
\ No newline at end of file
@@ -0,0 +1,84 @@
+import pandas as pd
+from src.benchmarks.stand_in_client import StandInNeo4jClient
+from src.domainmodel.neo4j_object import Neo4jObject
+from src.domainmodel.neo4j_node import Node
+from src.domainmodel.neo4j_batch import NodeBatch, RelationBatch
+from src.domainmodel.person_node import Person
+from src.domainmodel.movie_node import Movie
+from src.domainmodel.genre_node import Genre
+from src.domainmodel.hasGenre_relation import HasGenreRelation
+from src.domainmodel.neo4j_relation import Relation
+
+
+class RecordingClient(StandInNeo4jClient):
+    # Keeps the queries and parameters that were sent
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent = []
+
+    def execute_write(self, query, parameters={}):
+        self.sent.append((query, parameters))
+        return super().execute_write(query, parameters)
+
+
+def use_client(monkeypatch) -> RecordingClient:
+    client = RecordingClient()
+    monkeypatch.setattr(Neo4jObject, 'neo4j_client', client)
+    monkeypatch.setattr(Node, 'registry', type(Node.registry)())
+    return client
+
+
+def test_create_merges_on_the_known_keys_and_sets_the_rest(monkeypatch):
+    client = use_client(monkeypatch)
+    Person('Tom Hanks', 1956, None, 1980, None).create()
+    Person('Meg Ryan', None, None, None, None).create()
+
+    assert client.sent[0] == ("MERGE (n:Person {name: $name, date_of_birth: $date_of_birth}) SET n += $properties RETURN n",
+                              {'name': 'Tom Hanks', 'date_of_birth': 1956,
+                               'properties': {'name': 'Tom Hanks', 'date_of_birth': 1956, 'start_year': 1980}})
+    assert client.sent[1][0] == "MERGE (n:Person {name: $name}) SET n += $properties RETURN n"
+
+
+def test_create_many_and_batches_merge_on_the_natural_keys(monkeypatch):
+    client = use_client(monkeypatch)
+    Node.create_many([Person('Tom Hanks', 1956, 2030, None, None)])
+    assert client.sent[0][0] == "UNWIND $rows AS row MERGE (n:Person {name: row.name, date_of_birth: row.date_of_birth}) " \
+                                "SET n += row RETURN n"
+
+    data = pd.DataFrame({'name': ['Tom Hanks', 'Meg Ryan'], 'date_of_birth': [1956, None], 'start_year': [1980, 1981]})
+    assert NodeBatch(Person, data).create() == 2
+    assert sorted(query for query, _ in client.sent[1:]) == [
+        "UNWIND range(0, $row_count - 1) AS i MERGE (n:Person {name: $name[i], date_of_birth: $date_of_birth[i]}) "
+        "SET n.start_year = $start_year[i] RETURN i, elementId(n) AS element_id",
+        "UNWIND range(0, $row_count - 1) AS i MERGE (n:Person {name: $name[i]}) "
+        "SET n.start_year = $start_year[i] RETURN i, elementId(n) AS element_id"]
+
+
+def test_missing_person_dates_are_null_keys(monkeypatch):
+    client = use_client(monkeypatch)
+    person = Person('Meg Ryan', float('nan'), float('nan'), 1981.0, None)
+    assert (person.date_of_birth, person.date_of_death) == (None, None)
+
+    # A NaN never equals itself in Cypher, so merging on it would create the person again on every load
+    Node.create_many([person])
+    assert client.sent[0][0] == "UNWIND $rows AS row MERGE (n:Person {name: row.name}) SET n += row RETURN n"
+
+
+def test_relation_batches_match_on_the_keys_that_are_set_like_create_many(monkeypatch):
+    client = use_client(monkeypatch)
+    Relation.create_many([HasGenreRelation(Movie('Up', None, None, None), Genre('Animation'))])
+
+    data = pd.DataFrame({'title': ['Heat', 'Up', None], 'year': [1995, None, 2000], 'genre': ['Crime', 'Animation', 'Drama']})
+    batch = RelationBatch(HasGenreRelation, data, Movie, {'title': 'title', 'year': 'year'}, Genre, {'genre': 'genre'})
+    assert batch.create() == 3
+
+    # A movie without a year is matched on its title by both paths
+    assert "WHERE a.title = row.a_title WITH" in client.sent[0][0]
+    assert any("WHERE a.title = $a_title[i] WITH" in query for query, _ in client.sent[1:])
+    assert batch.skipped == 0
+
+    # Only an endpoint without any key that is set can not be matched
+    data = pd.DataFrame({'title': ['Heat', None], 'year': [1995, None], 'genre': ['Crime', 'Drama']})
+    batch = RelationBatch(HasGenreRelation, data, Movie, {'title': 'title', 'year': 'year'}, Genre, {'genre': 'genre'})
+    assert batch.create() == 1
+    assert batch.skipped == 1
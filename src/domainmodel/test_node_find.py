@@ -0,0 +1,47 @@
+from src.benchmarks.stand_in_client import StandInNeo4jClient, StandInNode, StandInRecord
+from src.domainmodel.neo4j_object import Neo4jObject
+from src.domainmodel.neo4j_node import Node
+from src.domainmodel.person_node import Person
+
+
+class PagingClient(StandInNeo4jClient):
+    """
+    Answers the pages of Node.find like the database would: ordered by the keys with the nulls last and then by
+    element ID, and starting after the cursor.
+    """
+
+    def __init__(self, nodes: list) -> None:
+        super().__init__()
+        self.nodes = [StandInNode(properties, f'4:node:{i}') for i, properties in enumerate(nodes)]
+        self.cursors = []
+
+    def order(self, node) -> tuple:
+        return (*[(node.get(key) is None, node.get(key) or 0) for key in ['name', 'date_of_birth']], node.element_id)
+
+    def execute_read(self, query, parameters={}):
+        self.queries += 1
+        nodes = sorted(self.nodes, key=self.order)
+        if 'c_element_id' in parameters:
+            assert '$c_date_of_birth IS NULL' in query
+            self.cursors.append({key: value for key, value in parameters.items() if key.startswith('c_')})
+            cursor = self.order(StandInNode({'name': parameters['c_name'], 'date_of_birth': parameters['c_date_of_birth']},
+                                            parameters['c_element_id']))
+            nodes = [node for node in nodes if self.order(node) > cursor]
+        return [StandInRecord(n=node, element_id=node.element_id) for node in nodes[:parameters['batch_size']]]
+
+
+def test_find_pages_through_nodes_with_null_keys(monkeypatch):
+    persons = [{'name': 'Tom Hanks', 'date_of_birth': 1956}, {'name': 'Meg Ryan'}, {'name': 'Tom Hanks'},
+               {'name': 'Meg Ryan', 'date_of_birth': 1961}, {'name': 'Meg Ryan'}]
+    client = PagingClient(persons)
+    monkeypatch.setattr(Neo4jObject, 'neo4j_client', client)
+    monkeypatch.setattr(Node, 'registry', type(Node.registry)())
+
+    found = [(person.name, person.date_of_birth, person.id) for person in Person.find(batch_size=2)]
+
+    # Every node is found once, even the nodes of which a key is null and the nodes with the same keys
+    assert found == [('Meg Ryan', 1961, '4:node:3'), ('Meg Ryan', None, '4:node:1'), ('Meg Ryan', None, '4:node:4'),
+                     ('Tom Hanks', 1956, '4:node:0'), ('Tom Hanks', None, '4:node:2')]
+    # The cursor after a node without a date of birth is a null, not a missing key
+    assert {'c_name': 'Meg Ryan', 'c_date_of_birth': None, 'c_element_id': '4:node:1'} in client.cursors
+    assert client.queries == 3
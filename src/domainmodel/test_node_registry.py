@@ -0,0 +1,25 @@
+from src.domainmodel.node_registry import NodeRegistry
+from src.domainmodel.person_node import Person
+from src.domainmodel.movie_node import Movie
+
+
+def test_registry_finds_nodes_by_their_label_and_natural_keys():
+    registry = NodeRegistry()
+    tom = Person('Tom Hanks', 1956, None, None, None)
+    registry.register(tom, 'person-1')
+    registry.register(Movie('Big', 1988, None, None), 'movie-1')
+    # A returned record without a date of birth is registered with a null key, like the domain object
+    registry.register_properties('Person', ('name', 'date_of_birth'), {'name': 'Meg Ryan', 'rating': 7}, 'person-2')
+
+    assert registry.get(Person('Tom Hanks', 1956, 2020, None, None)) == 'person-1'
+    assert registry.get(Person('Tom Hanks', 1957, None, None, None)) is None
+    assert registry.get_values('Movie', ['Big', 1988]) == 'movie-1'
+    assert registry.get_values('Person', ['Meg Ryan', None]) == 'person-2'
+    # Nodes without an element ID are not registered
+    registry.register(Person('Bill Murray', 1950, None, None, None), None)
+    assert len(registry) == 3
+
+    registry.forget(tom)
+    assert registry.get(tom) is None and len(registry) == 2
+    registry.clear()
+    assert len(registry) == 0
@@ -0,0 +1,35 @@
+from neo4j import AsyncGraphDatabase, READ_ACCESS
+from decouple import config
+from src.neo4j_utils.neo4jclient import get_connection_settings
+
+
+class AsyncNeo4jClient:
+    """
+    A class used to read from the graph database with the async driver.
+    The records of a query are streamed as they arrive, instead of being loaded into a list first.
+    The driver is bound to the event loop it is first used in, so every serving process makes its own client.
+
+    Methods
+    -------
+    stream(query, parameters)
+        Yields the records of a read query as they arrive.
+    close()
+        Closes the connections of the driver.
+    """
+
+    def __init__(self, max_connection_pool_size: int = None, fetch_size: int = None):
+        url, auth = get_connection_settings()
+        self.max_connection_pool_size = max_connection_pool_size or config('NEO4J_MAX_POOL_SIZE', default=50, cast=int)
+        # The fetch size bounds the number of records that are buffered per request
+        self.fetch_size = fetch_size or config('NEO4J_FETCH_SIZE', default=1000, cast=int)
+        self.driver = AsyncGraphDatabase.driver(url, auth=auth, max_connection_pool_size=self.max_connection_pool_size)
+
+    async def close(self):
+        await self.driver.close()
+
+    async def stream(self, query, parameters={}):
+        # An auto-commit transaction is used, because a managed transaction must be consumed before it returns
+        async with self.driver.session(fetch_size=self.fetch_size, default_access_mode=READ_ACCESS) as session:
+            result = await session.run(query, parameters)
+            async for record in result:
+                yield record
@@ -1,29 +1,72 @@
-from neo4j import GraphDatabase
+import threading
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS
 from decouple import config
 
+def get_connection_settings():
+    uri = '34.90.237.2'
+    port = '7687'
+    user = 'neo4j'
+    password = '^ZC!Ft&:-:::bg5'
+    return f"bolt://{uri}:{port}", (user, password)
+
 class Neo4jClient:
     _instance = None
+    _lock = threading.Lock()
 
     @staticmethod
     def getInstance():
+        # Check the instance twice, such that only the first call has to wait for the lock
         if Neo4jClient._instance == None:
-            Neo4jClient()
+            with Neo4jClient._lock:
+                if Neo4jClient._instance == None:
+                    Neo4jClient()
         return Neo4jClient._instance
 
-    def __init__(self):
+    def __init__(self, max_connection_pool_size: int = None, fetch_size: int = None, max_transaction_retry_time: float = None):
         if Neo4jClient._instance != None:
             raise Exception("This class is a singleton!")
         else:
-            uri = '34.90.237.2'
-            port = '7687'
-            user = 'neo4j'
-            password = '^ZC!Ft&:-:::bg5'
-            self.driver = GraphDatabase.driver(f"bolt://{uri}:{port}", auth=(user, password))
+            url, auth = get_connection_settings()
+            # The pool is shared by all threads, every session borrows a connection from it
+            self.max_connection_pool_size = max_connection_pool_size or config('NEO4J_MAX_POOL_SIZE', default=50, cast=int)
+            self.fetch_size = fetch_size or config('NEO4J_FETCH_SIZE', default=1000, cast=int)
+            self.max_transaction_retry_time = max_transaction_retry_time or config('NEO4J_MAX_RETRY_TIME', default=30.0, cast=float)
+            self.driver = GraphDatabase.driver(url, auth=auth,
+                                               max_connection_pool_size=self.max_connection_pool_size,
+                                               max_transaction_retry_time=self.max_transaction_retry_time)
             Neo4jClient._instance = self
 
     def close(self):
-        self.driver.close()
+        with Neo4jClient._lock:
+            self.driver.close()
+            if Neo4jClient._instance is self:
+                Neo4jClient._instance = None
+
+    def session(self):
+        # Sessions are not thread-safe, so every call opens its own session on the shared pool
+        return self.driver.session(fetch_size=self.fetch_size)
+
+    def execute_query(self, query, parameters={}, access_mode: str = WRITE_ACCESS):
+        # Reads can be routed to the followers of a cluster, only writes have to go to the leader
+        if access_mode == READ_ACCESS:
+            return self.execute_read(query, parameters)
+        return self.execute_write(query, parameters)
+
+    def execute_write(self, query, parameters={}):
+        # Managed transactions are retried by the driver on transient errors
+        with self.session() as session:
+            return session.execute_write(lambda tx: list(tx.run(query, parameters)))
+
+    def execute_read(self, query, parameters={}):
+        with self.session() as session:
+            return session.execute_read(lambda tx: list(tx.run(query, parameters)))
+
+    def execute_many(self, query, param_batches):
+        # The batches are kept in a list, such that a retried transaction sends them again
+        param_batches = list(param_batches)
+
+        def run_batches(tx):
+            return [list(tx.run(query, parameters)) for parameters in param_batches]
 
-    def execute_query(self, query, parameters={}):
-        with self.driver.session() as session:
-            return list(session.run(query, parameters))
\ No newline at end of file
+        with self.session() as session:
+            return session.execute_write(run_batches)
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+import json
+import threading
+import time
+
+
+class QueryCache():
+    """
+    A class used to cache the results of read queries in memory.
+    The least recently used results are evicted when the number of entries or their total size is too large,
+    and results expire after a fixed time, such that changes in the graph show up eventually.
+
+    Attributes
+    ----------
+    max_entries : int
+        The maximum number of cached results.
+    max_bytes : int
+        The maximum total size of the cached results, measured as JSON.
+    ttl : float
+        The number of seconds a result stays valid.
+
+    Methods
+    -------
+    get_or_load(key, load)
+        Returns the cached result of a key, or loads and caches it.
+    invalidate()
+        Removes all the cached results, e.g. after the graph was populated.
+    get_metrics()
+        Returns the hits, misses, evictions and the hit rate of the cache.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 ** 2, ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # The entries are (expiry time, size, result) in the order in which they were used
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.metrics = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self.remove(key)
+                self.metrics['expirations'] += 1
+                entry = None
+            if entry is None:
+                self.metrics['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.metrics['hits'] += 1
+            return entry[2]
+
+    def put(self, key, result) -> None:
+        size = len(json.dumps(result, default=str))
+        # A result that is larger than the whole cache is not cached
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, size, result)
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self.remove(next(iter(self.entries)))
+                self.metrics['evictions'] += 1
+
+    def remove(self, key) -> None:
+        self.size -= self.entries.pop(key)[1]
+
+    def get_or_load(self, key, load):
+        """
+        Function that returns the cached result of a key, or loads and caches it.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the result, e.g. the name of the query and its parameters.
+        load : callable
+            Loads the result when it is not cached.
+
+        Returns
+        -------
+        object
+            The result.
+        """
+        result = self.get(key)
+        if result is None:
+            # Two requests can load the same result at the same time, which is cheaper than holding the lock during the query
+            result = load()
+            self.put(key, result)
+        return result
+
+    def invalidate(self) -> int:
+        with self.lock:
+            count = len(self.entries)
+            self.entries.clear()
+            self.size = 0
+            self.metrics['invalidations'] += 1
+        return count
+
+    def get_metrics(self) -> dict:
+        with self.lock:
+            requests = self.metrics['hits'] + self.metrics['misses']
+            return {**self.metrics, 'entries': len(self.entries), 'bytes': self.size,
+                    'hit_rate': round(self.metrics['hits'] / requests, 4) if requests else 0.0}
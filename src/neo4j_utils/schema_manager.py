@@ -0,0 +1,222 @@
+import argparse
+import importlib
+import inspect
+import pkgutil
+from neo4j.exceptions import ClientError, DatabaseError
+from src.neo4j_utils.neo4jclient import Neo4jClient
+from src.domainmodel.neo4j_node import Node
+from src.domainmodel.neo4j_relation import Relation
+
+DOMAIN_PACKAGE = 'src.domainmodel'
+
+
+def discover(package: str = DOMAIN_PACKAGE) -> list:
+    """
+    Function that finds all the node and relationship classes of the domain model.
+
+    Parameters
+    ----------
+    package : str
+        The package with the domain classes.
+
+    Returns
+    -------
+    list
+        The node and relationship classes, in the order of their modules.
+    """
+    domain_classes = []
+    modules = pkgutil.iter_modules(importlib.import_module(package).__path__)
+    for module_info in sorted(modules, key=lambda module_info: module_info.name):
+        module = importlib.import_module(f'{package}.{module_info.name}')
+        for _, member in inspect.getmembers(module, inspect.isclass):
+            # Only the classes that are defined in the module, not the imported base classes
+            if member.__module__ == module.__name__ and issubclass(member, (Node, Relation)) and member not in (Node, Relation):
+                domain_classes.append(member)
+    return domain_classes
+
+
+def describe(domain_class) -> tuple:
+    """
+    Function that gets the label and the natural keys of a domain class.
+
+    Parameters
+    ----------
+    domain_class : type
+        The domain class of a node or relationship.
+
+    Returns
+    -------
+    tuple
+        The label and the names of the natural keys, empty if the class has none.
+    """
+    # Make an empty instance, because the label and the natural keys are only known on an instance
+    parameters = len(inspect.signature(domain_class.__init__).parameters) - 1
+    instance = domain_class(*[None] * parameters)
+    natural_keys = instance.natural_keys()
+    # Relationships without natural keys return an error instead of a dict, they are identified by their nodes
+    keys = tuple(natural_keys.keys()) if isinstance(natural_keys, dict) else ()
+    return instance.label, keys
+
+
+class SchemaManager():
+    """
+    A class used to provision the constraints and indexes of the graph database from the domain model.
+    Every node label gets a uniqueness constraint on its natural keys, which also creates the index that
+    MERGE and MATCH use. Nodes are also matched on their leading natural keys when the others are not known,
+    e.g. the actors of a movie on their name, so every leading part of a composite key gets an index as well.
+    Every relationship type with natural keys gets an index on them. None of the relationships of the domain model has
+    natural keys, they are found through their start and end nodes, so only the node keys are indexed for now.
+    A uniqueness constraint can not be created while the graph has nodes with the same keys, e.g. from loads before the
+    nodes were merged on their natural keys, so those duplicates are reported and the other constraints are still created.
+
+    Attributes
+    ----------
+    domain_classes : list
+        The node and relationship classes, all the classes under src/domainmodel by default.
+    client : Neo4jClient
+        The client of the database.
+
+    Methods
+    -------
+    get_schema()
+        Returns the constraints and indexes the domain model needs.
+    provision()
+        Creates the constraints and indexes that do not exist yet.
+    find_duplicates(label, keys, limit)
+        Returns the keys that more than one node of a label has.
+    report()
+        Returns the missing and the unused indexes of the database.
+    """
+
+    def __init__(self, domain_classes: list = None, client: Neo4jClient = None) -> None:
+        self.domain_classes = domain_classes if domain_classes is not None else discover()
+        self.client = client or Neo4jClient.getInstance()
+
+    def get_schema(self) -> list:
+        """
+        Function for getting the constraints and indexes the domain model needs.
+
+        Returns
+        -------
+        list
+            A dict with the name, the entity type, the label, the properties and the statement of every constraint or index.
+        """
+        schema = {}
+        for domain_class in self.domain_classes:
+            label, keys = describe(domain_class)
+            if issubclass(domain_class, Node):
+                name = f'{label.lower()}_key'
+                properties_string = ", ".join(f"n.{key}" for key in keys)
+                statement = f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE ({properties_string}) IS UNIQUE"
+                entity_type = 'NODE'
+            elif keys:
+                name = f'{label.lower()}_key'
+                properties_string = ", ".join(f"r.{key}" for key in keys)
+                statement = f"CREATE INDEX {name} IF NOT EXISTS FOR ()-[r:{label}]-() ON ({properties_string})"
+                entity_type = 'RELATIONSHIP'
+            else:
+                continue
+            # Classes can share a label, e.g. the nominations of movies and persons
+            schema[name] = {'name': name, 'entity_type': entity_type, 'label': label, 'properties': list(keys), 'statement': statement}
+
+            # A composite index is only used when all of its properties are matched, so the leading keys of a node get their own
+            for i in range(1, len(keys) if entity_type == 'NODE' else 0):
+                name = f'{label.lower()}_{"_".join(keys[:i])}'
+                properties_string = ", ".join(f"n.{key}" for key in keys[:i])
+                statement = f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON ({properties_string})"
+                schema[name] = {'name': name, 'entity_type': entity_type, 'label': label, 'properties': list(keys[:i]), 'statement': statement}
+        return list(schema.values())
+
+    def get_indexes(self) -> list:
+        query = "SHOW INDEXES YIELD name, type, entityType, labelsOrTypes, properties, owningConstraint, readCount"
+        return [record.data() for record in self.client.execute_read(query)]
+
+    def provision(self) -> list:
+        """
+        Function that creates the constraints and indexes that do not exist yet.
+        It should run before any load, such that the merges of the loader use the indexes.
+
+        Returns
+        -------
+        list
+            The names of the constraints and indexes that were created.
+        """
+        created = []
+        existing = {(index['entityType'], tuple(index['labelsOrTypes'] or []), tuple(index['properties'] or []))
+                    for index in self.get_indexes()}
+        for item in self.get_schema():
+            # A constraint or index on the same properties under another name also counts
+            if (item['entity_type'], (item['label'],), tuple(item['properties'])) in existing:
+                continue
+            try:
+                self.client.execute_write(item['statement'])
+            except (ClientError, DatabaseError) as error:
+                if 'CONSTRAINT' not in item['statement']:
+                    raise
+                duplicates = self.find_duplicates(item['label'], item['properties'])
+                print(f'Could not create {item["name"]} on {item["label"]}({", ".join(item["properties"])}), '
+                      f'the graph has duplicate keys, e.g. {duplicates}: {error}')
+                continue
+            created.append(item['name'])
+            print(f'Created {item["name"]} on {item["label"]}({", ".join(item["properties"])}).')
+        return created
+
+    def find_duplicates(self, label: str, keys: list, limit: int = 5) -> list:
+        """
+        Function for getting the keys that more than one node of a label has.
+
+        Parameters
+        ----------
+        label : str
+            The label of the nodes.
+        keys : list
+            The names of the natural keys.
+        limit : int
+            The maximum number of duplicate keys that are returned.
+
+        Returns
+        -------
+        list
+            A dict with the values of the keys and the number of nodes of every duplicate key, the most frequent first.
+        """
+        # The constraint ignores nodes of which a key is null, so they are no duplicates either
+        not_null_string = " AND ".join(f"n.{key} IS NOT NULL" for key in keys)
+        keys_string = ", ".join(f"n.{key} AS {key}" for key in keys)
+        query = f"MATCH (n:{label}) WHERE {not_null_string} " \
+                f"WITH {keys_string}, count(*) AS count WHERE count > 1 " \
+                f"RETURN {', '.join(keys)}, count ORDER BY count DESC LIMIT $limit"
+        return [record.data() for record in self.client.execute_read(query, {'limit': limit})]
+
+    def report(self) -> dict:
+        """
+        Function for getting the missing and the unused indexes of the database.
+
+        Returns
+        -------
+        dict
+            The missing constraints and indexes of the domain model, and the indexes that were never read.
+            Indexes that back a constraint are never reported as unused, because they enforce it.
+        """
+        indexes = self.get_indexes()
+        existing = {(index['entityType'], tuple(index['labelsOrTypes'] or []), tuple(index['properties'] or [])) for index in indexes}
+        missing = [item['name'] for item in self.get_schema()
+                   if (item['entity_type'], (item['label'],), tuple(item['properties'])) not in existing]
+        unused = [index['name'] for index in indexes
+                  if index['type'] != 'LOOKUP' and index['owningConstraint'] is None and not index['readCount']]
+
+        for name in missing:
+            print(f'Missing: {name}')
+        for name in unused:
+            print(f'Unused: {name}')
+        return {'missing': missing, 'unused': unused}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Provision the constraints and indexes of the domain model.')
+    parser.add_argument('--report', action='store_true', help='Only report the missing and unused indexes.')
+    args = parser.parse_args()
+
+    manager = SchemaManager()
+    if not args.report:
+        manager.provision()
+    manager.report()
@@ -0,0 +1,54 @@
+from src.neo4j_utils import query_cache
+from src.neo4j_utils.query_cache import QueryCache
+
+
+def test_evicts_the_least_recently_used_entries():
+    cache = QueryCache(max_entries=2)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    assert cache.get('a') == [1]
+    cache.put('c', [3])
+
+    # b was used least recently
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == ([1], None, [3])
+    assert cache.get_metrics()['evictions'] == 1
+
+
+def test_evicts_entries_until_they_fit_the_size_bound():
+    # Every result is 10 bytes as JSON
+    cache = QueryCache(max_entries=10, max_bytes=25)
+    for key in 'abc':
+        cache.put(key, 'x' * 8)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (None, 'x' * 8, 'x' * 8)
+    assert cache.get_metrics()['bytes'] == 20
+
+    # A result that is larger than the whole cache is not cached and evicts nothing
+    cache.put('d', 'x' * 30)
+    assert cache.get('d') is None
+    assert cache.get_metrics()['entries'] == 2
+
+
+def test_results_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(query_cache.time, 'monotonic', lambda: now[0])
+    cache = QueryCache(ttl=10)
+    loads = []
+    load = lambda: loads.append(1) or ['result']
+
+    assert cache.get_or_load('a', load) == cache.get_or_load('a', load) == ['result']
+    now[0] += 11
+    assert cache.get_or_load('a', load) == ['result']
+    assert len(loads) == 2
+    assert cache.get_metrics()['expirations'] == 1
+
+
+def test_hit_rate():
+    cache = QueryCache()
+    assert cache.get_metrics()['hit_rate'] == 0.0
+    cache.get_or_load('a', lambda: [1])
+    for _ in range(3):
+        cache.get_or_load('a', lambda: [1])
+    metrics = cache.get_metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['hit_rate']) == (3, 1, 0.75)
+    assert cache.invalidate() == 1
+    assert cache.get_metrics()['entries'] == 0
@@ -0,0 +1,55 @@
+from neo4j.exceptions import DatabaseError
+from src.neo4j_utils.schema_manager import SchemaManager, describe
+from src.domainmodel.person_node import Person
+from src.domainmodel.genre_node import Genre
+from src.domainmodel.actedin_relation import ActedInRelation
+
+
+def test_describe_gets_the_label_and_natural_keys():
+    assert describe(Person) == ('Person', ('name', 'date_of_birth'))
+    assert describe(Genre) == ('Genre', ('genre',))
+
+
+def test_schema_indexes_the_leading_keys_of_composite_keys():
+    schema = {item['name']: item for item in SchemaManager([Person, Genre, ActedInRelation], client=object()).get_schema()}
+    assert schema['person_key']['statement'] == \
+        "CREATE CONSTRAINT person_key IF NOT EXISTS FOR (n:Person) REQUIRE (n.name, n.date_of_birth) IS UNIQUE"
+    # The actors of a movie are only matched on their name
+    assert schema['person_name']['statement'] == "CREATE INDEX person_name IF NOT EXISTS FOR (n:Person) ON (n.name)"
+    assert list(schema) == ['person_key', 'person_name', 'genre_key']
+
+
+class Record(dict):
+    def data(self) -> dict:
+        return dict(self)
+
+
+class DuplicatesClient():
+    # A graph with two persons of the same name and date of birth, on which the person constraint fails
+    def __init__(self) -> None:
+        self.written = []
+        self.read = []
+
+    def execute_read(self, query, parameters={}):
+        self.read.append(query)
+        if query.startswith('SHOW INDEXES'):
+            return []
+        return [Record(name='Tom Hanks', date_of_birth=1956, count=2)]
+
+    def execute_write(self, query, parameters={}):
+        if query.startswith('CREATE CONSTRAINT person_key'):
+            raise DatabaseError('Unable to create Constraint')
+        self.written.append(query)
+        return []
+
+
+def test_provision_reports_duplicate_keys_and_continues(capsys):
+    client = DuplicatesClient()
+    created = SchemaManager([Person, Genre], client=client).provision()
+
+    assert created == ['person_name', 'genre_key']
+    assert client.read[1] == "MATCH (n:Person) WHERE n.name IS NOT NULL AND n.date_of_birth IS NOT NULL " \
+                             "WITH n.name AS name, n.date_of_birth AS date_of_birth, count(*) AS count WHERE count > 1 " \
+                             "RETURN name, date_of_birth, count ORDER BY count DESC LIMIT $limit"
+    assert "Could not create person_key on Person(name, date_of_birth), the graph has duplicate keys, " \
+           "e.g. [{'name': 'Tom Hanks', 'date_of_birth': 1956, 'count': 2}]" in capsys.readouterr().out
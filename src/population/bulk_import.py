@@ -0,0 +1,217 @@
+from dataclasses import fields
+from pathlib import Path
+import pandas as pd
+from src.neo4j_utils.schema_manager import describe
+from src.domainmodel.movie_node import Movie
+from src.domainmodel.person_node import Person
+from src.domainmodel.oscar_node import Oscar
+from src.domainmodel.genre_node import Genre
+from src.domainmodel.actedin_relation import ActedInRelation
+from src.domainmodel.directed_relation import DirectedRelation
+from src.domainmodel.wrote_relation import WroteRelation
+from src.domainmodel.movieNominated_relation import MovieNominatedForRelation
+from src.domainmodel.movieWon_relation import MovieHasWonRelation
+from src.domainmodel.personNominated_relation import PersonNominatedForRelation
+from src.domainmodel.personWon_relation import PersonHasWonRelation
+from src.domainmodel.hasGenre_relation import HasGenreRelation
+
+# The node files: the domain class, the cleaned table and the mapping from its columns to the properties
+NODE_FILES = [
+    (Movie, 'merged_movies.csv', {'movie_name': 'title', 'movie_date': 'year', 'movie_rating': 'rating', 'budget': 'budget'}),
+    (Person, 'Person_extended.csv', {'person_name': 'name', 'birth_date': 'date_of_birth', 'death_date': 'date_of_death',
+                                     'start_activity': 'start_year', 'end_activity': 'end_year'}),
+    (Oscar, 'Award.csv', {'award_category': 'category', 'award_year': 'year'}),
+    (Genre, 'Genre.csv', {'movie_genre': 'genre'}),
+]
+
+# The relationship files: the domain class, the cleaned table, and the class and column mapping of both endpoints
+RELATION_FILES = [
+    (ActedInRelation, 'Acted in.csv', Person, {'actor': 'name'}, Movie, {'movie_name': 'title', 'movie_date': 'year'}),
+    (DirectedRelation, 'Directed.csv', Person, {'director': 'name'}, Movie, {'movie_name': 'title', 'movie_date': 'year'}),
+    (WroteRelation, 'Wrote.csv', Person, {'writer': 'name'}, Movie, {'movie_name': 'title', 'movie_date': 'year'}),
+    (HasGenreRelation, 'Has genre.csv', Movie, {'movie_name': 'title', 'movie_date': 'year'}, Genre, {'movie_genre': 'genre'}),
+    (MovieNominatedForRelation, 'Nominated for (Movie).csv', Movie, {'movie_name': 'title', 'movie_date': 'year'},
+     Oscar, {'award_category': 'category', 'award_year': 'year'}),
+    (MovieHasWonRelation, 'Won (Movie).csv', Movie, {'movie_name': 'title', 'movie_date': 'year'},
+     Oscar, {'award_category': 'category', 'award_year': 'year'}),
+    (PersonNominatedForRelation, 'Nominated for (Person).csv', Person, {'person_name': 'name'},
+     Oscar, {'award_category': 'category', 'award_year': 'year'}),
+    (PersonHasWonRelation, 'Won (Person).csv', Person, {'person_name': 'name'},
+     Oscar, {'award_category': 'category', 'award_year': 'year'}),
+]
+
+# The import types of the property annotations of the domain classes
+IMPORT_TYPES = {str: 'string', int: 'long', float: 'double', bool: 'boolean'}
+
+
+def get_types(domain_class) -> dict:
+    # The type of every property of a domain class that can be imported
+    return {field.name: field.type for field in fields(domain_class) if field.type in IMPORT_TYPES}
+
+
+class BulkImportExporter():
+    """
+    A class used to export the cleaned data to files for the offline importer of Neo4j (neo4j-admin database import).
+    Every node gets a stable ID that is a hash of its natural keys, such that the relationships can refer to it.
+
+    Attributes
+    ----------
+    source : Path
+        The directory with the cleaned data.
+    destination : Path
+        The directory in which the import files are written.
+
+    Methods
+    -------
+    export()
+        Exports all the node and relationship files and returns the import command.
+    export_nodes(domain_class, file_name, columns)
+        Exports the nodes of a domain class.
+    export_relations(domain_class, file_name, subject_class, subject_columns, object_class, object_columns)
+        Exports the relationships of a domain class.
+    """
+
+    def __init__(self, source: Path = Path('data/cleaned_data'), destination: Path = Path('data/import')) -> None:
+        self.source = source
+        self.destination = destination
+        # The IDs of the exported nodes per label, such that the relationships can be resolved
+        self.node_ids = {}
+
+    def to_type(self, values: pd.Series, property_type: type) -> pd.Series:
+        # Convert the values to the type of the property, dates like 1994-01-01 become the year for integers
+        if property_type is int:
+            numbers = pd.to_numeric(values, errors='coerce')
+            years = pd.to_datetime(values.where(numbers.isna()).astype('string'), errors='coerce', format='mixed').dt.year
+            return numbers.fillna(years).round().astype('Int64')
+        if property_type is float:
+            return pd.to_numeric(values, errors='coerce').astype('Float64')
+        if property_type is bool:
+            return values.astype('boolean')
+        # Strings that were read as numbers, e.g. years, are written without a decimal part
+        numbers = pd.to_numeric(values, errors='coerce')
+        if numbers.notna().sum() == values.notna().sum() and (numbers.dropna() % 1 == 0).all():
+            return numbers.round().astype('Int64').astype('string')
+        return values.astype('string').str.strip()
+
+    def make_ids(self, keys: pd.DataFrame) -> pd.Series:
+        # The ID is a hash of the natural keys, so it is the same in every run and in every file
+        return pd.util.hash_pandas_object(keys.astype('string'), index=False).astype('int64')
+
+    def read(self, file_name: str, columns: dict, types: dict) -> pd.DataFrame:
+        data = pd.read_csv(self.source / file_name, usecols=list(columns.keys())).rename(columns=columns)
+        for name in data.columns:
+            data[name] = self.to_type(data[name], types.get(name, str))
+        return data
+
+    def export_nodes(self, domain_class, file_name: str, columns: dict) -> Path:
+        """
+        Function that exports the nodes of a domain class.
+
+        Parameters
+        ----------
+        domain_class : type
+            The domain class of the nodes.
+        file_name : str
+            The name of the cleaned table with the nodes.
+        columns : dict
+            The property name of every column of the table.
+
+        Returns
+        -------
+        Path
+            The path to the node file.
+        """
+        label, keys = describe(domain_class)
+        keys, types = list(keys), get_types(domain_class)
+        data = self.read(file_name, columns, types)
+
+        # Drop the nodes without any natural key and keep one node per natural key
+        data = data.dropna(subset=keys, how='all')
+        data.insert(0, f'id:ID({label})', self.make_ids(data[keys]))
+        data = data.drop_duplicates(subset=f'id:ID({label})')
+        # The IDs are nullable integers, such that the endpoints that are not found do not turn them into floats
+        self.node_ids[label] = data[[f'id:ID({label})'] + keys].rename(columns={f'id:ID({label})': 'id'}).astype({'id': 'Int64'})
+
+        # Add the types of the properties to the headers
+        data.columns = [data.columns[0]] + [f'{name}:{IMPORT_TYPES[types.get(name, str)]}' for name in data.columns[1:]]
+
+        path = self.destination / f'{label}.csv'
+        data.to_csv(path, index=False)
+        print(f'Exported {len(data)} {label} nodes to {path}.')
+        return path
+
+    def resolve(self, file_name: str, domain_class, columns: dict) -> pd.Series:
+        # Resolve the endpoints of a table to the IDs of the exported nodes
+        # If the table only has some of the natural keys (e.g. only the name of a person), the first node with those keys is used
+        label = describe(domain_class)[0]
+        keys = list(columns.values())
+        endpoints = self.read(file_name, columns, get_types(domain_class)).astype('string')
+        nodes = self.node_ids[label].drop_duplicates(subset=keys)
+        nodes = nodes.assign(**{key: nodes[key].astype('string') for key in keys})
+        return endpoints.merge(nodes[['id'] + keys], on=keys, how='left')['id']
+
+    def export_relations(self, domain_class, file_name: str, subject_class, subject_columns: dict,
+                         object_class, object_columns: dict) -> Path:
+        """
+        Function that exports the relationships of a domain class.
+
+        Parameters
+        ----------
+        domain_class : type
+            The domain class of the relationships.
+        file_name : str
+            The name of the cleaned table with the relationships.
+        subject_class, object_class : type
+            The domain classes of the start and end nodes.
+        subject_columns, object_columns : dict
+            The property name of every column of the table that identifies the start and end nodes.
+
+        Returns
+        -------
+        Path
+            The path to the relationship file.
+        """
+        label = describe(domain_class)[0]
+        subject_label = describe(subject_class)[0]
+        object_label = describe(object_class)[0]
+
+        start_ids = self.resolve(file_name, subject_class, subject_columns)
+        end_ids = self.resolve(file_name, object_class, object_columns)
+
+        relations = pd.DataFrame({f':START_ID({subject_label})': start_ids, f':END_ID({object_label})': end_ids}).dropna()
+        if len(relations) < len(start_ids):
+            print(f'Skipped {len(start_ids) - len(relations)} {label} relationships of which a node was not exported.')
+        relations = relations.astype('int64').drop_duplicates()
+
+        path = self.destination / f'{label}_{subject_label}_{object_label}.csv'
+        relations.to_csv(path, index=False)
+        print(f'Exported {len(relations)} {label} relationships to {path}.')
+        return path
+
+    def export(self) -> str:
+        """
+        Function that exports all the node and relationship files.
+
+        Returns
+        -------
+        str
+            The neo4j-admin command that imports the files.
+        """
+        self.destination.mkdir(parents=True, exist_ok=True)
+
+        node_arguments = []
+        for domain_class, file_name, columns in NODE_FILES:
+            path = self.export_nodes(domain_class, file_name, columns)
+            node_arguments.append(f'--nodes={describe(domain_class)[0]}="{path}"')
+
+        relation_arguments = []
+        for domain_class, file_name, subject_class, subject_columns, object_class, object_columns in RELATION_FILES:
+            path = self.export_relations(domain_class, file_name, subject_class, subject_columns, object_class, object_columns)
+            relation_arguments.append(f'--relationships={describe(domain_class)[0]}="{path}"')
+
+        return 'neo4j-admin database import full --id-type=integer ' + ' '.join(node_arguments + relation_arguments) + ' neo4j'
+
+
+if __name__ == "__main__":
+    command = BulkImportExporter().export()
+    print(f'\nImport the files into an empty, stopped database with:\n{command}')
@@ -9,137 +9,81 @@ from src.domainmodel.wrote_relation import WroteRelation
 from src.domainmodel.movieNominated_relation import MovieNominatedForRelation
 from src.domainmodel.movieWon_relation import MovieHasWonRelation
 from src.domainmodel.hasGenre_relation import HasGenreRelation
+from src.domainmodel.neo4j_batch import NodeBatch, RelationBatch
+from src.population.parallel_loader import ParallelLoader
+from src.neo4j_utils.schema_manager import SchemaManager
+from decouple import config
+import urllib.request
 import pandas as pd
 
+MOVIE_COLUMNS = {'movie_name': 'title', 'movie_date': 'year'}
+OSCAR_COLUMNS = {'award_category': 'category', 'award_year': 'year'}
+
 if __name__ == "__main__":
 
+    # Create the constraints on the natural keys first, such that the merges and matches of the loader use their indexes
+    SchemaManager().provision()
+
+    # The nodes are loaded before the relations, the relations are partitioned by their movie
+    # The tables are loaded as columnar batches, so no domain object is made per row
+    loader = ParallelLoader(workers=8, batch_size=1000)
+
     # Create the movie nodes 
     movies_df = pd.read_csv('data/cleaned_data/merged_movies.csv')
-    for index, row in movies_df.iterrows():
-        title = row['movie_name']
-        year = row['movie_date']
-        rating = row['movie_rating']
-        budget = row['budget']
-        if not (budget > 0):
-            print(budget)
-        movie = Movie(title, year, rating, budget)
-        movie.create()
+    loader.load_batch('Movie', NodeBatch(Movie, movies_df, {**MOVIE_COLUMNS, 'movie_rating': 'rating', 'budget': 'budget'}))
 
     # Create the Oscar nodes 
     oscar_df = pd.read_csv('data/cleaned_data/Award.csv')
-    for index, row in oscar_df.iterrows():
-        category = row['award_category']
-        year = row['award_year']
-        oscar = Oscar(category, year)
-        oscar.create()
+    loader.load_batch('Oscar', NodeBatch(Oscar, oscar_df, OSCAR_COLUMNS))
 
     # Create the genre nodes
     genre_df = pd.read_csv('data/cleaned_data/Genre.csv')
-    for index, row in genre_df.iterrows():
-        genre = row['movie_genre']
-        genre = Genre(genre)
-        genre.create()
+    loader.load_batch('Genre', NodeBatch(Genre, genre_df, {'movie_genre': 'genre'}))
 
     # Create the person nodes 
     person_df = pd.read_csv('data/cleaned_data/Person_extended.csv')
-    for index, row in person_df.iterrows():
-        name = row['person_name']
-        dob = row['birth_date']
-        dod = row['death_date']
-        start_year = row["start_activity"]
-        end_year = row['end_activity']
-        person = Person(name, dob, dod, start_year, end_year)
-        person.create()
+    loader.load_batch('Person', NodeBatch(Person, person_df, {'person_name': 'name', 'birth_date': 'date_of_birth', 'death_date': 'date_of_death',
+                                                              'start_activity': 'start_year', 'end_activity': 'end_year'}))
 
+    # Create the relationships between the movies and the oscars
     movieNominated_df = pd.read_csv('data/cleaned_data/Nominated for (Movie).csv')
-    for index, row in movieNominated_df.iterrows():
-        # Create the movie 
-        movie_name = row['movie_name']
-        movie_date = row['movie_date']
-        movie = Movie(movie_name, movie_date, None, None)
-
-        # Create the oscar 
-        award_cat = row['award_category']
-        award_year = row['award_year']
-        oscar = Oscar(award_cat, award_year)
-
-        # Create the relationship
-        nominatedFor = MovieNominatedForRelation(movie, oscar)
-        nominatedFor.create()
-    
-    movieWon_df = pd.read_csv('data/cleaned_data/Won (Movie).csv')
-    for index, row in movieWon_df.iterrows():
-        # Create the movie 
-        movie_name = row['movie_name']
-        movie_date = row['movie_date']
-        movie = Movie(movie_name, movie_date, None, None)
-
-        # Create the oscar 
-        award_cat = row['award_category']
-        award_year = row['award_year']
-        oscar = Oscar(award_cat, award_year)
-
-        # Create the relationship
-        movieWon = MovieHasWonRelation(movie, oscar)
-        movieWon.create()
-        
-    hasGenre_df = pd.read_csv('data/cleaned_data/Has genre.csv')
-    for index, row in hasGenre_df.iterrows():
-        # Create the movie 
-        movie_name = row['movie_name']
-        movie_date = row['movie_date']
-        movie = Movie(movie_name, movie_date, None, None)
+    loader.load_batch('Nominated for (Movie)',
+                      RelationBatch(MovieNominatedForRelation, movieNominated_df, Movie, MOVIE_COLUMNS, Oscar, OSCAR_COLUMNS),
+                      by='subject')
 
-        # Create the genre 
-        genre = row['movie_genre']
-        genre = Genre(genre)
+    movieWon_df = pd.read_csv('data/cleaned_data/Won (Movie).csv')
+    loader.load_batch('Won (Movie)',
+                      RelationBatch(MovieHasWonRelation, movieWon_df, Movie, MOVIE_COLUMNS, Oscar, OSCAR_COLUMNS),
+                      by='subject')
 
-        # Create the relationship
-        hasGenre = HasGenreRelation(movie, genre)
-        hasGenre.create()
+    # Create the relationships between the movies and the genres
+    hasGenre_df = pd.read_csv('data/cleaned_data/Has genre.csv')
+    loader.load_batch('Has genre',
+                      RelationBatch(HasGenreRelation, hasGenre_df, Movie, MOVIE_COLUMNS, Genre, {'movie_genre': 'genre'}),
+                      by='subject')
 
+    # Create the relationships between the persons and the movies
     actedIn_df = pd.read_csv('data/cleaned_data/Acted in.csv')
-    for index, row in actedIn_df.iterrows():
-        # Create the movie 
-        movie_name = row['movie_name']
-        movie_date = row['movie_date']
-        movie = Movie(movie_name, movie_date, None, None)
-
-        # Create the actor 
-        actor = row['actor']
-        actor = Person(actor)
-
-        # Create the relationship
-        actedIn = ActedInRelation(actor, movie)
-        actedIn.create()
-    
-    directed_df = pd.read_csv('data/cleaned_data/Directed.csv')
-    for index, row in directed_df.iterrows():
-        # Create the movie 
-        movie_name = row['movie_name']
-        movie_date = row['movie_date']
-        movie = Movie(movie_name, movie_date, None, None)
-
-        # Create the director 
-        director = row['director']
-        director = Person(director)
+    loader.load_batch('Acted in',
+                      RelationBatch(ActedInRelation, actedIn_df, Person, {'actor': 'name'}, Movie, MOVIE_COLUMNS),
+                      by='object')
 
-        # Create the relationship
-        directed = DirectedRelation(director, movie)
-        directed.create()
+    directed_df = pd.read_csv('data/cleaned_data/Directed.csv')
+    loader.load_batch('Directed',
+                      RelationBatch(DirectedRelation, directed_df, Person, {'director': 'name'}, Movie, MOVIE_COLUMNS),
+                      by='object')
 
     wrote_df = pd.read_csv('data/cleaned_data/Wrote.csv')
-    for index, row in wrote_df.iterrows():
-        # Create the movie 
-        movie_name = row['movie_name']
-        movie_date = row['movie_date']
-        movie = Movie(movie_name, movie_date, None, None)
-
-        # Create the writer 
-        writer = row['writer']
-        writer = Person(writer)
-
-        # Create the relationship
-        writed = WroteRelation(director, movie)
-        writed.create()
-
+    loader.load_batch('Wrote',
+                      RelationBatch(WroteRelation, wrote_df, Person, {'writer': 'name'}, Movie, MOVIE_COLUMNS),
+                      by='object')
+
+    loader.print_report()
+
+    # Let the API drop its cached results, such that it serves the new graph at once
+    api_url = config('API_URL', default=None)
+    if api_url:
+        headers = {'Authorization': f'Bearer {config("API_CACHE_TOKEN", default="")}'}
+        request = urllib.request.Request(f'{api_url}/cache/invalidate', method='POST', headers=headers)
+        with urllib.request.urlopen(request, timeout=10) as response:
+            print(f'Invalidated the API cache: {response.read().decode()}')
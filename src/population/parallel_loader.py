@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+
+class ParallelLoader():
+    """
+    A class used to load nodes and relations into the graph database with a pool of workers.
+    The objects are partitioned by the natural keys of one node, such that concurrent batches rarely touch the same nodes.
+    Every batch is a managed transaction, which the driver retries after a deadlock or another transient error
+    for up to NEO4J_MAX_RETRY_TIME seconds, which is safe because the batches are merged.
+
+    Attributes
+    ----------
+    workers : int
+        The number of partitions that are written at the same time.
+    batch_size : int
+        The number of objects per query.
+    report : dict
+        The number of rows, the wall time and the rows per second of every loaded table.
+
+    Methods
+    -------
+    load_nodes(name, nodes)
+        Loads nodes, partitioned by their natural keys.
+    load_relations(name, relations, partition_node)
+        Loads relations, partitioned by the natural keys of one of their nodes.
+    load_batch(name, batch, **partition_kwargs)
+        Loads a NodeBatch or RelationBatch, partitioned by its key columns.
+    print_report()
+        Prints the rows per second of every loaded table.
+    """
+
+    def __init__(self, workers: int = 8, batch_size: int = 1000) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.report = {}
+
+    def partition(self, objects, partition_key) -> list:
+        # Objects with the same partition key always end up in the same partition
+        partitions = [[] for _ in range(self.workers)]
+        for obj in objects:
+            partitions[hash(partition_key(obj)) % self.workers].append(obj)
+        return [partition for partition in partitions if partition]
+
+    def write_partition(self, partition) -> int:
+        # Write the partition batch by batch, such that the driver retries a failed batch on its own
+        for i in range(0, len(partition), self.batch_size):
+            if isinstance(partition, list):
+                batch = partition[i:i + self.batch_size]
+                type(batch[0]).create_many(batch, batch_size=self.batch_size)
+            else:
+                partition.slice(i, i + self.batch_size).create(batch_size=self.batch_size)
+        return len(partition)
+
+    def write(self, name: str, partitions: list) -> int:
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            rows = sum(executor.map(self.write_partition, partitions))
+
+        seconds = time.perf_counter() - start
+        self.report[name] = {'rows': rows, 'seconds': round(seconds, 3), 'rows_per_second': round(rows / seconds, 1) if seconds else 0.0}
+        print(f'Loaded {rows} rows of {name} in {seconds:.1f}s ({self.report[name]["rows_per_second"]} rows/s).')
+        return rows
+
+    def load(self, name: str, objects, partition_key) -> int:
+        """
+        Function that loads objects with the pool of workers.
+
+        Parameters
+        ----------
+        name : str
+            The name of the table, used in the report.
+        objects : iterable
+            The nodes or relations to be loaded.
+        partition_key : callable
+            Returns the key of an object that decides its partition.
+
+        Returns
+        -------
+        int
+            The number of loaded objects.
+        """
+        return self.write(name, self.partition(objects, partition_key))
+
+    def load_nodes(self, name: str, nodes) -> int:
+        return self.load(name, nodes, lambda node: tuple(node.natural_keys().values()))
+
+    def load_relations(self, name: str, relations, partition_node=lambda relation: relation.object) -> int:
+        return self.load(name, relations, lambda relation: tuple(partition_node(relation).natural_keys().values()))
+
+    def load_batch(self, name: str, batch, **partition_kwargs) -> int:
+        """
+        Function that loads a NodeBatch or RelationBatch with the pool of workers, without making domain objects.
+
+        Parameters
+        ----------
+        name : str
+            The name of the table, used in the report.
+        batch : NodeBatch or RelationBatch
+            The nodes or relations to be loaded.
+        partition_kwargs : dict
+            The arguments of the partition method of the batch, e.g. by='subject' for relations.
+
+        Returns
+        -------
+        int
+            The number of loaded rows.
+        """
+        return self.write(name, batch.partition(self.workers, **partition_kwargs))
+
+    def print_report(self) -> None:
+        print(f'\n{"Table":<30}{"Rows":>10}{"Seconds":>10}{"Rows/s":>12}')
+        for name, result in self.report.items():
+            print(f'{name:<30}{result["rows"]:>10}{result["seconds"]:>10.1f}{result["rows_per_second"]:>12.1f}')
@@ -0,0 +1,28 @@
+import pandas as pd
+from src.population.bulk_import import BulkImportExporter, NODE_FILES, RELATION_FILES
+from src.domainmodel.actedin_relation import ActedInRelation
+
+
+def test_relationships_refer_to_the_exported_node_ids(tmp_path):
+    pd.DataFrame({'person_name': ['Tom Hanks', 'Meg Ryan'], 'birth_date': ['1956-07-09', '1961-11-19'], 'death_date': None,
+                  'start_activity': None, 'end_activity': None}).to_csv(tmp_path / 'Person_extended.csv', index=False)
+    pd.DataFrame({'movie_name': ['Big', 'Sleepless in Seattle'], 'movie_date': [1988, 1993], 'movie_rating': [7.3, 6.8],
+                  'budget': [18000000, 21000000]}).to_csv(tmp_path / 'merged_movies.csv', index=False)
+    # The last actor is not a node, so one endpoint is not found
+    pd.DataFrame({'movie_name': ['Big', 'Sleepless in Seattle', 'Sleepless in Seattle', 'Big'],
+                  'movie_date': [1988, 1993, 1993, 1988],
+                  'actor': ['Tom Hanks', 'Tom Hanks', 'Meg Ryan', 'Elizabeth Perkins']}).to_csv(tmp_path / 'Acted in.csv', index=False)
+
+    exporter = BulkImportExporter(tmp_path, tmp_path / 'import')
+    exporter.destination.mkdir()
+    for domain_class, file_name, columns in NODE_FILES[:2]:
+        exporter.export_nodes(domain_class, file_name, columns)
+    path = exporter.export_relations(*[entry for entry in RELATION_FILES if entry[0] is ActedInRelation][0])
+
+    # The 64-bit IDs are written exactly, a round trip through floats would change them
+    persons = pd.read_csv(tmp_path / 'import' / 'Person.csv').set_index('name:string')['id:ID(Person)']
+    movies = pd.read_csv(tmp_path / 'import' / 'Movie.csv').set_index('title:string')['id:ID(Movie)']
+    relations = pd.read_csv(path)
+    assert sorted(map(tuple, relations.values.tolist())) == sorted([
+        (persons['Tom Hanks'], movies['Big']), (persons['Tom Hanks'], movies['Sleepless in Seattle']),
+        (persons['Meg Ryan'], movies['Sleepless in Seattle'])])
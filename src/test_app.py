@@ -0,0 +1,23 @@
+import pytest
+from werkzeug.exceptions import Forbidden
+from src.app import app, cache, invalidate_cache
+
+
+def invalidate(headers: dict = {}):
+    with app.test_request_context('/cache/invalidate', method='POST', headers=headers):
+        return invalidate_cache().get_json()
+
+
+def test_invalidate_needs_the_cache_token(monkeypatch):
+    cache.put(('genre', ()), [])
+
+    # Without a configured token the endpoint is disabled
+    monkeypatch.delenv('API_CACHE_TOKEN', raising=False)
+    with pytest.raises(Forbidden):
+        invalidate({'Authorization': 'Bearer '})
+
+    monkeypatch.setenv('API_CACHE_TOKEN', 'secret')
+    for headers in [{}, {'Authorization': 'Bearer wrong'}, {'Authorization': 'Bearer é'}]:
+        with pytest.raises(Forbidden):
+            invalidate(headers)
+    assert invalidate({'Authorization': 'Bearer secret'}) == {'invalidated': 1}